@@ -0,0 +1,240 @@
+# api.py
+from datetime import datetime
+
+import io
+import secrets
+
+import numpy as np
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from models.overlay import NetworkOverlay, save_overlay
+from models.route_planner import AVERAGE_WALK_SPEED
+from models.stop_index import MAX_RESULTS as MAX_STOP_RESULTS
+from utils.isochrone import estimate_cells, walk_grid
+from utils.od_matrix import DEFAULT_MAX_WALK, DEFAULT_PAYMENT_TYPE, compute_matrix, location_label, to_csv
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+MAX_ISOCHRONE_MINUTES = 240
+# grid=1 ile taranacak en fazla hücre (daire alanları toplamından tahmin)
+MAX_ISOCHRONE_CELLS = 200000
+# Izgara boylam adımı cos(enlem)'e bölünür; kutuplara yakın noktalar kabul edilmez.
+MAX_ISOCHRONE_LAT = 85.0
+MAX_MATRIX_CELLS = 500 * 500
+MAX_PROFILE_MINUTES = 24 * 60
+
+
+def api_error(message, status=400):
+    return jsonify({"error": message}), status
+
+
+def network():
+    """İsteğin (çok şehirli modda şehrinin) ağ bağlamı; bkz. app.network_context."""
+    from app import network_context
+    return network_context()
+
+
+def fare_context(args):
+    """Ortak ücret parametreleri: yolcu tipi, ödeme tipi, özel gün."""
+    return {
+        "passenger_type": args.get("passenger_type", "genel").lower(),
+        "payment_type": args.get("payment_type", DEFAULT_PAYMENT_TYPE),
+        "special_day": args.get("special_day") in ("1", "on", "true")
+    }
+
+
+@api_bp.route("/isochrone")
+def isochrone():
+    """
+    GET /api/isochrone?lat=..&lon=..&minutes=30[&passenger_type=..&payment_type=..
+    &special_day=1&start_time=YYYY-MM-DDTHH:MM&grid=1&cell_km=0.25]
+
+    Noktadan verilen sürede ulaşılabilen tüm duraklar ve varış süreleri.
+    grid=1 ile, kalan sürede yürünebilen alanı kaplayan ızgara hücreleri de döner.
+    """
+    try:
+        lat = float(request.args["lat"])
+        lon = float(request.args["lon"])
+        minutes = float(request.args.get("minutes", "30"))
+        cell_km = float(request.args.get("cell_km", "0.25"))
+        start_time_str = request.args.get("start_time", "")
+        start_dt = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M") if start_time_str else None
+    except (KeyError, ValueError):
+        return api_error("lat, lon, minutes, cell_km ve start_time geçerli olmalı.")
+    if not 0 < minutes <= MAX_ISOCHRONE_MINUTES:
+        return api_error(f"minutes 0 ile {MAX_ISOCHRONE_MINUTES} arasında olmalı.")
+    if cell_km <= 0.01:
+        return api_error("cell_km 0.01'den büyük olmalı.")
+    if not (-MAX_ISOCHRONE_LAT <= lat <= MAX_ISOCHRONE_LAT and -180 <= lon <= 180):
+        return api_error(f"lat -{MAX_ISOCHRONE_LAT:g} ile {MAX_ISOCHRONE_LAT:g}, lon -180 ile 180 arasında olmalı.")
+
+    planner = network()["route_planner"]
+    stops = planner.isochrone(lat, lon, minutes, start_time=start_dt, **fare_context(request.args))
+    result = {"origin": [lat, lon], "minutes": minutes, "stops": stops}
+    if request.args.get("grid") in ("1", "true"):
+        circles = [(lat, lon, minutes * AVERAGE_WALK_SPEED)]
+        circles += [(s["lat"], s["lon"], s["walk_radius_km"]) for s in stops]
+        if estimate_cells(circles, cell_km) > MAX_ISOCHRONE_CELLS:
+            return api_error(f"Izgara en fazla {MAX_ISOCHRONE_CELLS} hücre olabilir; cell_km'yi büyütün "
+                             "ya da minutes'ı küçültün.")
+        result["cell_km"] = cell_km
+        result["grid"] = walk_grid(circles, cell_km)
+    return jsonify(result)
+
+
+@api_bp.route("/matrix", methods=["POST"])
+def matrix():
+    """
+    POST /api/matrix, JSON gövde:
+        {"origins": ["bus_otogar", [40.77, 29.95], ...],
+         "destinations": [...],          # verilmezse origins
+         "passenger_type": .., "payment_type": .., "special_day": false,
+         "max_walk": 20, "format": "json" | "csv" | "npz"}
+
+    Her başlangıç için tek arama yapılarak süre (dk) ve ücret (TL) matrisleri
+    döner. JSON'da ulaşılamayan hücreler null'dır.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return api_error("İstek gövdesi bir JSON nesnesi olmalı.")
+    origins = body.get("origins") or []
+    destinations = body.get("destinations") or origins
+    if not isinstance(origins, list) or not isinstance(destinations, list):
+        return api_error("origins ve destinations liste olmalı.")
+    if not origins or len(origins) * len(destinations) > MAX_MATRIX_CELLS:
+        return api_error(f"origins boş olmamalı ve en fazla {MAX_MATRIX_CELLS} hücre istenebilir.")
+    ctx = fare_context({k: str(v).lower() if isinstance(v, bool) else v
+                        for k, v in body.items() if isinstance(v, (str, bool))})
+    planner = network()["route_planner"]
+    try:
+        times, costs = compute_matrix(planner, origins, destinations,
+                                      max_walk=float(body.get("max_walk", DEFAULT_MAX_WALK)), **ctx)
+    except (TypeError, ValueError) as e:
+        return api_error(str(e) or "origins/destinations durak kimliği ya da [lat, lon] olmalı.")
+
+    fmt = body.get("format", "json")
+    if fmt == "npz":
+        buf = io.BytesIO()
+        np.savez_compressed(buf, time=times, cost=costs)
+        return Response(buf.getvalue(), mimetype="application/octet-stream",
+                        headers={"Content-Disposition": "attachment; filename=matrix.npz"})
+    if fmt == "csv":
+        out = to_csv(times, costs, [location_label(o) for o in origins],
+                     [location_label(d) for d in destinations])
+        return Response(out.getvalue(), mimetype="text/csv")
+    reachable = np.isfinite(times)
+    return jsonify({
+        "origins": [location_label(o) for o in origins],
+        "destinations": [location_label(d) for d in destinations],
+        "time": np.where(reachable, times.round(2), None).tolist(),
+        "cost": np.where(reachable, costs.round(2), None).tolist()
+    })
+
+
+@api_bp.route("/profile")
+def profile():
+    """
+    GET /api/profile?start_lat=..&start_lon=..&dest_lat=..&dest_lon=..
+        &window_start=YYYY-MM-DDTHH:MM&window_end=YYYY-MM-DDTHH:MM
+        [&passenger_type=..&payment_type=..&special_day=on&k=3]
+
+    Aralıktaki her kalkış için süre/ücrette Pareto-optimal seçenekler; her
+    seçeneğin kalkış ve varış aralığı (bkz. RoutePlanner.profile).
+    """
+    from app import parse_plan_form, plan_area
+
+    try:
+        params = parse_plan_form(request.args, **plan_area())
+    except ValueError as e:
+        return api_error(str(e))
+    try:
+        window_start = datetime.strptime(request.args["window_start"], "%Y-%m-%dT%H:%M")
+        window_end = datetime.strptime(request.args["window_end"], "%Y-%m-%dT%H:%M")
+    except (KeyError, ValueError):
+        return api_error("window_start ve window_end YYYY-MM-DDTHH:MM biçiminde olmalı.")
+    minutes = (window_end - window_start).total_seconds() / 60
+    if not 0 <= minutes <= MAX_PROFILE_MINUTES:
+        return api_error(f"Kalkış aralığı 0 ile {MAX_PROFILE_MINUTES} dakika arasında olmalı.")
+
+    planner = network()["route_planner"]
+    options = planner.profile(params["start_lat"], params["start_lon"], params["end_lat"], params["end_lon"],
+                              window_start, window_end, params["passenger_type"], params["payment_type"],
+                              params["special_day"], params["k"])
+    return jsonify({"window": [request.args["window_start"], request.args["window_end"]],
+                    "options": options})
+
+
+@api_bp.route("/stops/search")
+def stop_search():
+    """
+    GET /api/stops/search?q=<ad öneki>[&limit=10]
+
+    Adı (herhangi bir kelimesi) ya da kimliği q ile başlayan duraklar ve
+    koordinatları. Büyük/küçük harf ve Türkçe karakter farkı gözetilmez.
+    """
+    try:
+        limit = int(request.args.get("limit", "10"))
+    except ValueError:
+        return api_error("limit tam sayı olmalı.")
+    if not 1 <= limit <= MAX_STOP_RESULTS:
+        return api_error(f"limit 1 ile {MAX_STOP_RESULTS} arasında olmalı.")
+    index = network()["stop_index"]
+    return jsonify({"stops": index.search_stops(request.args.get("q", ""), limit)})
+
+
+@api_bp.route("/fastest")
+def fastest():
+    """
+    GET /api/fastest?from=<durak>&to=<durak>&metric=time|cost
+
+    Statik durak grafiğinde en kısa süreli (ya da indirimsiz en ucuz) yol.
+    CONTRACTION_CACHE ayarlıysa Contraction Hierarchies ile cevaplanır.
+    """
+    metric = request.args.get("metric", "time")
+    if metric not in ("time", "cost"):
+        return api_error("metric time ya da cost olmalı.")
+    planner = network()["route_planner"]
+    result = planner.fastest_path(request.args.get("from", ""), request.args.get("to", ""), metric)
+    if result is None:
+        return api_error("Yol bulunamadı ya da durak bilinmiyor.", 404)
+    value, path = result
+    return jsonify({"metric": metric, "value": round(value, 2), "path": path})
+
+
+@api_bp.route("/overlay", methods=["GET", "PUT", "DELETE"])
+def overlay():
+    """
+    GET    /api/overlay  geçerli aksaklık katmanı ve sürümü
+    PUT    /api/overlay  JSON gövdedeki katmanı uygular (biçim: models/overlay.py)
+    DELETE /api/overlay  katmanı temizler
+
+    Yazma istekleri X-Overlay-Token başlığı OVERLAY_TOKEN ile eşleşmezse 403
+    alır. OVERLAY_PATH ayarlıysa katman dosyaya yazılır; diğer worker'lar
+    dosyayı izleyerek aynı sürüme geçer. Çok şehirli modda şehirler bellekten
+    atılabildiğinden katman değiştirilemez.
+    """
+    from app import overlay_changed
+
+    planner = network()["route_planner"]
+    if request.method == "GET":
+        return jsonify(planner.overlay.to_dict())
+    token = current_app.config["OVERLAY_TOKEN"]
+    if not token or not secrets.compare_digest(request.headers.get("X-Overlay-Token", ""), token):
+        return api_error("Katmanı değiştirme yetkiniz yok.", 403)
+    if "city_registry" in current_app.extensions:
+        return api_error("Çok şehirli modda aksaklık katmanı desteklenmiyor.")
+    try:
+        data = {} if request.method == "DELETE" else request.get_json(force=True)
+        new_overlay = NetworkOverlay(planner.network, data)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        return api_error(str(e) or "Geçersiz katman.")
+
+    previous = planner.overlay
+    watcher = current_app.extensions.get("overlay_watcher")
+    if watcher is not None:
+        save_overlay(new_overlay, watcher.path)
+        changed = watcher.poll(planner)
+    else:
+        changed = planner.set_overlay(new_overlay)
+    overlay_changed(current_app, changed, previous)
+    return jsonify({"version": planner.overlay.version, "changed_stops": sorted(changed)})
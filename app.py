@@ -1,19 +1,341 @@
-from flask import Flask, render_template, request, flash, redirect, url_for
+from flask import Blueprint, Flask, current_app, g, render_template, request, flash, redirect, url_for
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
+import gzip
+import logging
 import os
-import json
+import secrets
+import time
 from datetime import datetime, timedelta
-from models.route_planner import RoutePlanner
+from api import api_bp
+from config import Config
+from models.loader import load_network
+from models.overlay import OverlayWatcher
+from models.route_planner import AVERAGE_WALK_SPEED, BUDGET_SCENARIO, MAX_ALTERNATIVES, SCENARIOS, RoutePlanner
+from models.stop_index import StopIndex
 from factories import PaymentFactory
+from utils.capture import RequestCapture, request_entry
+from utils.city_registry import CityRegistry, UnknownCity
+from utils.profiling import RequestProfiler
+from utils.results_cache import ResultsCache, cache_key
 
-app = Flask(__name__)
-app.secret_key = "secret-key"  # flash mesajları için
+logger = logging.getLogger(__name__)
 
-DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "stops.json")
-with open(DATA_PATH, "r", encoding="utf-8") as f:
-    stops_data = json.load(f)
+bp = Blueprint("main", __name__)
 
-taxi_pricing = stops_data["taxi"]
-route_planner = RoutePlanner(stops_data, taxi_pricing)
+# Planlayıcıya aktarılan arama ayarları (worker süreçlerine de gönderilir)
+PLANNER_SETTINGS = ("BIDIRECTIONAL_SEARCH", "ACCESS_CANDIDATES", "ACCESS_RADIUS_KM",
+                    "WALK_TRANSFER_RADIUS_KM", "ROAD_NETWORK", "ROAD_NETWORK_CACHE")
+# Çok şehirli modun ayarları; Flask dışında şehir bazlı planlayan süreçlere
+# (asgi.py havuzu, toplu planlama, tekrar oynatma) böyle aktarılır.
+CITY_SETTINGS = ("CITIES_DIR", "CITY_CACHE_BYTES", "CITY_IDLE_SECONDS", "DEFAULT_CITY")
+
+# Tek şehirli kurulumda kabul edilen koordinat kutusu (min_lat, max_lat, min_lon, max_lon)
+DEFAULT_BOUNDS = (38, 42, 27, 31)
+DEFAULT_AREA = "Kocaeli"
+
+def load_planner(data_path, walk_radius_km=0.0):
+    """
+    stops.json'ı akış halinde okuyup (bkz. models/loader.py) derlenmiş ağı
+    içeren RoutePlanner'ı kurar; JSON ağacı bellekte tutulmaz.
+    (meta, planner) döndürür. meta: taksi tarifesi, şehir ve harita için
+    serileştirilmiş durak listesi (paylaşımlı bellekte de böyle yayınlanır).
+    walk_radius_km > 0 ise yakın duraklar arasına yürüme aktarmaları eklenir.
+    """
+    parts = []
+    data, network = load_network(data_path, walk_radius_km, AVERAGE_WALK_SPEED,
+                                 on_stop=lambda s: parts.append(htmlsafe_json_dumps(s)))
+    if network.dangling:
+        logger.warning("%s: ağda olmayan %d hedef atlandı: %s", data_path, len(network.dangling),
+                       ", ".join(f"{sid} -> {target} ({field})"
+                                 for sid, target, field in network.dangling[:10]))
+    meta = {
+        "taxi": data["taxi"],
+        "city": data.get("city", ""),
+        "duraklar_json": "[" + ", ".join(parts) + "]"
+    }
+    return meta, RoutePlanner.from_network(network, meta["taxi"], meta["city"])
+
+def configure_planner(planner, settings):
+    """PLANNER_SETTINGS'teki arama ayarlarını planlayıcıya uygular."""
+    planner.bidirectional = settings["BIDIRECTIONAL_SEARCH"]
+    planner.access_k = settings["ACCESS_CANDIDATES"]
+    planner.access_radius_km = settings["ACCESS_RADIUS_KM"]
+    if settings.get("ROAD_NETWORK"):
+        # Süreç başına bir kez yüklenir; şehirler ve yeniden bağlanmalar paylaşır.
+        from models.road_network import load_road_network
+        planner.set_road_network(load_road_network(settings["ROAD_NETWORK"],
+                                                   settings.get("ROAD_NETWORK_CACHE", "")))
+
+def create_app(config=None):
+    """
+    Uygulama fabrikası. Ağ ve indeksler burada bir kez kurulur; gunicorn
+    --preload ile çalışırken bu iş master süreçte yapılır ve worker'lar fork
+    ile hazır yapıyı paylaşır (bkz. wsgi.py).
+
+    config: Config'in üstüne yazılacak ayarlar (sözlük ya da nesne).
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+
+    if not app.config.get("SECRET_KEY"):
+        # Her süreçte farklı anahtar: flash mesajları worker'lar arasında taşınmaz.
+        logger.warning("SECRET_KEY ayarlanmamış; geçici rastgele anahtar kullanılıyor.")
+        app.config["SECRET_KEY"] = secrets.token_hex(32)
+
+    if app.config["CITIES_DIR"]:
+        init_city_registry(app)
+    else:
+        if app.config["SHARED_NETWORK"]:
+            init_shared_network(app)
+        else:
+            meta, planner = load_planner(app.config["DATA_PATH"], app.config["WALK_TRANSFER_RADIUS_KM"])
+            app.extensions["route_planner"] = planner
+            # Harita için durak listesi her istekte yeniden serileştirilmesin.
+            app.extensions["duraklar_json"] = Markup(meta["duraklar_json"])
+            stat = os.stat(app.config["DATA_PATH"])
+            app.extensions["network_version"] = f"{stat.st_mtime_ns}-{stat.st_size}"
+            app.extensions["stop_index"] = StopIndex(planner.network)
+        configure_planner(app.extensions["route_planner"], app.config)
+        if app.config["CONTRACTION_CACHE"]:
+            app.extensions["route_planner"].enable_contraction(app.config["CONTRACTION_CACHE"])
+        if app.config["OVERLAY_PATH"]:
+            init_overlay(app)
+    app.extensions["profiler"] = RequestProfiler(
+        profile_dir=app.config["PROFILE_DIR"],
+        sample_rate=app.config["PROFILE_SAMPLE_RATE"],
+        max_profiles=app.config["PROFILE_MAX_FILES"],
+        slow_threshold_ms=app.config["SLOW_QUERY_MS"],
+        slow_log_path=app.config["SLOW_QUERY_LOG"],
+        header_token=app.config["PROFILE_TOKEN"]
+    )
+    cache_bytes = app.config["RESULTS_CACHE_BYTES"]
+    app.extensions["results_cache"] = ResultsCache(cache_bytes) if cache_bytes > 0 else None
+    if app.config["CAPTURE_LOG"]:
+        init_capture(app)
+    app.register_blueprint(bp)
+    app.register_blueprint(api_bp)
+
+    app.extensions["ready"] = False
+    # Çok şehirli modda şehirler ilk istekte yüklenir; ısıtılacak ağ yok.
+    if app.config["WARMUP"] and "city_registry" not in app.extensions:
+        warm_up(app)
+    app.extensions["ready"] = True
+    return app
+
+def init_shared_network(app):
+    """
+    Ağı paylaşımlı bellekten bağlar (yoksa DATA_PATH'ten derleyip yayınlar).
+    Her istekten önce, en fazla SHARED_NETWORK_POLL saniyede bir, yeni sürüm
+    yayınlanıp yayınlanmadığına bakılır ve gerekirse yeni sürüme geçilir.
+    """
+    from utils.shared_network import SharedNetworkStore
+
+    store = SharedNetworkStore(app.config["SHARED_NETWORK"])
+    if not store.current_version():
+        meta, planner = load_planner(app.config["DATA_PATH"], app.config["WALK_TRANSFER_RADIUS_KM"])
+        store.publish(planner.network, meta)
+
+    def attach():
+        network, meta, version = store.attach()
+        planner = RoutePlanner.from_network(network, meta["taxi"], meta["city"])
+        configure_planner(planner, app.config)
+        app.extensions["route_planner"] = planner
+        app.extensions["duraklar_json"] = Markup(meta["duraklar_json"])
+        app.extensions["network_version"] = version
+        app.extensions["stop_index"] = StopIndex(network)
+
+    attach()
+    last_check = [time.monotonic()]
+
+    @app.before_request
+    def check_network_version():
+        now = time.monotonic()
+        if now - last_check[0] < app.config["SHARED_NETWORK_POLL"]:
+            return
+        last_check[0] = now
+        if store.current_version() != app.extensions["network_version"]:
+            attach()
+
+def init_city_registry(app):
+    """
+    CITIES_DIR'deki şehir ağlarını bulur; her şehir ilk isteğinde yüklenir
+    (bkz. utils/city_registry.py). İsteğin şehri network_context ile seçilir.
+    Paylaşımlı bellek, CH ve aksaklık katmanı dosyası bu modda kullanılmaz.
+    """
+    def load(path):
+        meta, planner = load_planner(path, app.config["WALK_TRANSFER_RADIUS_KM"])
+        configure_planner(planner, app.config)
+        return {"route_planner": planner,
+                "duraklar_json": Markup(meta["duraklar_json"]),
+                "stop_index": StopIndex(planner.network)}
+
+    registry = CityRegistry(app.config["CITIES_DIR"], load, app.config["CITY_CACHE_BYTES"],
+                            app.config["CITY_IDLE_SECONDS"])
+    if not registry.names():
+        raise ValueError(f"{app.config['CITIES_DIR']} içinde şehir ağı (.json) bulunamadı.")
+    if app.config["DEFAULT_CITY"] and app.config["DEFAULT_CITY"] not in registry:
+        raise ValueError(f"DEFAULT_CITY bilinmiyor: {app.config['DEFAULT_CITY']}")
+    app.extensions["city_registry"] = registry
+
+    @app.before_request
+    def check_city():
+        city = request.values.get("city")
+        if city and city not in registry:
+            if request.path.startswith("/api/"):
+                return {"error": f"Bilinmeyen şehir: {city}"}, 404
+            flash(f"Bilinmeyen şehir: {city}")
+            return redirect(url_for("main.route_page"))
+
+def planner_registry(cities, settings):
+    """
+    Flask dışında şehir bazlı planlama için yalnızca planlayıcıları yükleyen
+    CityRegistry. cities: CITY_SETTINGS, settings: PLANNER_SETTINGS anahtarlı sözlükler.
+    """
+    def load(path):
+        _, planner = load_planner(path, settings.get("WALK_TRANSFER_RADIUS_KM", 0.0))
+        configure_planner(planner, settings)
+        return {"route_planner": planner}
+
+    return CityRegistry(cities["CITIES_DIR"], load, cities["CITY_CACHE_BYTES"], cities["CITY_IDLE_SECONDS"])
+
+def resolve_city(registry, values, default=""):
+    """values'taki city; yoksa başlangıç noktasını (ya da lat/lon'u) içeren şehir, o da yoksa default ya da ilk şehir."""
+    city = values.get("city")
+    if city:
+        return city
+    for lat_key, lon_key in (("start_lat", "start_lon"), ("lat", "lon")):
+        try:
+            lat, lon = fix_latlon_if_swapped(float(values[lat_key]), float(values[lon_key]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        found = registry.locate(lat, lon)
+        if found:
+            return found
+    return default or registry.names()[0]
+
+def city_area(registry, city):
+    """parse_plan_form için şehrin sınırları ve adı; bilinmeyen şehirde UnknownCity."""
+    info = registry.cities.get(city) if isinstance(city, str) else None
+    if info is None:
+        raise UnknownCity(city)
+    return {"bounds": info["bounds"], "area": info["label"]}
+
+def request_city(registry):
+    """?city= ya da formdaki city; yoksa başlangıç noktasını (ya da lat/lon'u) içeren şehir."""
+    return resolve_city(registry, request.values, current_app.config["DEFAULT_CITY"])
+
+def network_context():
+    """
+    İsteğin ağ bağlamı: "route_planner", "duraklar_json", "stop_index",
+    "network_version" anahtarları. Tek şehirde app.extensions; çok şehirli
+    modda isteğin şehri (ilk kullanımda yüklenir, istek boyunca sabittir).
+    """
+    registry = current_app.extensions.get("city_registry")
+    if registry is None:
+        return current_app.extensions
+    if "city" not in g:
+        g.city = registry.get(request_city(registry))
+    return g.city
+
+def plan_area():
+    """parse_plan_form için isteğin şehrinin sınırları; tek şehirde varsayılan kutu."""
+    ctx = network_context()
+    if "bounds" not in ctx:
+        return {}
+    return {"bounds": ctx["bounds"], "area": ctx["label"]}
+
+def init_overlay(app):
+    """
+    OVERLAY_PATH'teki aksaklık katmanını uygular. Her istekten önce, en fazla
+    OVERLAY_POLL saniyede bir, dosya değiştiyse katman yeniden yüklenir; böylece
+    aynı dosyayı izleyen tüm worker'lar aynı katman sürümüne geçer.
+    """
+    watcher = OverlayWatcher(app.config["OVERLAY_PATH"])
+    app.extensions["overlay_watcher"] = watcher
+    planner = app.extensions["route_planner"]
+    overlay_changed(app, watcher.poll(planner), planner.overlay)
+    last_check = [time.monotonic()]
+
+    @app.before_request
+    def check_overlay():
+        now = time.monotonic()
+        if now - last_check[0] < app.config["OVERLAY_POLL"]:
+            return
+        last_check[0] = now
+        planner = app.extensions["route_planner"]
+        previous = planner.overlay
+        overlay_changed(app, watcher.poll(planner), previous)
+
+
+def init_capture(app):
+    """
+    /plan ve /api/* isteklerini CAPTURE_LOG'a kaydeder (bkz. utils/capture.py).
+    Kayıt kuyruğa bırakılır; diske yazma istek yolunda yapılmaz.
+    """
+    capture = RequestCapture(app.config["CAPTURE_LOG"], app.config["CAPTURE_MAX_BYTES"],
+                             app.config["CAPTURE_BACKUPS"], app.config["CAPTURE_SAMPLE_RATE"])
+    app.extensions["request_capture"] = capture
+
+    @app.before_request
+    def start_capture():
+        g.capture_start = time.perf_counter()
+
+    @app.after_request
+    def record_capture(response):
+        if "capture_start" in g and (request.path == "/plan" or request.path.startswith("/api/")):
+            entry = request_entry(request, response.status_code,
+                                  (time.perf_counter() - g.capture_start) * 1000)
+            if "city" in g:
+                entry["city"] = g.city["city"]
+            capture.record(entry)
+        return response
+
+def overlay_changed(app, changed_stops, previous):
+    """
+    Katman previous'tan yenisine geçince çağrılır. CH tabloları katmanın
+    etkilediği metrikte kendiliğinden devre dışı kalır. Sonuç önbelleğinden
+    yalnızca değişen duraklara dokunan sayfalar atılır; yeni katman başka
+    rotaları iyileştirebiliyorsa (kapanma kalktı, transfer eklendi...)
+    önbellek tümden temizlenir.
+    """
+    if not changed_stops:
+        return
+    overlay = app.extensions["route_planner"].overlay
+    logger.info("Aksaklık katmanı %s uygulandı; etkilenen duraklar: %s",
+                overlay.version, ", ".join(sorted(changed_stops)))
+    cache = app.extensions.get("results_cache")
+    if cache is None:
+        return
+    if overlay.relaxes(previous):
+        cache.clear()
+    else:
+        cache.evict_stops(changed_stops)
+
+
+def warm_up(app):
+    """
+    Hazır olmadan önce her ödeme tipiyle örnek bir plan çalıştırır ve
+    sonuç şablonunu derler; ilk gerçek istek soğuk başlangıç maliyeti ödemez.
+    """
+    planner = app.extensions["route_planner"]
+    net = planner.network
+    if len(net) < 2:
+        return
+    a, b = 0, len(net) - 1
+    for payment_type in ("nakit", "kredi", "kentkart"):
+        routes = planner.get_alternative_routes(net.lat[a], net.lon[a], net.lat[b], net.lon[b],
+                                                "genel", payment_type)
+    with app.test_request_context():
+        render_template("results.html", routes=routes, payment_results={},
+                        duraklar_json=app.extensions["duraklar_json"])
+
+def get_planner():
+    return network_context()["route_planner"]
 
 def fix_latlon_if_swapped(lat, lon):
     # Örneğin Kocaeli civarında lat ~ 40.x, lon ~ 29.x olmalı.
@@ -22,6 +344,61 @@ def fix_latlon_if_swapped(lat, lon):
         return lon, lat
     return lat, lon
 
+def parse_plan_form(form, bounds=DEFAULT_BOUNDS, area=DEFAULT_AREA):
+    """
+    /plan form verisini (ya da aynı anahtarlı bir sözlüğü) planlayıcı
+    parametrelerine çevirir. Geçersiz girdide kullanıcıya gösterilecek
+    mesajla ValueError fırlatır. bounds: noktaların içinde olması gereken
+    (min_lat, max_lat, min_lon, max_lon) kutusu, area: mesajdaki bölge adı.
+    """
+    try:
+        start_lat = float(form["start_lat"])
+        start_lon = float(form["start_lon"])
+        dest_lat = float(form["dest_lat"])
+        dest_lon = float(form["dest_lon"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Lütfen haritada başlangıç ve varış noktalarını seçiniz.")
+
+    # Opsiyonel: Koordinatları ters girildiyse düzelt
+    start_lat, start_lon = fix_latlon_if_swapped(start_lat, start_lon)
+    dest_lat, dest_lon = fix_latlon_if_swapped(dest_lat, dest_lon)
+
+    # Basit range kontrolü (şehrin ya da varsayılan olarak Kocaeli'nin kutusu)
+    min_lat, max_lat, min_lon, max_lon = bounds
+    if not all(min_lat < lat < max_lat and min_lon < lon < max_lon
+               for lat, lon in ((start_lat, start_lon), (dest_lat, dest_lon))):
+        raise ValueError(f"Girilen koordinatlar geçerli görünmüyor. Lütfen {area} civarında nokta seçiniz.")
+
+    start_time_str = form.get("start_time", "")
+    try:
+        start_dt = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M") if start_time_str else None
+        payment_amount = float(form.get("payment_amount", "0") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Başlangıç zamanı veya ödeme tutarı geçersiz.")
+    try:
+        # Senaryo başına rota sayısı (birincil + alternatifler)
+        k = max(1, min(int(form.get("k", 1) or 1), MAX_ALTERNATIVES))
+    except (TypeError, ValueError):
+        raise ValueError("Alternatif rota sayısı geçersiz.")
+
+    return {
+        "start_lat": start_lat, "start_lon": start_lon,
+        "end_lat": dest_lat, "end_lon": dest_lon,
+        "passenger_type": form.get("passenger_type", "genel").lower(),
+        "payment_type": form.get("payment_type", "nakit"),
+        "payment_amount": payment_amount,
+        "start_time": start_dt,
+        "special_day": form.get("special_day") in ("on", True),
+        "k": k,
+        # Bakiye girildiyse ödenebilen en hızlı rota da aranır (boş/0: kısıt yok).
+        "budget": payment_amount if payment_amount > 0 else None
+    }
+
+def planner_kwargs(params):
+    """parse_plan_form çıktısından get_alternative_routes argümanlarını seçer."""
+    return {k: params[k] for k in ("start_lat", "start_lon", "end_lat", "end_lon", "passenger_type",
+                                   "payment_type", "start_time", "special_day", "k", "budget")}
+
 def pick_best_route(routes):
     best = None
     best_key = None
@@ -40,69 +417,108 @@ def pick_best_route(routes):
                         best_key = k
     return best_key, best
 
-@app.route("/")
+@bp.route("/")
 def index():
     return render_template("index.html")
 
-@app.route("/route")
+@bp.route("/route")
 def route_page():
-    return render_template("route.html")
+    registry = current_app.extensions.get("city_registry")
+    cities = None
+    if registry is not None:
+        # Şehir seçilince harita o şehrin ortasına gider.
+        cities = [{"name": name, "label": info["label"],
+                   "center": [(info["bounds"][0] + info["bounds"][1]) / 2,
+                              (info["bounds"][2] + info["bounds"][3]) / 2]}
+                  for name, info in registry.cities.items()]
+    return render_template("route.html", cities=cities)
 
-@app.route("/plan", methods=["POST"])
-def plan():
-    # Form verilerini al
-    try:
-        start_lat = float(request.form["start_lat"])
-        start_lon = float(request.form["start_lon"])
-        dest_lat = float(request.form["dest_lat"])
-        dest_lon = float(request.form["dest_lon"])
-    except (KeyError, ValueError):
-        flash("Lütfen haritada başlangıç ve varış noktalarını seçiniz.")
-        return redirect(url_for("route_page"))
-        
-    # Opsiyonel: Koordinatları ters girildiyse düzelt
-    start_lat, start_lon = fix_latlon_if_swapped(start_lat, start_lon)
-    dest_lat, dest_lon = fix_latlon_if_swapped(dest_lat, dest_lon)
+def plan_query(params):
+    """parse_plan_form çıktısını paylaşılabilir /plan bağlantısının sorgu parametrelerine çevirir."""
+    query = {
+        "start_lat": params["start_lat"], "start_lon": params["start_lon"],
+        "dest_lat": params["end_lat"], "dest_lon": params["end_lon"],
+        "passenger_type": params["passenger_type"],
+        "payment_type": params["payment_type"],
+        "payment_amount": params["payment_amount"]
+    }
+    if params["start_time"]:
+        query["start_time"] = params["start_time"].strftime("%Y-%m-%dT%H:%M")
+    if params["special_day"]:
+        query["special_day"] = "on"
+    if params["k"] > 1:
+        query["k"] = params["k"]
+    return query
 
-    # Basit range kontrolü (örneğin Kocaeli civarı için)
-    if not (38 < start_lat < 42 and 27 < start_lon < 31 and 38 < dest_lat < 42 and 27 < dest_lon < 31):
-        flash("Girilen koordinatlar geçerli görünmüyor. Lütfen Kocaeli civarında nokta seçiniz.")
-        return redirect(url_for("route_page"))
+def results_version():
+    """
+    Önbellek anahtarına giren sürüm: ağ ve arama ayarları. Aksaklık katmanı
+    anahtara girmez (bkz. overlay_changed), yalnızca ETag'e eklenir.
+    """
+    settings = tuple(current_app.config[k] for k in PLANNER_SETTINGS)
+    return (network_context()["network_version"], settings)
 
-    start_time_str = request.form.get("start_time", "")
-    if start_time_str:
-        start_dt = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M")
-    else:
-        start_dt = None
+def route_stops(routes):
+    """Rotaların (ve alternatiflerinin) adımlarında geçen durak kimlikleri."""
+    stops = set()
+    for route in routes.values():
+        if not route:
+            continue
+        for r in [route] + route.get("alternatives", []):
+            for step in r["steps"]:
+                stops.update((step["from"], step["to"]))
+    return stops
 
-    passenger_type = request.form.get("passenger_type", "genel").lower()
-    payment_type = request.form.get("payment_type", "nakit")
-    payment_amount = float(request.form.get("payment_amount", "0"))
-    special_day = (request.form.get("special_day") == "on")
+def render_plan(params):
+    """
+    Rotaları hesaplayıp (results.html, rotaların geçtiği duraklar) döndürür
+    (önbellekte yoksa çağrılır).
+    """
+    start_lat, start_lon = params["start_lat"], params["start_lon"]
+    dest_lat, dest_lon = params["end_lat"], params["end_lon"]
+    passenger_type = params["passenger_type"]
+    payment_type = params["payment_type"]
+    start_dt = params["start_time"]
+    special_day = params["special_day"]
+    query = plan_query(params)
+    if "city" in network_context():
+        query["city"] = network_context()["city"]
+    share_url = url_for("main.plan", **query)
 
     # Ödeme nesnesi oluştur
-    payment_method = PaymentFactory.create_payment(payment_type, payment_amount)
+    payment_method = PaymentFactory.create_payment(payment_type, params["payment_amount"])
     payment_label = {"kredi": "Kredi Kartı",
                      "kentkart": "KentKart",
                      "nakit": "Nakit"}.get(payment_type, "Nakit")
 
-    # Rotaları hesapla
-    routes = route_planner.get_alternative_routes(
-        start_lat, start_lon, dest_lat, dest_lon,
-        passenger_type, payment_type,
-        start_time=start_dt, special_day=special_day
-    )
+    # Rotaları hesapla (gerekirse profil çıkarılır, yavaşsa loglanır)
+    plan_params = planner_kwargs(params)
+    plan_params["start_time"] = start_dt.isoformat() if start_dt else None
+
+    route_planner = get_planner()
+
+    def run_planner():
+        route_planner.reset_search_stats()
+        return route_planner.get_alternative_routes(
+            start_lat, start_lon, dest_lat, dest_lon,
+            passenger_type, payment_type,
+            start_time=start_dt, special_day=special_day, k=params["k"], budget=params["budget"]
+        )
+
+    profiler = current_app.extensions["profiler"]
+    routes = profiler.run(run_planner, plan_params, request.headers,
+                          stats_func=route_planner.get_search_stats)
 
     if not routes:
-        # Duraklar yine de haritaya basılabilsin diye stops_data'yı gönderelim
-        duraklar = stops_data["duraklar"]
+        # Duraklar yine de haritaya basılabilsin diye gönderelim
         return render_template("results.html",
                                routes={},
                                payment_results={},
-                               duraklar=duraklar)
+                               share_url=share_url,
+                               duraklar_json=network_context()["duraklar_json"]), set()
 
     # En iyi rota (rotaniz) seç
-    best_key, best_val = pick_best_route(routes)
+    best_key, best_val = pick_best_route({name: routes.get(name) for name in SCENARIOS})
     final_routes = {
         "rotaniz": best_val,
         "sadece_taksi": routes.get("sadece_taksi"),
@@ -111,48 +527,79 @@ def plan():
         "otobus_tramvay": routes.get("otobus_tramvay"),
         "taksi_otobus_tramvay": routes.get("taksi_otobus_tramvay")
     }
+    if BUDGET_SCENARIO in routes:
+        final_routes[BUDGET_SCENARIO] = routes[BUDGET_SCENARIO]
 
-    # Ödeme sonuçları
-    import copy
-    payment_results = {}
-    for rkey, r in final_routes.items():
-        if r:
-            pay_copy = copy.deepcopy(payment_method)
-            cost = r["total_cost"]
-            success, msg = pay_copy.pay(cost)
-            payment_results[rkey] = {
-                "success": success,
-                "message": f"{payment_label}: {msg}"
-            }
-        else:
-            payment_results[rkey] = None
+    # Ödeme sonuçları (bakiye değiştirilmeden, tüm rotalar için tek seferde)
+    payable = [rkey for rkey, r in final_routes.items() if r]
+    checks = payment_method.check_many([final_routes[rkey]["total_cost"] for rkey in payable])
+    payment_results = {rkey: None for rkey in final_routes}
+    for rkey, check in zip(payable, checks):
+        payment_results[rkey] = {
+            "success": check.success,
+            "message": f"{payment_label}: {check.message}"
+        }
 
     # Durakları da template'e gönderiyoruz ki haritada göstersin
-    duraklar = stops_data["duraklar"]
-
     return render_template("results.html",
                            routes=final_routes,
                            payment_results=payment_results,
-                           duraklar=duraklar)
+                           share_url=share_url,
+                           duraklar_json=network_context()["duraklar_json"]), route_stops(final_routes)
+
+@bp.route("/plan", methods=["GET", "POST"])
+def plan():
+    """
+    POST: form gönderimi. GET: aynı alanları sorgu parametresi olarak alan
+    paylaşılabilir sonuç bağlantısı. Aynı girdi ve sürüm için sayfa
+    önbellekten (sıkıştırılmış) döner; GET yanıtları ETag taşır ve
+    If-None-Match eşleşirse hiç hesaplama yapılmadan 304 döner.
+    """
+    try:
+        params = parse_plan_form(request.form if request.method == "POST" else request.args, **plan_area())
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for("main.route_page"))
+
+    cache = current_app.extensions["results_cache"]
+    key = cache_key(params, results_version())
+    etag = cache_key(params, (key, network_context()["route_planner"].overlay.version))
+    if request.method == "GET" and etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    body = cache.get(key) if cache else None
+    if body is None:
+        html, stops = render_plan(params)
+        html = html.encode("utf-8")
+        body = cache.put(key, html, stops) if cache else None
+        response = current_app.response_class(html, mimetype="text/html")
+    elif "gzip" in request.accept_encodings:
+        response = current_app.response_class(body, mimetype="text/html")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = current_app.response_class(gzip.decompress(body), mimetype="text/html")
+    response.vary.add("Accept-Encoding")
+    if request.method == "GET":
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+    return response
 
-@app.route("/about")
+@bp.route("/about")
 def about():
     return render_template("about.html")
 
-@app.route("/contact")
+@bp.route("/contact")
 def contact():
     return render_template("contact.html")
 
-@app.route("/results")
+@bp.route("/results")
 def results():
     """
     Bu örnek endpoint test amaçlı.
     Normalde /plan ile rota hesaplayıp sonuç gösteriyorsanız, buna ihtiyacınız olmayabilir.
     """
-    with open("data/stops.json", encoding="utf-8") as f:
-        stops_data_local = json.load(f)
-    duraklar_local = stops_data_local["duraklar"]
-
     routes_example = {
         "rotaniz": {
             "steps": [
@@ -179,7 +626,17 @@ def results():
     return render_template("results.html",
                            routes=routes_example,
                            payment_results=payment_results_example,
-                           duraklar=duraklar_local)
+                           duraklar_json=network_context()["duraklar_json"])
+
+@bp.route("/healthz")
+def healthz():
+    # Yük dengeleyici, ısınma bitmeden trafiği yönlendirmesin.
+    if not current_app.extensions.get("ready"):
+        return {"status": "starting"}, 503
+    registry = current_app.extensions.get("city_registry")
+    if registry is not None:
+        return {"status": "ready", "cities": registry.stats()}
+    return {"status": "ready", "stops": len(get_planner().network)}
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,317 @@
+# asgi.py
+"""
+Asenkron (ASGI) sunum modu, app.py'nin yanında:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+- İstek gövdesini okuma, girdi ayrıştırma, JSON serileştirme ve akış olay
+  döngüsünde yapılır; yavaş istemciler bir worker thread'ini bağlamaz.
+- CPU yoğun planlama, her biri ağı bir kez yükleyen sınırlı bir süreç
+  havuzunda (PLAN_WORKERS) çalışır. Aynı anda en fazla PLAN_MAX_PENDING
+  planlama isteği kabul edilir; fazlası kuyrukta beklemeden 503 alır. Bir
+  isteğin yeri, istemci kopsa da havuzdaki işleri bitene kadar tutulur.
+- POST /api/plan burada karşılanır (JSON ya da form gövdesi, /plan ile aynı
+  alanlar). ?stream=1 ile her senaryo bittikçe NDJSON satırı olarak gönderilir.
+- Çok şehirli modda (CITIES_DIR) isteğin şehri Flask'taki gibi seçilir
+  (city alanı ya da başlangıç noktası); worker'lar şehirleri ilk kullanımda
+  yükler.
+- Diğer tüm yollar Flask uygulamasına (thread havuzunda) iletilir; arayüz
+  aynen çalışır.
+"""
+import asyncio
+import io
+import json
+import math
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs
+
+from app import (CITY_SETTINGS, PLANNER_SETTINGS, city_area, create_app, parse_plan_form, pick_best_route,
+                 planner_kwargs, resolve_city)
+from models.route_planner import BUDGET_SCENARIO, SCENARIOS
+from utils.capture import asgi_entry
+from utils.city_registry import UnknownCity
+from utils.plan_pool import init_worker, plan_scenario
+
+MAX_BODY_SIZE = 64 * 1024
+# JSON gövdede metin olması gereken alanlar (form gövdesinde her değer metindir).
+TEXT_FIELDS = ("passenger_type", "payment_type", "start_time", "city")
+
+
+class BodyTooLarge(Exception):
+    pass
+
+#----------------------------------------------------------------------
+# ASGI uygulaması
+#----------------------------------------------------------------------
+class AsyncPlannerApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.plan_workers = flask_app.config["PLAN_WORKERS"]
+        self.max_pending = flask_app.config["PLAN_MAX_PENDING"]
+        self.pending = 0
+        self.pool = None
+
+    def _get_pool(self):
+        if self.pool is None:
+            cfg = self.flask_app.config
+            cities = {key: cfg[key] for key in CITY_SETTINGS} if cfg["CITIES_DIR"] else None
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.plan_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(cfg["DATA_PATH"], cfg["SHARED_NETWORK"], cfg["OVERLAY_PATH"],
+                          {key: cfg[key] for key in PLANNER_SETTINGS}, cities)
+            )
+        return self.pool
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        try:
+            body = await self._read_body(receive)
+        except BodyTooLarge:
+            await _send_json(send, 413, {"error": "İstek gövdesi çok büyük."})
+            return
+        if body is None:
+            return  # istemci gövdeyi göndermeden koptu; yarım gövde işlenmez
+        if scope["path"] == "/api/plan" and scope["method"] == "POST":
+            capture = self.flask_app.extensions.get("request_capture")
+            if capture is None:
+                await self.api_plan(scope, body, send)
+            else:
+                await self._captured_api_plan(capture, scope, body, send)
+        else:
+            await self._forward_to_flask(scope, body, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._get_pool()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.pool is not None:
+                    self.pool.shutdown(cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        """Gövde; istemci koptuysa None, MAX_BODY_SIZE aşılırsa BodyTooLarge."""
+        chunks = []
+        size = 0
+        more = True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_SIZE:
+                raise BodyTooLarge()
+            chunks.append(chunk)
+            more = message.get("more_body", False)
+        return b"".join(chunks)
+
+    async def api_plan(self, scope, body, send):
+        headers = dict(scope["headers"])
+        try:
+            if headers.get(b"content-type", b"").startswith(b"application/json"):
+                form = json.loads(body or b"{}")
+                _check_json_fields(form)
+            else:
+                form = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+            city, area = self._city(form)
+            params = parse_plan_form(form, **area)
+        except UnknownCity as e:
+            await _send_json(send, 404, {"error": f"Bilinmeyen şehir: {e}"})
+            return
+        except ValueError as e:
+            await _send_json(send, 400, {"error": str(e)})
+            return
+
+        # Geri basınç: havuz doluysa beklemeden reddet.
+        if self.pending >= self.max_pending:
+            await _send_json(send, 503, {"error": "Sunucu meşgul, lütfen tekrar deneyin."},
+                             extra_headers=[(b"retry-after", b"1")])
+            return
+        self.pending += 1
+        kwargs = planner_kwargs(params)
+        names = SCENARIOS + ((BUDGET_SCENARIO,) if kwargs["budget"] is not None else ())
+        try:
+            pool = self._get_pool()
+            jobs = [pool.submit(plan_scenario, name, kwargs, city) for name in names]
+        except Exception:
+            self.pending -= 1
+            raise
+        self._hold_slot(jobs)
+        tasks = [asyncio.ensure_future(self._plan(name, job)) for name, job in zip(names, jobs)]
+        try:
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            if "1" in query.get("stream", []):
+                await self._stream_routes(send, tasks)
+            else:
+                routes = dict(await asyncio.gather(*tasks))
+                routes["rotaniz"] = _pick_best(routes)
+                await _send_json(send, 200, {"routes": routes})
+        finally:
+            # Henüz başlamamış işler de iptal edilir; çalışanlar bitince yer boşalır.
+            for task in tasks:
+                task.cancel()
+
+    def _hold_slot(self, jobs):
+        """İsteğin yerini havuzdaki bütün işleri bitene (ya da iptal edilene) kadar tutar."""
+        loop = asyncio.get_running_loop()
+        remaining = [len(jobs)]
+
+        def job_done():
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                self.pending -= 1
+
+        def on_done(job):
+            # Havuzun thread'inde çağrılır; sayaç olay döngüsünde güncellenir.
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(job_done)
+
+        for job in jobs:
+            job.add_done_callback(on_done)
+
+    def _city(self, form):
+        """(şehir, parse_plan_form sınırları); tek şehirde (None, {})."""
+        registry = self.flask_app.extensions.get("city_registry")
+        if registry is None:
+            return None, {}
+        city = resolve_city(registry, form, self.flask_app.config["DEFAULT_CITY"])
+        return city, city_area(registry, city)
+
+    async def _captured_api_plan(self, capture, scope, body, send):
+        # Flask'a uğramayan /api/plan da CAPTURE_LOG'a yazılır (bkz. app.init_capture).
+        status = []
+
+        async def send_and_note(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.api_plan(scope, body, send_and_note)
+        finally:
+            capture.record(asgi_entry(scope, body, status[0] if status else 500,
+                                      (time.perf_counter() - t0) * 1000))
+
+    async def _plan(self, scenario, job):
+        # Görev iptal edilirse wrap_future başlamamış işi de iptal eder.
+        route = await asyncio.wrap_future(job)
+        return scenario, route
+
+    async def _stream_routes(self, send, tasks):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson; charset=utf-8")]})
+        routes = {}
+        for done in asyncio.as_completed(tasks):
+            name, route = await done
+            routes[name] = route
+            await send({"type": "http.response.body", "more_body": True,
+                        "body": _ndjson({"scenario": name, "route": route})})
+        await send({"type": "http.response.body", "more_body": False,
+                    "body": _ndjson({"scenario": "rotaniz", "route": _pick_best(routes)})})
+
+    async def _forward_to_flask(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(
+            None, _call_wsgi, self.flask_app, scope, body)
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]})
+        await send({"type": "http.response.body", "body": content})
+
+
+def _check_json_fields(form):
+    """
+    JSON gövdenin parse_plan_form'a girebilecek türde olduğunu denetler;
+    değilse ValueError (400). Metin alanları metin, diğerleri sonlu sayı,
+    bool, metin ya da null olmalı.
+    """
+    if not isinstance(form, dict):
+        raise ValueError("İstek gövdesi bir JSON nesnesi olmalı.")
+    for key, value in form.items():
+        if key in TEXT_FIELDS:
+            valid = isinstance(value, str)
+        elif isinstance(value, float):
+            valid = math.isfinite(value)
+        else:
+            valid = value is None or isinstance(value, (str, int, bool))
+        if not valid:
+            raise ValueError(f"Geçersiz alan türü: {key}")
+
+
+def _pick_best(routes):
+    # Bütçe rotası "rotaniz" seçimine katılmaz (bkz. app.render_plan).
+    return pick_best_route({name: routes.get(name) for name in SCENARIOS})[1]
+
+
+def _ndjson(obj):
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _send_json(send, status, obj, extra_headers=()):
+    payload = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                            (b"content-length", str(len(payload)).encode())] + list(extra_headers)})
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _call_wsgi(wsgi_app, scope, body):
+    """ASGI isteğini WSGI environ'a çevirip Flask'ı çağırır (thread havuzunda)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value.decode("latin-1")
+        elif key != "CONTENT_LENGTH":
+            key = "HTTP_" + key
+            value = value.decode("latin-1")
+            environ[key] = environ[key] + "," + value if key in environ else value
+
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = headers
+
+    result = wsgi_app(environ, start_response)
+    try:
+        content = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], content
+
+
+app = AsyncPlannerApp(create_app())
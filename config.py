@@ -0,0 +1,82 @@
+# config.py
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Config:
+    """
+    Varsayılan uygulama ayarları. Her değer aynı isimli ortam değişkeniyle
+    ezilebilir; create_app(config) ile verilen sözlük bunların da üstüne yazılır.
+    """
+    # Üretimde mutlaka ortamdan verilmeli; boşsa create_app rastgele bir anahtar üretir.
+    SECRET_KEY = os.environ.get("SECRET_KEY")
+    DATA_PATH = os.environ.get("DATA_PATH", os.path.join(BASE_DIR, "data", "stops.json"))
+
+    # Boş değilse çok şehirli mod: bu dizindeki her <şehir>.json ayrı bir ağdır ve ilk
+    # istekte yüklenir (bkz. utils/city_registry.py). Yüklü ağların tahmini toplamı
+    # CITY_CACHE_BYTES'ı aşarsa en az yakın zamanda kullanılanlar atılır; CITY_IDLE_SECONDS
+    # > 0 ise bu süredir kullanılmayanlar da. Şehir ne ?city= ile verilmiş ne de
+    # koordinattan bulunabiliyorsa DEFAULT_CITY (boşsa ilk şehir) kullanılır.
+    CITIES_DIR = os.environ.get("CITIES_DIR", "")
+    CITY_CACHE_BYTES = int(os.environ.get("CITY_CACHE_BYTES", str(1024 * 1024 * 1024)))
+    CITY_IDLE_SECONDS = float(os.environ.get("CITY_IDLE_SECONDS", "0"))
+    DEFAULT_CITY = os.environ.get("DEFAULT_CITY", "")
+
+    # Boş değilse ağ bu önekle paylaşımlı bellekten bağlanır (bkz. utils/shared_network.py)
+    SHARED_NETWORK = os.environ.get("SHARED_NETWORK", "")
+    SHARED_NETWORK_POLL = float(os.environ.get("SHARED_NETWORK_POLL", "1.0"))
+
+    # Boş değilse Contraction Hierarchies kurulur ve bu .npz dosyasında saklanır
+    CONTRACTION_CACHE = os.environ.get("CONTRACTION_CACHE", "")
+
+    # Boş değilse aksaklık katmanı (gecikme/kapanma/ek transfer) bu JSON dosyasından
+    # okunur ve OVERLAY_POLL saniyede bir değişikliğe bakılır (bkz. models/overlay.py).
+    # PUT /api/overlay yalnızca X-Overlay-Token başlığı OVERLAY_TOKEN ile eşleşirse çalışır.
+    OVERLAY_PATH = os.environ.get("OVERLAY_PATH", "")
+    OVERLAY_POLL = float(os.environ.get("OVERLAY_POLL", "1.0"))
+    OVERLAY_TOKEN = os.environ.get("OVERLAY_TOKEN", "")
+
+    # Birbirine bu mesafeden (km) yakın duraklar arasına yüklemede yürüme aktarması
+    # eklenir; 0 ise yalnızca stops.json'daki transferler kullanılır.
+    WALK_TRANSFER_RADIUS_KM = float(os.environ.get("WALK_TRANSFER_RADIUS_KM", "0"))
+
+    # Durak-durak BFS'lerinde iki yönlü arama (büyük ağlarda daha az düğüm açar)
+    BIDIRECTIONAL_SEARCH = os.environ.get("BIDIRECTIONAL_SEARCH", "0") == "1"
+
+    # Başlangıç/varışta en yakın kaç durak ve hangi yarıçaptaki (km) duraklar aday olsun.
+    # 1 ve 0: yalnızca en yakın durak (bkz. RoutePlanner._connect)
+    ACCESS_CANDIDATES = int(os.environ.get("ACCESS_CANDIDATES", "1"))
+    ACCESS_RADIUS_KM = float(os.environ.get("ACCESS_RADIUS_KM", "0"))
+
+    # Taksi ve yürüme bacakları için yerel OSM özütü (.osm, .osm.gz, .osm.pbf) ya
+    # da hazır .npz yol ağı; boşsa kuş uçuşu. Derlenen ağ ROAD_NETWORK_CACHE'e
+    # yazılır ve özüt değişmedikçe oradan okunur (bkz. models/road_network.py).
+    ROAD_NETWORK = os.environ.get("ROAD_NETWORK", "")
+    ROAD_NETWORK_CACHE = os.environ.get("ROAD_NETWORK_CACHE", "")
+
+    # /plan sonuç sayfaları için sıkıştırılmış önbellek boyutu (bayt); 0 ise kapalı
+    RESULTS_CACHE_BYTES = int(os.environ.get("RESULTS_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+    # Asenkron sunum modu (asgi.py): planlama süreç sayısı ve bekleyen istek sınırı
+    PLAN_WORKERS = int(os.environ.get("PLAN_WORKERS", os.cpu_count() or 2))
+    PLAN_MAX_PENDING = int(os.environ.get("PLAN_MAX_PENDING", 4 * (os.cpu_count() or 2)))
+
+    # Açılışta örnek sorgularla önbellekleri ısıt
+    WARMUP = os.environ.get("WARMUP", "1") == "1"
+
+    # Profil ve yavaş sorgu ayarları
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "50"))
+    # X-Profile başlığı yalnızca bu değeri taşırsa profil çıkarılır; boşsa başlık yok sayılır.
+    PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", os.path.join(BASE_DIR, "logs", "slow_queries.log"))
+
+    # İstek kaydı (boşsa kapalı); yolda {pid} worker başına ayrı dosya verir.
+    # Dosya CAPTURE_MAX_BYTES'ı geçince sıkıştırılıp döndürülür.
+    CAPTURE_LOG = os.environ.get("CAPTURE_LOG", "")
+    CAPTURE_MAX_BYTES = int(os.environ.get("CAPTURE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CAPTURE_BACKUPS = int(os.environ.get("CAPTURE_BACKUPS", "5"))
+    CAPTURE_SAMPLE_RATE = float(os.environ.get("CAPTURE_SAMPLE_RATE", "1.0"))
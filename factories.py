@@ -10,3 +10,11 @@ class PaymentFactory:
             return KentKart(amount)
         else:
             return Nakit(amount)
+
+    @staticmethod
+    def check_affordability(payment_type, amount, costs):
+        """
+        Verilen bakiyeyle her bir ücretin ödenip ödenemeyeceğini döndürür
+        (PaymentCheck listesi). Hiçbir bakiye değiştirilmez.
+        """
+        return PaymentFactory.create_payment(payment_type, amount).check_many(costs)
@@ -0,0 +1,8 @@
+# gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Ağ master'da bir kez kurulsun, worker'lar fork ile devralsın.
+preload_app = True
@@ -0,0 +1,270 @@
+# models/contraction.py
+"""
+Durak grafiği üzerinde Contraction Hierarchies (CH).
+
+Statik graf: otobüs/tramvay, transfer ve yürüme aktarma kenarları; ağırlık olarak
+"time" (dakika) ya da "cost" (indirimsiz ücret) kullanılır. Ön işlemede
+düğümler önem sırasına göre daraltılır, gerekli kısayollar eklenir. Sorgu,
+iki yönlü ve yalnızca "yukarı" (daha yüksek sıralı düğümlere) giden bir
+Dijkstra'dır; kısayollar orta düğüm üzerinden açılarak gerçek yol bulunur.
+
+Hiyerarşi, ağın parmak iziyle birlikte .npz olarak saklanır; ağ değişince
+load_or_build yeniden kurar.
+"""
+import heapq
+import math
+import os
+
+import numpy as np
+
+from models.network import NO_STOP
+
+METRICS = ("time", "cost")
+WITNESS_SETTLE_LIMIT = 50
+
+
+def static_edges(network, metric):
+    """(u, v, ağırlık) listesi; paralel kenarlarda en küçük ağırlık kalır."""
+    weights = network.edge_time if metric == "time" else network.edge_fare
+    tr_weights = network.transfer_time if metric == "time" else network.transfer_fare
+    best = {}
+    for u in range(len(network)):
+        for k in network.edges(u):
+            v = int(network.edge_to[k])
+            if u != v:
+                key = (u, v)
+                best[key] = min(best.get(key, math.inf), float(weights[k]))
+        v = int(network.transfer_to[u])
+        if v != NO_STOP and v != u:
+            best[(u, v)] = min(best.get((u, v), math.inf), float(tr_weights[u]))
+        for k in network.walks(u):
+            v = int(network.walk_to[k])
+            w = float(network.walk_time[k]) if metric == "time" else 0.0
+            best[(u, v)] = min(best.get((u, v), math.inf), w)
+    return [(u, v, w) for (u, v), w in best.items()]
+
+
+class ContractionHierarchy:
+    def __init__(self, rank, fwd, bwd):
+        # fwd[v]: v'den daha yüksek sıralı düğümlere kenarlar {x: (w, orta)}
+        # bwd[v]: daha yüksek sıralı u'lardan v'ye gelen kenarlar {u: (w, orta)}
+        self.rank = rank
+        self.fwd = fwd
+        self.bwd = bwd
+
+    #----------------------------------------------------------------------
+    # Ön işleme
+    #----------------------------------------------------------------------
+    @classmethod
+    def build(cls, n, edges):
+        out_adj = [dict() for _ in range(n)]
+        in_adj = [dict() for _ in range(n)]
+        for u, v, w in edges:
+            if w < out_adj[u].get(v, (math.inf,))[0]:
+                out_adj[u][v] = (w, NO_STOP)
+                in_adj[v][u] = (w, NO_STOP)
+
+        contracted = [False] * n
+        deleted_neighbors = [0] * n
+        rank = [0] * n
+        fwd = [dict() for _ in range(n)]
+        bwd = [dict() for _ in range(n)]
+
+        def shortcuts(v):
+            result = []
+            for u, (w_in, _) in in_adj[v].items():
+                targets = {x: w_in + w_out for x, (w_out, _) in out_adj[v].items() if x != u}
+                if not targets:
+                    continue
+                dist = cls._witness(out_adj, u, v, max(targets.values()), targets)
+                for x, w in targets.items():
+                    if dist.get(x, math.inf) > w:
+                        result.append((u, x, w))
+            return result
+
+        def importance(v):
+            return (len(shortcuts(v)) - len(in_adj[v]) - len(out_adj[v])
+                    + deleted_neighbors[v])
+
+        heap = [(importance(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # Tembel güncelleme: önem değiştiyse ve artık en küçük değilse geri koy.
+            imp = importance(v)
+            if heap and imp > heap[0][0]:
+                heapq.heappush(heap, (imp, v))
+                continue
+            for u, x, w in shortcuts(v):
+                if w < out_adj[u].get(x, (math.inf,))[0]:
+                    out_adj[u][x] = (w, v)
+                    in_adj[x][u] = (w, v)
+            fwd[v] = dict(out_adj[v])
+            bwd[v] = dict(in_adj[v])
+            for x in out_adj[v]:
+                del in_adj[x][v]
+                deleted_neighbors[x] += 1
+            for u in in_adj[v]:
+                del out_adj[u][v]
+                deleted_neighbors[u] += 1
+            out_adj[v] = {}
+            in_adj[v] = {}
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+        return cls(rank, fwd, bwd)
+
+    @staticmethod
+    def _witness(out_adj, source, skip, limit, targets):
+        # v'yi kullanmadan, sınırlı bir Dijkstra ile u'dan hedeflere mesafeler.
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        settled = 0
+        remaining = set(targets)
+        while heap and remaining and settled < WITNESS_SETTLE_LIMIT:
+            d, x = heapq.heappop(heap)
+            if d > dist.get(x, math.inf):
+                continue
+            if d > limit:
+                break
+            settled += 1
+            remaining.discard(x)
+            for y, (w, _) in out_adj[x].items():
+                if y == skip:
+                    continue
+                nd = d + w
+                if nd < dist.get(y, math.inf):
+                    dist[y] = nd
+                    heapq.heappush(heap, (nd, y))
+        return dist
+
+    #----------------------------------------------------------------------
+    # Sorgu
+    #----------------------------------------------------------------------
+    def query(self, s, t):
+        """(mesafe, düğüm yolu) ya da ulaşılamıyorsa (inf, None)."""
+        if s == t:
+            return 0.0, [s]
+        dist = ({s: 0.0}, {t: 0.0})
+        parent = ({s: None}, {t: None})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        graphs = (self.fwd, self.bwd)
+        best, meet = math.inf, None
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                if heap[0][0] >= best:
+                    heap.clear()
+                    continue
+                d, v = heapq.heappop(heap)
+                if d > dist[side][v]:
+                    continue
+                other = dist[1 - side].get(v)
+                if other is not None and d + other < best:
+                    best, meet = d + other, v
+                for x, (w, _) in graphs[side][v].items():
+                    nd = d + w
+                    if nd < dist[side].get(x, math.inf):
+                        dist[side][x] = nd
+                        parent[side][x] = v
+                        heapq.heappush(heap, (nd, x))
+        if meet is None:
+            return math.inf, None
+        up = []
+        v = meet
+        while v is not None:
+            up.append(v)
+            v = parent[0][v]
+        up.reverse()
+        down = []
+        v = parent[1][meet]
+        while v is not None:
+            down.append(v)
+            v = parent[1][v]
+        path = up + down
+        return best, self._unpack_path(path)
+
+    def _unpack_path(self, path):
+        result = [path[0]]
+        for u, x in zip(path, path[1:]):
+            self._unpack_edge(u, x, result)
+        return result
+
+    def _edge(self, u, x):
+        # Yukarı doğru saklanan yön: düşük sıralı uçta
+        if self.rank[u] < self.rank[x]:
+            return self.fwd[u][x]
+        return self.bwd[x][u]
+
+    def _unpack_edge(self, u, x, out):
+        stack = [(u, x)]
+        while stack:
+            a, b = stack.pop()
+            mid = self._edge(a, b)[1]
+            if mid == NO_STOP:
+                out.append(b)
+            else:
+                stack.append((mid, b))
+                stack.append((a, mid))
+
+    #----------------------------------------------------------------------
+    # Saklama
+    #----------------------------------------------------------------------
+    def to_arrays(self, prefix):
+        arrays = {prefix + "rank": np.asarray(self.rank, dtype=np.int64)}
+        for name, graph in (("fwd", self.fwd), ("bwd", self.bwd)):
+            start, to, w, mid = [0], [], [], []
+            for adj in graph:
+                for x, (wx, m) in adj.items():
+                    to.append(x)
+                    w.append(wx)
+                    mid.append(m)
+                start.append(len(to))
+            arrays[prefix + name + "_start"] = np.asarray(start, dtype=np.int64)
+            arrays[prefix + name + "_to"] = np.asarray(to, dtype=np.int64)
+            arrays[prefix + name + "_w"] = np.asarray(w, dtype=np.float64)
+            arrays[prefix + name + "_mid"] = np.asarray(mid, dtype=np.int64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        rank = arrays[prefix + "rank"].tolist()
+        graphs = []
+        for name in ("fwd", "bwd"):
+            start = arrays[prefix + name + "_start"].tolist()
+            to = arrays[prefix + name + "_to"].tolist()
+            w = arrays[prefix + name + "_w"].tolist()
+            mid = arrays[prefix + name + "_mid"].tolist()
+            graphs.append([{to[k]: (w[k], mid[k]) for k in range(start[v], start[v + 1])}
+                           for v in range(len(rank))])
+        return cls(rank, graphs[0], graphs[1])
+
+
+def build_hierarchies(network):
+    return {m: ContractionHierarchy.build(len(network), static_edges(network, m)) for m in METRICS}
+
+
+def load_or_build(network, path):
+    """
+    path'teki hiyerarşiler ağın parmak iziyle eşleşiyorsa yükler; yoksa
+    (ya da veri değiştiyse) kurup path'e yazar. {metrik: ContractionHierarchy} döner.
+    """
+    fingerprint = network.fingerprint()
+    if path and os.path.exists(path):
+        with np.load(path) as data:
+            if str(data["fingerprint"]) == fingerprint:
+                return {m: ContractionHierarchy.from_arrays(data, m + "_") for m in METRICS}
+    hierarchies = build_hierarchies(network)
+    if path:
+        arrays = {"fingerprint": np.asarray(fingerprint)}
+        for m, ch in hierarchies.items():
+            arrays.update(ch.to_arrays(m + "_"))
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+    return hierarchies
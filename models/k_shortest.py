@@ -0,0 +1,171 @@
+# models/k_shortest.py
+"""
+Durum grafı üzerinde k en kısa döngüsüz yol (Yen).
+
+Hedef duraktan ters kenarlar üzerinde, durum bayraklarını yok sayarak bir
+kez Dijkstra çalıştırılır. Bu ters en kısa yol ağacındaki süreler her
+durum için alt sınırdır ve bütün sapma (spur) aramalarında A* sezgiseli
+olarak kullanılır. Kenar çıkarmak mesafeleri yalnızca artırdığından
+sezgisel geçerli kalır ve ağacın bozulmayan kısmında arama doğrudan hedefe
+ilerler. Ağaçta olmayan (hedefe süre sınırı içinde ulaşamayan) duraklar
+hiç açılmaz. Böylece k yol için k tam arama yapılmaz; sapma aramalarının
+toplam işi de ters aramanın sabit bir katıyla sınırlanır.
+
+Graf fonksiyonlarla verilir (bkz. RoutePlanner._alternative_connections):
+    succ(durum) -> (komşu durum, kenar tipi, kenar) üreteci
+    weight(kenar tipi, kenar) -> dakika
+    node(durum) -> durak indeksi (döngüsüzlük durak üzerinden denetlenir)
+    pred(durak) -> (önceki durak, dakika) üreteci (ters ağaç için)
+Yollar (önceki durum, kenar tipi, kenar) zinciri olarak üretilir
+(bkz. RoutePlanner._chain_to).
+"""
+import heapq
+import math
+
+
+def reverse_distances(targets, pred, limit=math.inf):
+    """Her duraktan targets'tan birine en kısa süre ({durak: dakika}, açılan durak sayısı); limit'e kadar."""
+    dist = dict.fromkeys(targets, 0.0)
+    heap = [(0.0, v) for v in targets]
+    heapq.heapify(heap)
+    settled = {}
+    while heap:
+        d, v = heapq.heappop(heap)
+        if v in settled:
+            continue
+        if d > limit:
+            break
+        settled[v] = d
+        for u, w in pred(v):
+            nd = d + w
+            if nd < dist.get(u, math.inf):
+                dist[u] = nd
+                heapq.heappush(heap, (nd, u))
+    return settled, len(settled)
+
+
+def _spur_search(source, goals, goal_nodes, succ, weight, node, h, blocked, removed, limit, budget):
+    """
+    source'tan hedefe, blocked duraklarına girmeden, removed kenarlarını
+    kullanmadan ve süresi limit'i aşmadan A*. (süre, durumlar, kenarlar) ya
+    da None; açılan durum sayısı. budget durum açıldıysa vazgeçilir.
+    """
+    g = {source: 0.0}
+    parent = {source: None}
+    heap = [(h[node(source)], 0.0, 0, source)]
+    counter = 1
+    expanded = 0
+    while heap:
+        _, neg_d, _, state = heapq.heappop(heap)
+        d = -neg_d
+        if d > g[state]:
+            continue
+        expanded += 1
+        if expanded > budget:
+            return None, expanded
+        if state in goals:
+            states, edges = [state], []
+            while parent[state] is not None:
+                state, edgeMode, k = parent[state]
+                states.append(state)
+                edges.append((edgeMode, k))
+            states.reverse()
+            edges.reverse()
+            return (d, states, edges), expanded
+        if node(state) in goal_nodes:
+            # Hedef durağa gelindi ama kısıt sağlanmadı; BFS'teki gibi devam edilmez.
+            continue
+        for nxt, edgeMode, k in succ(state):
+            v = node(nxt)
+            if v not in h or v in blocked or (state, edgeMode, k) in removed:
+                continue
+            nd = d + weight(edgeMode, k)
+            if nd + h[v] <= limit and nd < g.get(nxt, math.inf):
+                g[nxt] = nd
+                parent[nxt] = (state, edgeMode, k)
+                # Eşit f'de derin olan önce: sıkı sezgiselle yol boyunca ilerler.
+                heapq.heappush(heap, (nd + h[v], -nd, counter, nxt))
+                counter += 1
+    return None, expanded
+
+
+def k_shortest_paths(source, goals, succ, weight, node, pred, max_cost, max_paths,
+                     budget=math.inf, record=None):
+    """
+    source'tan goals'tan birine, süresi max_cost'u aşmayan en fazla
+    max_paths döngüsüz yolu süreye göre artan sırada üretir: (dakika,
+    zincir). Üreteç olduğundan çağıran yeterince yol aldığında erken de
+    durabilir. Sapma aramaları toplamda ters aramanın budget katından fazla
+    durum açınca üretim biter. record verilirse her aramanın açtığı durum
+    sayısıyla çağrılır.
+    """
+    goals = set(goals)
+    goal_nodes = {node(g) for g in goals}
+    h, expanded = reverse_distances(goal_nodes, pred, max_cost)
+    if record:
+        record(expanded)
+    remaining = max(expanded, 1) * budget
+    if node(source) not in h:
+        return
+
+    result, expanded = _spur_search(source, goals, goal_nodes, succ, weight, node, h,
+                                    set(), set(), max_cost, remaining)
+    if record:
+        record(expanded)
+    remaining -= expanded
+    if result is None:
+        return
+    cost, states, edges = result
+    found = []  # (durumlar, kenarlar)
+    seen = {tuple(edges)}
+    candidates = [(cost, 0, states, edges)]
+    counter = 1
+
+    while candidates and len(found) < max_paths:
+        cost, _, states, edges = heapq.heappop(candidates)
+        found.append((states, edges))
+        nodes = [node(s) for s in states]
+        if len(set(nodes)) == len(nodes):
+            yield cost, [(states[j], edgeMode, k) for j, (edgeMode, k) in enumerate(edges)]
+
+        # Bu yolun her durumundan sapan en kısa yollar aday olur. j. durumdan
+        # sapan yol, bu yolla ilk j + 1 durumu ortak olan bulunmuş yolların
+        # j. kenarını kullanamaz.
+        shared = [(_common_prefix(states, p_states), p_edges) for p_states, p_edges in found]
+        blocked = set()
+        root_cost = 0.0
+        for j in range(len(edges)):
+            spur = states[j]
+            removed = {(spur,) + p_edges[j] for common, p_edges in shared
+                       if common > j and len(p_edges) > j}
+            result, expanded = _spur_search(spur, goals, goal_nodes, succ, weight, node, h,
+                                            blocked, removed, max_cost - root_cost, remaining)
+            if record:
+                record(expanded)
+            remaining -= expanded
+            if remaining <= 0:
+                return
+            if result is not None:
+                spur_cost, spur_states, spur_edges = result
+                new_edges = edges[:j] + spur_edges
+                key = tuple(new_edges)
+                if key not in seen:
+                    seen.add(key)
+                    heapq.heappush(candidates, (root_cost + spur_cost, counter,
+                                                states[:j] + spur_states, new_edges))
+                    counter += 1
+                    # Kalan yol sayısından fazla aday tutulmaz (uzun yollarda bellek).
+                    need = max_paths - len(found)
+                    if len(candidates) > 2 * need:
+                        candidates = heapq.nsmallest(need, candidates)
+            root_cost += weight(*edges[j])
+            blocked.add(nodes[j])
+
+
+def _common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
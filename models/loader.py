@@ -0,0 +1,127 @@
+# models/loader.py
+"""
+stops.json'ı tüm ağacı belleğe almadan okur.
+
+Dosya parça parça okunur; "duraklar" dizisinin her öğesi ayrı ayrı
+çözülüp doğrudan CompiledNetwork'e aktarılır ve ardından bırakılır.
+Böylece açılıştaki bellek tepe noktası JSON ağacının değil, derlenmiş
+dizilerin boyutuyla orantılı kalır. Diğer üst düzey alanlar (taxi, city)
+küçük olduklarından olduğu gibi döner.
+"""
+import json
+
+from models.network import CompiledNetwork
+
+CHUNK_SIZE = 64 * 1024
+_decoder = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Tampon üzerinde ilerleyen, gerektikçe dosyadan okuyan basit JSON okuyucu."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Okunmuş kısım atılır; tampon en fazla bir öğe + bir parça büyür.
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Boşlukları atlayıp sıradaki karakteri döndürür; dosya sonunda ""."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ""
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch == "" or ch not in chars:
+            raise ValueError(f"Geçersiz JSON: {' ya da '.join(chars)} bekleniyordu, {ch or 'dosya sonu'} bulundu.")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Sıradaki tam JSON değerini çözer."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            # Tamponun sonunda biten bir sayı yarıda kesilmiş olabilir.
+            if end == len(self.buf) and self._more():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_stops(f, meta):
+    """
+    f'teki üst düzey nesnenin "duraklar" öğelerini tek tek üretir; diğer
+    alanları meta sözlüğüne yazar ("duraklar"dan sonra gelenler, üreteç
+    tükendiğinde yazılmış olur).
+    """
+    reader = _JsonReader(f)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError("Geçersiz JSON: alan adı bekleniyordu.")
+        reader.expect(":")
+        if key == "duraklar":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    stop = reader.value()
+                    if not isinstance(stop, dict):
+                        raise ValueError("Geçersiz durak kaydı: nesne bekleniyordu.")
+                    yield stop
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            meta[key] = reader.value()
+        if reader.expect(",}") == "}":
+            break
+
+
+def load_network(path, walk_radius_km=0.0, walk_speed=None, on_stop=None):
+    """
+    path'teki ağı akış halinde derler; (meta, CompiledNetwork) döndürür.
+    meta: "duraklar" dışındaki üst düzey alanlar. on_stop verilirse her ham
+    durak sözlüğüyle çağrılır (ör. harita için serileştirme).
+    Bozuk hedefler network.dangling'de raporlanır.
+    """
+    meta = {}
+    with open(path, "r", encoding="utf-8") as f:
+        stops = iter_stops(f, meta)
+        if on_stop is not None:
+            stops = _tap(stops, on_stop)
+        network = CompiledNetwork(stops, walk_radius_km, walk_speed)
+    return meta, network
+
+
+def _tap(stops, func):
+    for stop in stops:
+        func(stop)
+        yield stop
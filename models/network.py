@@ -0,0 +1,262 @@
+# models/network.py
+import hashlib
+import math
+import sys
+from array import array
+
+from utils.distance import grid_cell_degrees, haversine
+
+# Durak tipleri dizilerde küçük tamsayı kodlarıyla tutulur.
+TYPE_CODES = {"bus": 0, "tram": 1}
+TYPE_NAMES = {v: k for k, v in TYPE_CODES.items()}
+OTHER_TYPE = 2
+NO_STOP = -1
+
+# Dizi alanları ve array tip kodları (paylaşımlı bellek düzeni bunları izler)
+ARRAY_FIELDS = (
+    ("types", "b"), ("son_durak", "b"), ("lat", "d"), ("lon", "d"),
+    ("edge_start", "l"), ("edge_to", "l"), ("edge_time", "d"), ("edge_dist", "d"), ("edge_fare", "d"),
+    ("transfer_to", "l"), ("transfer_time", "d"), ("transfer_fare", "d"),
+    ("edge_from", "l"), ("rev_start", "l"), ("rev_edge", "l"),
+    ("transfer_rev_start", "l"), ("transfer_rev_from", "l"),
+    ("walk_start", "l"), ("walk_to", "l"), ("walk_time", "d"), ("walk_dist", "d"), ("walk_rev", "l")
+)
+
+
+class CompiledNetwork:
+    """
+    stops.json'daki durak ağının düz dizilere derlenmiş, salt okunur hali.
+
+    Duraklar 0..n-1 indeksleriyle temsil edilir. i. durağın kenarları
+    edge_to[edge_start[i]:edge_start[i + 1]] aralığındadır (CSR düzeni).
+    Her durağın en fazla bir transfer kenarı vardır; yoksa transfer_to[i] == NO_STOP.
+    Yürüyerek aktarma kenarları walk_to[walk_start[i]:walk_start[i + 1]] aralığındadır;
+    yüklemede walk_radius_km içindeki her durak çifti için iki yönlü üretilir
+    (walk_rev[k], k kenarının ters yönünün indeksi).
+    Geri yönlü aramalar için i'ye gelen kenarlar rev_edge[rev_start[i]:rev_start[i + 1]],
+    i'ye transfer yapılan duraklar transfer_rev_from[...] aralığındadır.
+
+    Sayısal veriler array tamponlarında durur: okunmaları referans sayacı
+    değiştirmediği için, master süreçte kurulup fork edilen worker'larda
+    bellek sayfaları kopyalanmaz.
+    """
+
+    def __init__(self, duraklar, walk_radius_km=0.0, walk_speed=None):
+        """
+        duraklar: durak sözlükleri; liste ya da akış halinde okuyan bir
+        üreteç olabilir (tek geçişte tüketilir, sözlükler saklanmaz).
+        Zorunlu alan eksikse ValueError; ağda olmayan kenar/transfer hedefleri
+        atlanır ve self.dangling'e (durak, hedef, alan) olarak yazılır.
+
+        walk_radius_km > 0 ise birbirine bu mesafeden yakın duraklar arasına
+        yürüme kenarı eklenir; süresi mesafe / walk_speed (km/dk) olur.
+        """
+        ids, names = [], []
+        self.types = array("b")
+        self.son_durak = array("b")
+        self.lat = array("d")
+        self.lon = array("d")
+        # Hedefler tüm duraklar okunana kadar kimlik olarak tutulur.
+        raw_start, raw_to, tr_to = [0], [], []
+        edge_time, edge_dist, edge_fare = array("d"), array("d"), array("d")
+        self.transfer_time = array("d")
+        self.transfer_fare = array("d")
+        for n, s in enumerate(duraklar):
+            sid = sys.intern(_field(s, "id", f"{n}. durak"))
+            ids.append(sid)
+            names.append(s.get("name", sid))
+            self.types.append(TYPE_CODES.get(s.get("type"), OTHER_TYPE))
+            self.son_durak.append(bool(s.get("sonDurak")))
+            self.lat.append(_field(s, "lat", sid))
+            self.lon.append(_field(s, "lon", sid))
+            for e in s.get("nextStops") or []:
+                raw_to.append(sys.intern(_field(e, "stopId", sid)))
+                edge_time.append(_field(e, "sure", sid))
+                edge_dist.append(_field(e, "mesafe", sid))
+                edge_fare.append(_field(e, "ucret", sid))
+            raw_start.append(len(raw_to))
+            tr = s.get("transfer")
+            tr_to.append(_field(tr, "transferStopId", sid) if tr else None)
+            self.transfer_time.append(tr.get("transferSure", 0) if tr else 0)
+            self.transfer_fare.append(tr.get("transferUcret", 0) if tr else 0)
+        self._set_ids(ids, names)
+        if len(self.index) != len(ids):
+            raise ValueError("Durak kimlikleri tekil olmalı.")
+
+        self.dangling = []
+        self.edge_start = array("l", [0])
+        self.edge_to = array("l")
+        self.edge_time = array("d")
+        self.edge_dist = array("d")
+        self.edge_fare = array("d")
+        self.transfer_to = array("l")
+        for i, sid in enumerate(ids):
+            for k in range(raw_start[i], raw_start[i + 1]):
+                j = self.index.get(raw_to[k])
+                if j is None:
+                    # Ağda olmayan hedefe giden kenar hiçbir rotada kullanılamaz.
+                    self.dangling.append((sid, raw_to[k], "nextStops"))
+                    continue
+                self.edge_to.append(j)
+                self.edge_time.append(edge_time[k])
+                self.edge_dist.append(edge_dist[k])
+                self.edge_fare.append(edge_fare[k])
+            self.edge_start.append(len(self.edge_to))
+            j = NO_STOP
+            if tr_to[i] is not None:
+                j = self.index.get(tr_to[i], NO_STOP)
+                if j == NO_STOP:
+                    self.dangling.append((sid, tr_to[i], "transfer"))
+            self.transfer_to.append(j)
+        self._build_walk_transfers(walk_radius_km, walk_speed)
+        self._build_reverse()
+
+    @classmethod
+    def from_arrays(cls, ids, names, arrays):
+        """
+        Hazır dizilerden (array, memoryview ya da NumPy görünümü) ağ kurar;
+        veriyi kopyalamaz. arrays, ARRAY_FIELDS'taki her alanı içermelidir.
+        """
+        net = cls.__new__(cls)
+        net._set_ids(ids, names)
+        net.dangling = []
+        for field, _ in ARRAY_FIELDS:
+            setattr(net, field, arrays[field])
+        return net
+
+    def _build_reverse(self):
+        # Gelen kenarlar ve gelen transferler için ters CSR dizileri.
+        n = len(self.ids)
+        self.edge_from = array("l", [0]) * len(self.edge_to)
+        for i in range(n):
+            for k in self.edges(i):
+                self.edge_from[k] = i
+        self.rev_start, self.rev_edge = _reverse_csr(n, self.edge_to, range(len(self.edge_to)))
+        sources = [i for i in range(n) if self.transfer_to[i] != NO_STOP]
+        self.transfer_rev_start, self.transfer_rev_from = _reverse_csr(
+            n, [self.transfer_to[i] for i in sources], sources)
+
+    def _build_walk_transfers(self, radius_km, walk_speed):
+        # Izgara tabanlı uzamsal indeks: hücre kenarı her yerde >= radius_km; her durak
+        # yalnızca kendi ve komşu 8 hücredeki duraklarla karşılaştırılır.
+        n = len(self.ids)
+        neighbors = [[] for _ in range(n)]
+        if radius_km > 0 and n:
+            cell_lat, cell_lon = grid_cell_degrees(radius_km, self.lat)
+            grid = {}
+            for i in range(n):
+                cell = (math.floor(self.lat[i] / cell_lat), math.floor(self.lon[i] / cell_lon))
+                grid.setdefault(cell, []).append(i)
+            for (cy, cx), members in grid.items():
+                for dy in (-1, 0, 1):
+                    for dx in (-1, 0, 1):
+                        for j in grid.get((cy + dy, cx + dx), ()):
+                            for i in members:
+                                if i < j:
+                                    d = haversine(self.lat[i], self.lon[i], self.lat[j], self.lon[j])
+                                    if d <= radius_km:
+                                        neighbors[i].append((j, d))
+                                        neighbors[j].append((i, d))
+        self.walk_start = array("l", [0])
+        self.walk_to = array("l")
+        self.walk_time = array("d")
+        self.walk_dist = array("d")
+        position = {}
+        for i in range(n):
+            for j, d in sorted(neighbors[i]):
+                position[(i, j)] = len(self.walk_to)
+                self.walk_to.append(j)
+                self.walk_dist.append(d)
+                self.walk_time.append(d / walk_speed)
+            self.walk_start.append(len(self.walk_to))
+        self.walk_rev = array("l", (position[(j, i)] for (i, j) in sorted(position, key=position.get)))
+
+    def _set_ids(self, ids, names):
+        ids = [sys.intern(sid) for sid in ids]
+        self.ids = tuple(ids)
+        self.index = {sid: i for i, sid in enumerate(ids)}
+        self.names = tuple(names)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fingerprint(self):
+        """Kimlikler ve tüm dizilerden hesaplanan özet; ağ değişince değişir."""
+        h = hashlib.sha256()
+        h.update("\0".join(self.ids).encode("utf-8"))
+        for field, _ in ARRAY_FIELDS:
+            h.update(field.encode("ascii"))
+            h.update(memoryview(getattr(self, field)).tobytes())
+        return h.hexdigest()
+
+    def type_name(self, i):
+        return TYPE_NAMES.get(self.types[i], "")
+
+    def edges(self, i):
+        """i. durağın kenar indekslerinin aralığı."""
+        return range(self.edge_start[i], self.edge_start[i + 1])
+
+    def walks(self, i):
+        """i. durağın yürüme kenarlarının indeksleri (yürüme kenarları iki yönlüdür)."""
+        return range(self.walk_start[i], self.walk_start[i + 1])
+
+    def in_edges(self, i):
+        """i. durağa gelen kenarların indeksleri (kaynak: edge_from[k])."""
+        return self.rev_edge[self.rev_start[i]:self.rev_start[i + 1]]
+
+    def transfers_into(self, i):
+        """i. durağa transfer kenarı olan durakların indeksleri."""
+        return self.transfer_rev_from[self.transfer_rev_start[i]:self.transfer_rev_start[i + 1]]
+
+    def stop_data(self, i):
+        """i. durağı stops.json'daki sözlük biçiminde geri üretir."""
+        data = {
+            "id": self.ids[i],
+            "name": self.names[i],
+            "type": self.type_name(i),
+            "lat": float(self.lat[i]),
+            "lon": float(self.lon[i]),
+            "sonDurak": bool(self.son_durak[i]),
+            "nextStops": [{
+                "stopId": self.ids[self.edge_to[k]],
+                "mesafe": float(self.edge_dist[k]),
+                "sure": float(self.edge_time[k]),
+                "ucret": float(self.edge_fare[k])
+            } for k in self.edges(i)]
+        }
+        if self.transfer_to[i] != NO_STOP:
+            data["transfer"] = {
+                "transferStopId": self.ids[self.transfer_to[i]],
+                "transferSure": float(self.transfer_time[i]),
+                "transferUcret": float(self.transfer_fare[i])
+            }
+        return data
+
+    def find_edge(self, i, j):
+        """i'den j'ye giden ilk kenarın indeksi; yoksa None."""
+        for k in range(self.edge_start[i], self.edge_start[i + 1]):
+            if self.edge_to[k] == j:
+                return k
+        return None
+
+
+def _reverse_csr(n, targets, values):
+    """values[j] öğelerini targets[j] düğümüne göre gruplayan (start, items) dizileri."""
+    start = array("l", [0]) * (n + 1)
+    for t in targets:
+        start[t + 1] += 1
+    for i in range(n):
+        start[i + 1] += start[i]
+    fill = array("l", start)
+    items = array("l", [0]) * len(targets)
+    for t, v in zip(targets, values):
+        items[fill[t]] = v
+        fill[t] += 1
+    return start, items
+
+
+def _field(obj, key, where):
+    value = obj.get(key)
+    if value is None:
+        raise ValueError(f"{where}: '{key}' alanı eksik.")
+    return value
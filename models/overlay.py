@@ -0,0 +1,195 @@
+# models/overlay.py
+"""
+Derlenmiş ağın üstüne uygulanan canlı aksaklık katmanı (overlay).
+
+Ağ dizileri salt okunur kalır; gecikme, kapanma ve ek transferler kenar
+indeksine göre sözlüklerde tutulur ve aramalar taban ağırlığı bu
+sözlüklerden O(1) okuyarak düzeltir. Katman JSON olarak verilir:
+
+    {
+      "delays":    [{"from": "bus_otogar", "to": "bus_sekapark", "factor": 1.5}],
+      "closures":  [{"from": "tram_otogar", "to": "tram_yahyakaptan"}],
+      "transfers": [{"from": "bus_sekapark", "to": "tram_sekapark", "sure": 3, "ucret": 0.5}]
+    }
+
+- delays: kenar süresi factor ile çarpılır.
+- closures: kenar (ya da "to" durağın transfer hedefiyse transfer) kullanılamaz.
+- transfers: duraktan ek transfer; durağın mevcut transferi varsa onun yerine geçer.
+
+Sürüm, içeriğin özetidir; aynı katmanı yükleyen her süreç aynı sürümü görür.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from models.network import NO_STOP
+
+logger = logging.getLogger(__name__)
+
+OVERLAY_KEYS = ("delays", "closures", "transfers")
+
+
+class NetworkOverlay:
+    def __init__(self, network, data=None):
+        data = data or {}
+        unknown = set(data) - set(OVERLAY_KEYS) - {"version"}
+        if unknown:
+            raise ValueError(f"Bilinmeyen overlay alanları: {', '.join(sorted(unknown))}")
+        self.data = {key: list(data.get(key, [])) for key in OVERLAY_KEYS}
+        self.version = hashlib.sha256(
+            json.dumps(self.data, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+        self.factors = {}           # kenar indeksi -> süre çarpanı
+        self.closed = set()         # kapalı kenar indeksleri
+        self.closed_transfers = set()  # transferi kapalı durak indeksleri
+        self.transfers = {}         # durak indeksi -> (hedef, süre, ücret)
+        self.added_into = {}        # hedef indeksi -> [kaynak indeksleri]
+
+        for item in self.data["delays"]:
+            factor = float(item["factor"])
+            if factor <= 0:
+                raise ValueError("Gecikme çarpanı pozitif olmalı.")
+            for k in self._edges(network, item):
+                self.factors[k] = self.factors.get(k, 1.0) * factor
+        for item in self.data["closures"]:
+            i, j = self._pair(network, item)
+            edges = [k for k in network.edges(i) if network.edge_to[k] == j]
+            if network.transfer_to[i] == j:
+                self.closed_transfers.add(i)
+            elif not edges:
+                raise ValueError(f"Kenar yok: {item['from']} -> {item['to']}")
+            self.closed.update(edges)
+        for item in self.data["transfers"]:
+            i, j = self._pair(network, item)
+            self.transfers[i] = (j, float(item.get("sure", 0)), float(item.get("ucret", 0)))
+            self.added_into.setdefault(j, []).append(i)
+
+        # Bu katmandan etkilenen statik metrikler (ör. CH tabloları)
+        affected = set()
+        if self.closed or self.closed_transfers or self.transfers:
+            affected.update(("time", "cost"))
+        if self.factors:
+            affected.add("time")
+        self.affected_metrics = frozenset(affected)
+
+    @staticmethod
+    def _pair(network, item):
+        i = network.index.get(item.get("from"))
+        j = network.index.get(item.get("to"))
+        if i is None or j is None:
+            raise ValueError(f"Bilinmeyen durak: {item.get('from')} -> {item.get('to')}")
+        return i, j
+
+    def _edges(self, network, item):
+        i, j = self._pair(network, item)
+        edges = [k for k in network.edges(i) if network.edge_to[k] == j]
+        if not edges:
+            raise ValueError(f"Kenar yok: {item['from']} -> {item['to']}")
+        return edges
+
+    def __bool__(self):
+        return any(self.data.values())
+
+    def to_dict(self):
+        return dict(self.data, version=self.version)
+
+    #----------------------------------------------------------------------
+    # Aramaların okuduğu O(1) erişimler
+    #----------------------------------------------------------------------
+    def edge_time(self, network, k):
+        return network.edge_time[k] * self.factors.get(k, 1.0)
+
+    def transfer(self, network, i):
+        """i'nin geçerli transferi (hedef, süre, ücret) ya da None."""
+        added = self.transfers.get(i)
+        if added is not None:
+            return added
+        j = network.transfer_to[i]
+        if j == NO_STOP or i in self.closed_transfers:
+            return None
+        return j, network.transfer_time[i], network.transfer_fare[i]
+
+    def transfers_into(self, network, i):
+        """i'ye transfer yapılabilen durakların indeksleri."""
+        sources = [u for u in network.transfers_into(i)
+                   if u not in self.closed_transfers and u not in self.transfers]
+        return sources + self.added_into.get(i, [])
+
+    def _items(self):
+        return {(key, json.dumps(item, sort_keys=True))
+                for key, items in self.data.items() for item in items}
+
+    def changed_stops(self, other):
+        """İki katman arasında eklenen ya da kalkan kayıtların durak kimlikleri."""
+        changed = set()
+        for _, text in self._items() ^ other._items():
+            item = json.loads(text)
+            changed.update((item["from"], item["to"]))
+        return changed
+
+    def relaxes(self, other):
+        """
+        other'dan bu katmana geçiş bir rotayı kısaltabilir ya da
+        ucuzlatabilir mi? Yalnızca kapanma ve çarpanı 1'den küçük olmayan
+        gecikme eklenmişse False: bu durumda değişen duraklara uğramayan
+        rotalar en iyi olmaya devam eder.
+        """
+        old, new = other._items(), self._items()
+        if old - new:
+            return True
+        for key, text in new - old:
+            if key == "transfers" or (key == "delays" and float(json.loads(text)["factor"]) < 1):
+                return True
+        return False
+
+
+def load_overlay(network, path):
+    """path'teki JSON katmanı; dosya yoksa boş katman."""
+    if not path or not os.path.exists(path):
+        return NetworkOverlay(network)
+    with open(path, encoding="utf-8") as f:
+        return NetworkOverlay(network, json.load(f))
+
+
+def save_overlay(overlay, path):
+    # Diğer süreçler yarım dosya okumasın diye atomik yazılır.
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(overlay.data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+class OverlayWatcher:
+    """
+    Katman dosyasının değişme zamanını izler; dosya değiştiyse ya da
+    planlayıcı yenisiyle değiştiyse (ör. paylaşımlı ağ yeniden bağlandı)
+    katmanı yeniden yükler. Okunamayan ya da geçersiz dosya loglanır, eski
+    katman korunur ve dosya sonraki yoklamada yeniden denenir.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.planner = None
+        self.failed_mtime = None
+
+    def poll(self, planner):
+        """Gerekirse katmanı planlayıcıya uygular; değişen durak kimliklerini döndürür."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        if mtime == self.mtime and planner is self.planner:
+            return set()
+        try:
+            overlay = load_overlay(planner.network, self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:  # JSONDecodeError da ValueError'dır
+            if mtime != self.failed_mtime:  # her istekte aynı hatayı loglama
+                logger.error("Aksaklık katmanı %s yüklenemedi, mevcut katman korunuyor: %s", self.path, e)
+                self.failed_mtime = mtime
+            return set()
+        # Yalnızca başarılı yüklemeden sonra kaydedilir; bozuk dosya yeniden denenir.
+        self.mtime = mtime
+        self.planner = planner
+        return planner.set_overlay(overlay)
@@ -1,40 +1,107 @@
 # models/payment.py
+import threading
 from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# Bir tutarın ödenip ödenemeyeceğinin, bakiyeye dokunmadan hesaplanan sonucu.
+PaymentCheck = namedtuple("PaymentCheck", ["success", "amount", "remaining", "message"])
 
 class Payment(ABC):
+    def __init__(self):
+        self._lock = threading.Lock()
+
     @abstractmethod
-    def pay(self, amount):
+    def get_balance(self):
+        pass
+
+    @abstractmethod
+    def _set_balance(self, value):
+        pass
+
+    @abstractmethod
+    def success_message(self, amount, remaining):
         pass
 
+    @abstractmethod
+    def failure_message(self):
+        pass
+
+    def check(self, amount):
+        """amount ödenebilir mi? Bakiye değişmez."""
+        balance = self.get_balance()
+        if balance >= amount:
+            remaining = balance - amount
+            return PaymentCheck(True, amount, remaining, self.success_message(amount, remaining))
+        return PaymentCheck(False, amount, balance, self.failure_message())
+
+    def check_many(self, amounts):
+        """Aynı bakiyeyi birçok rota ücretine karşı tek seferde dener; bakiye değişmez."""
+        balance = self.get_balance()
+        failure = self.failure_message()
+        results = []
+        for amount in amounts:
+            if balance >= amount:
+                remaining = balance - amount
+                results.append(PaymentCheck(True, amount, remaining, self.success_message(amount, remaining)))
+            else:
+                results.append(PaymentCheck(False, amount, balance, failure))
+        return results
+
+    def pay(self, amount):
+        # Gerçek tahsilat: kontrol ve düşüm aynı kilit altında yapılır.
+        with self._lock:
+            result = self.check(amount)
+            if result.success:
+                self._set_balance(result.remaining)
+        return result.success, result.message
+
 class Nakit(Payment):
     def __init__(self, cash_amount):
+        super().__init__()
         self.cash_amount = cash_amount
 
-    def pay(self, amount):
-        if self.cash_amount >= amount:
-            self.cash_amount -= amount
-            return True, f"Nakit ile {round(amount, 2)} TL ödendi. Kalan bakiye: {round(self.cash_amount, 2)} TL"
-        else:
-            return False, "Yetersiz nakit."
+    def get_balance(self):
+        return self.cash_amount
+
+    def _set_balance(self, value):
+        self.cash_amount = value
+
+    def success_message(self, amount, remaining):
+        return f"Nakit ile {round(amount, 2)} TL ödendi. Kalan bakiye: {round(remaining, 2)} TL"
+
+    def failure_message(self):
+        return "Yetersiz nakit."
 
 class KrediKarti(Payment):
     def __init__(self, credit_limit):
+        super().__init__()
         self.credit_limit = credit_limit
 
-    def pay(self, amount):
-        if self.credit_limit >= amount:
-            self.credit_limit -= amount
-            return True, f"Kredi kartından {round(amount, 2)} TL ödendi. Kalan limit: {round(self.credit_limit, 2)} TL"
-        else:
-            return False, "Kredi kartı limiti yetersiz."
+    def get_balance(self):
+        return self.credit_limit
+
+    def _set_balance(self, value):
+        self.credit_limit = value
+
+    def success_message(self, amount, remaining):
+        return f"Kredi kartından {round(amount, 2)} TL ödendi. Kalan limit: {round(remaining, 2)} TL"
+
+    def failure_message(self):
+        return "Kredi kartı limiti yetersiz."
 
 class KentKart(Payment):
     def __init__(self, kentkart_balance):
+        super().__init__()
         self.kentkart_balance = kentkart_balance
 
-    def pay(self, amount):
-        if self.kentkart_balance >= amount:
-            self.kentkart_balance -= amount
-            return True, f"KentKart ile {round(amount, 2)} TL ödendi. Kalan bakiye: {round(self.kentkart_balance, 2)} TL"
-        else:
-            return False, "KentKart bakiyesi yetersiz."
+    def get_balance(self):
+        return self.kentkart_balance
+
+    def _set_balance(self, value):
+        self.kentkart_balance = value
+
+    def success_message(self, amount, remaining):
+        return f"KentKart ile {round(amount, 2)} TL ödendi. Kalan bakiye: {round(remaining, 2)} TL"
+
+    def failure_message(self):
+        return "KentKart bakiyesi yetersiz."
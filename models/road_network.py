@@ -0,0 +1,543 @@
+# models/road_network.py
+"""
+Taksi ve yürüme bacakları için yol ağı (isteğe bağlı).
+
+Yerel bir OSM kesitinden highway yolları okunur: .osm / .osm.gz / .osm.bz2
+XML dosyaları akış halinde (standart kütüphaneyle), .pbf dosyaları pyosmium
+ile (pip install osmium). İki profil derlenir:
+
+- "car": oneway, dönel kavşak ve araç yasaklarına uyar; ağırlık dakikadır
+  (maxspeed etiketi ya da yol sınıfının CAR_SPEEDS hızı).
+- "foot": iki yönlü; ağırlık km'dir, süre AVERAGE_WALK_SPEED ile bulunur.
+
+Yalnızca kavşaklar (birden çok yolun paylaştığı noktalar ve yol uçları)
+düğüm olur; aradaki noktalar kenar uzunluğuna katılır. Her profil CSR
+dizileri (array tamponları) halinde durur; derlenmiş graf .npz olarak
+saklanır ve kaynak dosya değişmedikçe yeniden kullanılır.
+
+Nokta eşleme profilin düğümlerine kurulmuş bir ızgarayla yapılır: SNAP_MAX_KM
+içindeki en yakın düğüm; noktadan düğüme kuş uçuşu kısım da bacağa eklenir.
+Eşleşmeyen noktalar için None döner ve planlayıcı kuş uçuşu hesaba döner.
+
+Sorgular: route (noktadan noktaya A*; alt sınır kuş uçuşu mesafe / profildeki
+en yüksek hız) ve one_to_many (kesme değerli tek Dijkstra; çıkış bacakları
+için ters yönde). İkisinin sonuçları da düğüm çifti başına aynı LRU'da tutulur.
+
+Derleme:
+
+    python -m models.road_network kocaeli.osm.pbf data/roads.npz
+"""
+import argparse
+import bz2
+import gzip
+import heapq
+import math
+import os
+import re
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from models.route_planner import AVERAGE_TAXI_SPEED, AVERAGE_WALK_SPEED
+from utils.distance import grid_cell_degrees, haversine
+
+FORMAT_VERSION = 1
+PROFILES = ("car", "foot")
+
+# Yol sınıfına göre araç hızı (km/s); _link yolları ana sınıfın hızını alır.
+CAR_SPEEDS = {
+    "motorway": 90, "trunk": 70, "primary": 50, "secondary": 45, "tertiary": 40,
+    "unclassified": 30, "residential": 30, "road": 30, "service": 15, "living_street": 10
+}
+# Yalnızca yayaların kullandığı yollar; motorway dışındaki araç yolları da yürünebilir.
+FOOT_ONLY = {"footway", "pedestrian", "path", "steps", "track", "cycleway", "bridleway", "corridor"}
+FOOT_FORBIDDEN = {"motorway", "motorway_link"}
+KEPT_TAGS = ("highway", "oneway", "junction", "maxspeed", "access", "foot", "motor_vehicle", "motorcar")
+NO_ACCESS = ("no", "private")
+
+# Noktanın eşlendiği düğüme en fazla uzaklığı; aradaki kısım kuş uçuşu
+# (yürüyerek AVERAGE_WALK_SPEED, araçla AVERAGE_TAXI_SPEED) eklenir.
+SNAP_MAX_KM = 0.5
+ROUTE_CACHE_SIZE = 20000
+
+
+#----------------------------------------------------------------------
+# OSM okuma
+#----------------------------------------------------------------------
+def _usable(tags):
+    hw = tags.get("highway")
+    if not hw:
+        return False
+    base = hw[:-5] if hw.endswith("_link") else hw
+    return base in CAR_SPEEDS or base in FOOT_ONLY
+
+
+def read_osm_xml(path):
+    """({osm düğüm id: (lat, lon)}, [(düğüm id listesi, etiketler)]) — yalnızca highway yolları."""
+    opener = gzip.open if path.endswith(".gz") else bz2.open if path.endswith(".bz2") else open
+    coords, ways = {}, []
+    with opener(path, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end":
+                continue
+            if elem.tag == "node":
+                coords[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+            elif elem.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in elem.iter("tag") if t.get("k") in KEPT_TAGS}
+                if _usable(tags):
+                    ways.append(([int(nd.get("ref")) for nd in elem.iter("nd")], tags))
+            else:
+                continue
+            # Okunan öğeler bellekte birikmesin.
+            root.clear()
+    return coords, ways
+
+
+def read_osm_pbf(path):
+    """read_osm_xml ile aynı çıktı; pyosmium gerekir."""
+    try:
+        import osmium
+    except ImportError:
+        raise ImportError("PBF kesitleri için pyosmium gerekir (pip install osmium); "
+                          "ya da kesiti .osm XML olarak verin.")
+    coords, ways = {}, []
+
+    class Handler(osmium.SimpleHandler):
+        def node(self, n):
+            coords[n.id] = (n.location.lat, n.location.lon)
+
+        def way(self, w):
+            tags = {k: w.tags[k] for k in KEPT_TAGS if k in w.tags}
+            if _usable(tags):
+                ways.append(([nd.ref for nd in w.nodes], tags))
+
+    Handler().apply_file(path)
+    return coords, ways
+
+
+def _maxspeed(value):
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*(mph)?", value or "")
+    if not match:
+        return None
+    speed = float(match.group(1))
+    return speed * 1.609 if match.group(2) else speed
+
+
+def way_access(tags):
+    """(araç ileri, araç geri, yaya, araç hızı km/s)."""
+    hw = tags["highway"]
+    base = hw[:-5] if hw.endswith("_link") else hw
+    car = base in CAR_SPEEDS
+    foot = hw not in FOOT_FORBIDDEN
+    if tags.get("access") in NO_ACCESS:
+        car = False
+        foot = tags.get("foot") in ("yes", "designated", "permissive")
+    if tags.get("foot") == "no":
+        foot = False
+    if tags.get("motor_vehicle") in NO_ACCESS or tags.get("motorcar") in NO_ACCESS:
+        car = False
+    oneway = tags.get("oneway")
+    forward = backward = car
+    if oneway == "-1":
+        forward = False
+    elif oneway in ("yes", "1", "true") or (oneway != "no" and (
+            base == "motorway" or tags.get("junction") in ("roundabout", "circular"))):
+        backward = False
+    speed = _maxspeed(tags.get("maxspeed")) or CAR_SPEEDS.get(base, CAR_SPEEDS["residential"])
+    return forward, backward, foot, speed
+
+
+#----------------------------------------------------------------------
+# Derlenmiş graf
+#----------------------------------------------------------------------
+class RoadGraph:
+    """
+    Tek profilin CSR grafı: v düğümünün kenarları to[start[v]:start[v + 1]],
+    ağırlıkları weight[...] ve uzunlukları km[...]. Ters yön (rev_*) yalnızca
+    yönlü profilde tutulur; "foot" simetriktir.
+    """
+
+    def __init__(self, start, to, weight, km, rev=None):
+        self.start, self.to, self.weight, self.km = start, to, weight, km
+        self.rev = rev  # (start, to, weight, km) ya da None (simetrik)
+
+    @classmethod
+    def from_edges(cls, n, edges, directed):
+        """edges: {(u, v): (ağırlık, km)}."""
+        if edges:
+            u, v = (np.fromiter((e[i] for e in edges), dtype=np.int64, count=len(edges)) for i in (0, 1))
+            w = np.fromiter((x[0] for x in edges.values()), dtype=np.float64, count=len(edges))
+            km = np.fromiter((x[1] for x in edges.values()), dtype=np.float64, count=len(edges))
+        else:
+            u = v = np.zeros(0, dtype=np.int64)
+            w = km = np.zeros(0)
+        fwd = _csr(n, u, v, w, km)
+        rev = _csr(n, v, u, w, km) if directed else None
+        return cls(*fwd, rev=rev)
+
+    def adjacency(self, reverse=False):
+        if reverse and self.rev is not None:
+            return self.rev
+        return self.start, self.to, self.weight, self.km
+
+    def degree(self, v):
+        d = self.start[v + 1] - self.start[v]
+        if self.rev is not None:
+            d += self.rev[0][v + 1] - self.rev[0][v]
+        return d
+
+    def to_arrays(self, prefix):
+        arrays = {}
+        parts = [("", self.adjacency())]
+        if self.rev is not None:
+            parts.append(("rev_", self.rev))
+        for tag, (start, to, weight, km) in parts:
+            arrays[prefix + tag + "start"] = np.frombuffer(start, dtype=np.int64)
+            arrays[prefix + tag + "to"] = np.frombuffer(to, dtype=np.int32)
+            arrays[prefix + tag + "weight"] = np.frombuffer(weight, dtype=np.float32)
+            arrays[prefix + tag + "km"] = np.frombuffer(km, dtype=np.float32)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        def part(tag):
+            return (_typed("q", arrays[prefix + tag + "start"]), _typed("i", arrays[prefix + tag + "to"]),
+                    _typed("f", arrays[prefix + tag + "weight"]), _typed("f", arrays[prefix + tag + "km"]))
+        rev = part("rev_") if prefix + "rev_start" in arrays else None
+        return cls(*part(""), rev=rev)
+
+
+def _typed(code, values):
+    # NumPy dizisinden array tamponu: tek öğe okumaları düz Python sayısı döner.
+    dtype = {"q": np.int64, "i": np.int32, "f": np.float32, "d": np.float64}[code]
+    out = array(code)
+    out.frombytes(np.ascontiguousarray(values, dtype=dtype).tobytes())
+    return out
+
+
+def _csr(n, u, v, w, km):
+    order = np.lexsort((v, u))
+    start = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(u, minlength=n), out=start[1:])
+    return _typed("q", start), _typed("i", v[order]), _typed("f", w[order]), _typed("f", km[order])
+
+
+class RoadNetwork:
+    def __init__(self, lat, lon, graphs, source=""):
+        self.lat = lat
+        self.lon = lon
+        self.graphs = graphs  # profil -> RoadGraph
+        self.source = source
+        # A* alt sınırı için profildeki en yüksek hız (ağırlık birimi başına km)
+        self.max_speed = {}
+        for profile, graph in graphs.items():
+            ratios = np.frombuffer(graph.km, dtype=np.float32) / np.maximum(
+                np.frombuffer(graph.weight, dtype=np.float32), 1e-6)
+            self.max_speed[profile] = float(ratios.max()) if len(ratios) else 1.0
+        self._grids = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lat)
+
+    #----------------------------------------------------------------------
+    # Kurulum ve saklama
+    #----------------------------------------------------------------------
+    @classmethod
+    def build(cls, coords, ways, source=""):
+        """read_osm_* çıktısından kavşak düğümlü grafları derler."""
+        # Kesit sınırında koordinatı olmayan noktalarda yol parçalara bölünür.
+        pieces = []
+        for refs, tags in ways:
+            access = way_access(tags)
+            if not any(access[:3]):
+                continue
+            run = []
+            for r in refs:
+                if r in coords:
+                    run.append(r)
+                else:
+                    if len(run) > 1:
+                        pieces.append((run, access))
+                    run = []
+            if len(run) > 1:
+                pieces.append((run, access))
+        uses = {}
+        for refs, _ in pieces:
+            for r in refs:
+                uses[r] = uses.get(r, 0) + 1
+            for r in (refs[0], refs[-1]):
+                uses[r] = uses.get(r, 0) + 1
+
+        index = {}
+        lat, lon = array("d"), array("d")
+
+        def node(r):
+            i = index.get(r)
+            if i is None:
+                i = index[r] = len(lat)
+                lat.append(coords[r][0])
+                lon.append(coords[r][1])
+            return i
+
+        edges = {"car": {}, "foot": {}}
+
+        def add(profile, u, v, w, km):
+            if w < edges[profile].get((u, v), (math.inf,))[0]:
+                edges[profile][(u, v)] = (w, km)
+
+        for refs, (forward, backward, foot, speed) in pieces:
+            first, km = refs[0], 0.0
+            for a, b in zip(refs, refs[1:]):
+                km += haversine(*coords[a], *coords[b])
+                if uses[b] < 2:
+                    continue
+                u, v = node(first), node(b)
+                if u != v:
+                    minutes = km / speed * 60
+                    if forward:
+                        add("car", u, v, minutes, km)
+                    if backward:
+                        add("car", v, u, minutes, km)
+                    if foot:
+                        add("foot", u, v, km, km)
+                        add("foot", v, u, km, km)
+                first, km = b, 0.0
+        graphs = {"car": RoadGraph.from_edges(len(lat), edges["car"], directed=True),
+                  "foot": RoadGraph.from_edges(len(lat), edges["foot"], directed=False)}
+        return cls(lat, lon, graphs, source)
+
+    @classmethod
+    def from_osm(cls, path):
+        reader = read_osm_pbf if path.endswith(".pbf") else read_osm_xml
+        coords, ways = reader(path)
+        return cls.build(coords, ways, source_signature(path))
+
+    def save(self, path):
+        arrays = {"format": np.asarray(FORMAT_VERSION), "source": np.asarray(self.source),
+                  "lat": np.frombuffer(self.lat, dtype=np.float64),
+                  "lon": np.frombuffer(self.lon, dtype=np.float64)}
+        for profile, graph in self.graphs.items():
+            arrays.update(graph.to_arrays(profile + "_"))
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["format"]) != FORMAT_VERSION:
+                raise ValueError(f"{path}: yol ağı biçimi eski; yeniden derleyin.")
+            arrays = dict(data)
+        graphs = {p: RoadGraph.from_arrays(arrays, p + "_") for p in PROFILES}
+        return cls(_typed("d", arrays["lat"]), _typed("d", arrays["lon"]), graphs, str(arrays["source"]))
+
+    #----------------------------------------------------------------------
+    # Nokta eşleme
+    #----------------------------------------------------------------------
+    def _grid(self, profile):
+        # Hücre kenarı >= SNAP_MAX_KM: aranan düğüm kendi ya da komşu 8 hücrededir.
+        grid = self._grids.get(profile)
+        if grid is None:
+            n = len(self.lat)
+            cell_lat, cell_lon = grid_cell_degrees(SNAP_MAX_KM, self.lat)
+            cells = {}
+            graph = self.graphs[profile]
+            for i in range(n):
+                if graph.degree(i):
+                    cells.setdefault((math.floor(self.lat[i] / cell_lat),
+                                      math.floor(self.lon[i] / cell_lon)), []).append(i)
+            grid = self._grids[profile] = (cell_lat, cell_lon, cells)
+        return grid
+
+    def snap(self, profile, lat, lon):
+        """(düğüm, km) ya da SNAP_MAX_KM içinde düğüm yoksa None."""
+        cell_lat, cell_lon, cells = self._grid(profile)
+        cy, cx = math.floor(lat / cell_lat), math.floor(lon / cell_lon)
+        best, best_km = None, SNAP_MAX_KM
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                for i in cells.get((cy + dy, cx + dx), ()):
+                    d = haversine(lat, lon, self.lat[i], self.lon[i])
+                    if d <= best_km:
+                        best, best_km = i, d
+        return None if best is None else (best, best_km)
+
+    def _leg(self, profile, weight, km, offset_km):
+        # (km, dakika): eşleme kısımları kuş uçuşu eklenir.
+        total_km = km + offset_km
+        if profile == "foot":
+            return total_km, total_km / AVERAGE_WALK_SPEED
+        return total_km, weight + offset_km / AVERAGE_TAXI_SPEED
+
+    #----------------------------------------------------------------------
+    # Sorgular
+    #----------------------------------------------------------------------
+    def route(self, profile, lat1, lon1, lat2, lon2):
+        """Yol üzerinden (km, dakika); eşlenemeyen ya da bağlantısız uçlarda None."""
+        s = self.snap(profile, lat1, lon1)
+        t = self.snap(profile, lat2, lon2)
+        if s is None or t is None:
+            return None
+        found = self._node_route(profile, s[0], t[0])
+        if found is None:
+            return None
+        return self._leg(profile, found[0], found[1], s[1] + t[1])
+
+    def _node_route(self, profile, s, t):
+        key = (profile, s, t)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        found = self._search(profile, {s: (0.0, 0.0)}, goal=t).get(t)
+        self._remember({key: found})
+        return found
+
+    def _remember(self, results):
+        with self._lock:
+            self._cache.update(results)
+            for key in results:
+                self._cache.move_to_end(key)
+            while len(self._cache) > ROUTE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def one_to_many(self, profile, lat, lon, points, max_minutes=math.inf, reverse=False):
+        """
+        Noktadan (reverse ise noktaya) points'teki [(lat, lon)] noktalarına
+        [(km, dakika) ya da None] listesi; max_minutes'ı aşanlar None'dır.
+        Önbellekte olmayan hedefler için tek arama yapılır; bütün hedefler
+        kesinleşince durur. Bulunan düğüm çiftleri route ile aynı LRU'ya yazılır
+        (aynı uçtan arayan senaryolar aramayı paylaşır).
+        """
+        source = self.snap(profile, lat, lon)
+        snapped = [self.snap(profile, plat, plon) for plat, plon in points]
+        if source is None:
+            return [None] * len(points)
+        s = source[0]
+
+        def key(t):
+            return (profile, t, s) if reverse else (profile, s, t)
+        reached = {}
+        targets = set()
+        with self._lock:
+            for p in snapped:
+                if p is None or p[0] in reached:
+                    continue
+                if key(p[0]) in self._cache:
+                    self._cache.move_to_end(key(p[0]))
+                    reached[p[0]] = self._cache[key(p[0])]
+                else:
+                    targets.add(p[0])
+        if targets:
+            cutoff = max_minutes * AVERAGE_WALK_SPEED if profile == "foot" else max_minutes
+            found = self._search(profile, {s: (0.0, 0.0)}, targets=targets, cutoff=cutoff, reverse=reverse)
+            # Kesmeyle bulunamayan hedef ulaşılamaz sayılmaz; önbelleğe yazılmaz.
+            self._remember({key(t): found.get(t) for t in targets if t in found or cutoff == math.inf})
+            reached.update(found)
+        results = []
+        for p in snapped:
+            found = reached.get(p[0]) if p is not None else None
+            leg = None if found is None else self._leg(profile, found[0], found[1], source[1] + p[1])
+            results.append(leg if leg is not None and leg[1] <= max_minutes else None)
+        return results
+
+    def _search(self, profile, sources, goal=None, targets=None, cutoff=math.inf, reverse=False):
+        """
+        sources: {düğüm: (ağırlık, km)}. goal verilirse A*, targets verilirse
+        hepsi kesinleşince biten Dijkstra. Kesinleşen hedefler {düğüm: (ağırlık, km)}.
+        """
+        start, to, weight, length = self.graphs[profile].adjacency(reverse)
+        lat, lon = self.lat, self.lon
+        if goal is not None:
+            inv_speed = 1.0 / self.max_speed[profile]
+            glat, glon = lat[goal], lon[goal]
+
+            def bound(v):
+                return haversine(lat[v], lon[v], glat, glon) * inv_speed
+            remaining = {goal}
+        else:
+            def bound(v):
+                return 0.0
+            remaining = set(targets or ())
+        dist = {v: w for v, (w, _) in sources.items()}
+        km = {v: k for v, (_, k) in sources.items()}
+        heap = [(w + bound(v), w, v) for v, w in dist.items()]
+        heapq.heapify(heap)
+        settled = set()
+        found = {}
+        while heap and remaining:
+            _, d, v = heapq.heappop(heap)
+            if v in settled:
+                continue
+            settled.add(v)
+            if v in remaining:
+                remaining.discard(v)
+                found[v] = (d, km[v])
+            for e in range(start[v], start[v + 1]):
+                x = to[e]
+                nd = d + weight[e]
+                if nd <= cutoff and nd < dist.get(x, math.inf):
+                    dist[x] = nd
+                    km[x] = km[v] + length[e]
+                    heapq.heappush(heap, (nd + bound(x), nd, x))
+        return found
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}-{stat.st_size}-{stat.st_mtime_ns}"
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_road_network(path, cache_path=""):
+    """
+    path: OSM kesiti ya da derlenmiş .npz. Kesit verilirse cache_path'teki
+    derleme kaynak imzası tutuyorsa yüklenir, yoksa derlenip oraya yazılır.
+    Aynı süreçte aynı dosya bir kez yüklenir (şehirler ve yeniden bağlanan
+    planlayıcılar paylaşır).
+    """
+    with _loaded_lock:
+        key = (path, cache_path, source_signature(path))
+        roads = _loaded.get(key)
+        if roads is None:
+            if path.endswith(".npz"):
+                roads = RoadNetwork.load(path)
+            else:
+                roads = None
+                if cache_path and os.path.exists(cache_path):
+                    cached = RoadNetwork.load(cache_path)
+                    if cached.source == key[2]:
+                        roads = cached
+                if roads is None:
+                    roads = RoadNetwork.from_osm(path)
+                    if cache_path:
+                        roads.save(cache_path)
+            _loaded[key] = roads
+        return roads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OSM kesitinden yol ağı derler")
+    parser.add_argument("extract", help=".osm, .osm.gz, .osm.bz2 ya da .pbf")
+    parser.add_argument("output", help="derlenmiş graf (.npz)")
+    args = parser.parse_args(argv)
+    roads = RoadNetwork.from_osm(args.extract)
+    roads.save(args.output)
+    print(f"{len(roads)} kavşak; araç {len(roads.graphs['car'].to)}, "
+          f"yaya {len(roads.graphs['foot'].to)} kenar -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,14 @@
 import math
+import threading
 from datetime import timedelta
+
+import numpy as np
+
 from models.stop import Stop
+from models.network import CompiledNetwork, TYPE_CODES, TYPE_NAMES, OTHER_TYPE
+from models.overlay import NetworkOverlay
 from models.vehicle import Taxi
-from utils.distance import haversine
+from utils.distance_strategy import EquirectangularStrategy, HaversineStrategy
 
 # Sabit hız değerleri
 AVERAGE_WALK_SPEED = 0.083   # km/dk (~5 km/s)
@@ -17,18 +23,230 @@ MODE_COLORS = {
     "transfer": "purple"
 }
 
+# get_alternative_routes'un hesapladığı senaryolar (plan_<ad> metotları)
+SCENARIOS = (
+    "sadece_taksi",
+    "sadece_otobus",
+    "sadece_tramvay",
+    "otobus_tramvay",
+    "taksi_otobus_tramvay"
+)
+
+# Senaryo başına alternatif rota sayısı üst sınırı ve iki rotanın "neredeyse
+# aynı" sayıldığı ortak otobüs/tramvay kenarı oranı (bkz. _alternative_connections)
+MAX_ALTERNATIVES = 5
+ALTERNATIVE_OVERLAP = 0.8
+# Alternatifin ara bacağı birincil rotanınkinin en fazla bu katı sürebilir;
+# alternatif aramaları en fazla ters aramanın bu katı kadar durum açar.
+ALTERNATIVE_STRETCH = 1.5
+ALTERNATIVE_BUDGET = 2
+
+# Bu kadar ve daha çok duraklı ağlarda en yakın durak taramaları önce
+# eşdikdörtgen yaklaşıkla aday eler (bkz. set_distance_strategy); küçük ağlarda
+# NumPy çağrılarının sabit maliyeti düz taramadan pahalıdır.
+PREFILTER_MIN_STOPS = 256
+
+# Bütçe kısıtlı senaryonun rota anahtarı (bkz. plan_butceye_uygun) ve her
+# uçta en az kaç erişim/çıkış durağı adayı denendiği
+BUDGET_SCENARIO = "butceye_uygun"
+BUDGET_ACCESS_CANDIDATES = 3
+
+# Ücret açıklamalarında kullanılan hat adları
+MODE_LABELS = {
+    "bus": ("Otobüs", "Bus"),
+    "tram": ("Tramvay", "Tram")
+}
+
 class RoutePlanner:
-    def __init__(self, data, taxi_pricing):
-        self.data = data
-        self.city = data.get("city", "")
+    def __init__(self, data, taxi_pricing, walk_radius_km=0.0):
+        # Ham JSON ağacı saklanmaz: aramalar derlenmiş, salt okunur kopya
+        # üzerinde çalışır, Stop nesneleri gerektikçe üretilir (bkz. _stop).
+        # walk_radius_km > 0 ise yakın duraklar arasına yürüme aktarmaları eklenir.
+        network = CompiledNetwork(data["duraklar"], walk_radius_km, AVERAGE_WALK_SPEED)
+        self._setup(network, taxi_pricing, data.get("city", ""))
+
+    @classmethod
+    def from_network(cls, network, taxi_pricing, city=""):
+        """
+        Ham JSON olmadan, önceden derlenmiş (ör. akış halinde yüklenmiş ya da
+        paylaşımlı bellekten bağlanmış) bir ağ üzerinde planlayıcı kurar.
+        """
+        planner = cls.__new__(cls)
+        planner._setup(network, taxi_pricing, city)
+        return planner
+
+    def _setup(self, network, taxi_pricing, city):
+        self.city = city
         self.taxi_info = taxi_pricing
         self.taxi = Taxi(taxi_pricing["openingFee"], taxi_pricing["costPerKm"])
         self.stops = {}
-        for s in data["duraklar"]:
-            st = Stop(s)
-            self.stops[st.id] = st
+        self.network = network
+        self._init_runtime()
+
+    def _init_runtime(self):
         # Transfer ücretinde indirim uygulanmayacak.
         self.transferIndirimOrani = 0.3
+        # Her thread kendi arama sayaçlarını tutar (slow-query log için).
+        self._stats = threading.local()
+        # Opsiyonel Contraction Hierarchies ({metrik: ContractionHierarchy})
+        self.hierarchies = None
+        # Durak-durak BFS'lerinde iki yönlü arama (bkz. _bidirectional_bfs)
+        self.bidirectional = False
+        # Erişim/çıkış durak adayları (bkz. _connect); 1 ve 0 ile yalnızca en yakın durak
+        self.access_k = 1
+        self.access_radius_km = 0.0
+        # Canlı aksaklık katmanı; aramalar başta bir kez okur (bkz. models/overlay.py)
+        self.overlay = NetworkOverlay(self.network)
+        # Opsiyonel yol ağı (models/road_network.py); yoksa bacaklar kuş uçuşu
+        self.roads = None
+        self.set_distance_strategy(HaversineStrategy())
+
+    def set_distance_strategy(self, strategy):
+        """
+        Kuş uçuşu mesafe stratejisini (utils/distance_strategy.py) değiştirir;
+        erişim/çıkış ve taksi bacak uzunlukları bununla hesaplanır.
+
+        Strateji Haversine ise ve ağ en az PREFILTER_MIN_STOPS duraklıysa,
+        ağın hizmet alanı için bir EquirectangularStrategy kurulur. En yakın
+        durak taramaları önce tüm durakları NumPy ile bu yaklaşıkla ölçer.
+        Hata sınırı (max_error) içinde sonucu değiştirebilecek adaylar
+        kalır, yalnızca onlar Haversine ile kesin ölçülür. Sonuçlar düz
+        taramayla aynıdır. Başka bir stratejinin Haversine'e göre hata sınırı
+        bilinmediğinden onunla eleme yapılmaz.
+        """
+        self.distance = strategy
+        self._distance = strategy.calculate_distance
+        self.prefilter = None
+        net = self.network
+        if not isinstance(strategy, HaversineStrategy) or len(net) < PREFILTER_MIN_STOPS:
+            return
+        lat, lon = np.asarray(net.lat), np.asarray(net.lon)
+        prefilter = EquirectangularStrategy.from_points(lat, lon)
+        if prefilter.max_error >= 0.5:
+            return  # alan çok büyük; eleme işe yaramaz
+        self.prefilter = prefilter
+        self._projected = prefilter.project(lat, lon)
+        types = np.asarray(net.types)
+        self._scan_sets = {code: np.flatnonzero(types == code) for code in (*TYPE_NAMES, OTHER_TYPE)}
+        self._scan_sets["transit"] = np.flatnonzero(types != OTHER_TYPE)
+        self._scan_sets["all"] = np.arange(len(net))
+
+    def _scan_order(self, lat, lon, scan_set, k=1, radius_km=0.0):
+        """
+        Noktaya kesin mesafesi en küçük k durağı ve radius_km içindeki tüm
+        durakları kapsayan, artan sıralı durak indeksleri. scan_set:
+        "all", "transit" ya da tip kodu. Eleme yoksa ya da nokta hizmet alanı
+        dışındaysa bütün duraklar; çağıran tip filtresini yine uygular.
+        """
+        pf = self.prefilter
+        if pf is None or not pf.covers(lat, lon):
+            return range(len(self.network))
+        idx = self._scan_sets[scan_set]
+        x, y = pf.project(lat, lon)
+        dx = self._projected[0][idx] - x
+        dy = self._projected[1][idx] - y
+        d2 = dx * dx + dy * dy
+        eps = pf.max_error
+        limit2 = 0.0
+        if k > 0:
+            if len(idx) <= k:
+                return idx.tolist()
+            # Kesin k. en yakın en fazla e_k / (1 - eps); yaklaşığı en fazla bunun (1 + eps) katı.
+            limit2 = np.partition(d2, k - 1)[k - 1] * ((1 + eps) / (1 - eps)) ** 2
+        if radius_km > 0:
+            limit2 = max(limit2, (radius_km * (1 + eps)) ** 2)
+        return idx[d2 <= limit2 * (1 + 1e-9)].tolist()
+
+    def set_road_network(self, roads):
+        """
+        Taksi ve yürüme bacaklarını (doğrudan taksi, erişim/çıkış, yürüme
+        erişimi) yol ağı üzerinden hesaplatır; None ile kuş uçuşuna döner.
+        Yol ağına eşlenemeyen uçlarda kuş uçuşu kullanılır. Erişim/çıkış
+        durağı adayları yine kuş uçuşu yakınlıkla seçilir.
+        """
+        self.roads = roads
+
+    def _leg(self, mode, lat1, lon1, lat2, lon2, straight_km=None):
+        """Yürüme ("walk") ya da taksi ("taksi") bacağının (km, dakika) değeri."""
+        if self.roads is not None:
+            leg = self.roads.route("foot" if mode == "walk" else "car", lat1, lon1, lat2, lon2)
+            if leg is not None:
+                return leg
+        if straight_km is None:
+            straight_km = self._distance(lat1, lon1, lat2, lon2)
+        return straight_km, straight_km / (AVERAGE_WALK_SPEED if mode == "walk" else AVERAGE_TAXI_SPEED)
+
+    def _legs_to_stops(self, mode, lat, lon, candidates, reverse=False, max_minutes=math.inf):
+        """
+        candidates: {durak indeksi: kuş uçuşu km}. Noktadan duraklara (reverse
+        ise duraklardan noktaya) {durak indeksi: (km, dakika)}; yol ağında tek
+        aramayla. max_minutes'ı aşan duraklar çıkarılır.
+        """
+        net = self.network
+        order = list(candidates)
+        profile = "foot" if mode == "walk" else "car"
+        roads = self.roads
+        if roads is not None and order and roads.snap(profile, lat, lon) is None:
+            roads = None
+        legs = None
+        if roads is not None and order:
+            legs = roads.one_to_many(profile, lat, lon, [(net.lat[i], net.lon[i]) for i in order],
+                                     max_minutes, reverse)
+        speed = AVERAGE_WALK_SPEED if mode == "walk" else AVERAGE_TAXI_SPEED
+        result = {}
+        for n, i in enumerate(order):
+            leg = legs[n] if legs is not None else None
+            # Yol ağı yoksa ya da durak yola eşlenemiyorsa kuş uçuşu; eşlenip
+            # ulaşılamayan (ya da süreyi aşan) durak elenir.
+            if leg is None and (legs is None or roads.snap(profile, net.lat[i], net.lon[i]) is None):
+                leg = (candidates[i], candidates[i] / speed)
+            if leg is not None and leg[1] <= max_minutes:
+                result[i] = leg
+        return result
+
+    def enable_contraction(self, cache_path=None):
+        """CH ön işlemesini yükler ya da kurar (bkz. models/contraction.py)."""
+        from models.contraction import load_or_build
+        self.hierarchies = load_or_build(self.network, cache_path)
+
+    def set_overlay(self, overlay):
+        """
+        Katmanı tek referans atamasıyla değiştirir; süren aramalar eski
+        katmanla biter. Değişen durak kimliklerini döndürür.
+        """
+        changed = overlay.changed_stops(self.overlay)
+        self.overlay = overlay
+        return changed
+
+    def _hierarchy(self, metric):
+        # Katman bu metriğin ağırlıklarını değiştiriyorsa CH tablosu geçersizdir.
+        if self.hierarchies and metric not in self.overlay.affected_metrics:
+            return self.hierarchies[metric]
+        return None
+
+    def _stop(self, i):
+        sid = self.network.ids[i]
+        st = self.stops.get(sid)
+        if st is None:
+            st = self.stops[sid] = Stop(self.network.stop_data(i))
+        return st
+
+    def reset_search_stats(self):
+        self._stats.expanded = {}
+
+    def get_search_stats(self):
+        """
+        Son reset_search_stats() çağrısından beri, bu thread'de BFS
+        fonksiyonlarının açtığı (kuyruktan çıkardığı) durum sayıları.
+        """
+        expanded = getattr(self._stats, "expanded", {})
+        return {"expanded": dict(expanded), "total_expanded": sum(expanded.values())}
+
+    def _record_expansions(self, name, count):
+        expanded = getattr(self._stats, "expanded", None)
+        if expanded is None:
+            expanded = self._stats.expanded = {}
+        expanded[name] = expanded.get(name, 0) + count
 
     def merge_consecutive_steps(self, steps):
         if not steps or len(steps) < 2:
@@ -53,39 +271,34 @@ class RoutePlanner:
     def rebuild_steps_with_latlon(self, steps, start_lat, start_lon, end_lat, end_lon):
         latlon_segments = []
         for stp in steps:
-            if stp["from"] == "Başlangıç":
-                from_lat, from_lon = (start_lat, start_lon)
-            elif stp["from"] == "Varış":
-                from_lat, from_lon = (end_lat, end_lon)
-            else:
-                fs = self.stops.get(stp["from"], None)
-                if not fs:
-                    continue
-                from_lat, from_lon = (fs.lat, fs.lon)
-            if stp["to"] == "Başlangıç":
-                to_lat, to_lon = (start_lat, start_lon)
-            elif stp["to"] == "Varış":
-                to_lat, to_lon = (end_lat, end_lon)
-            else:
-                ts = self.stops.get(stp["to"], None)
-                if not ts:
-                    continue
-                to_lat, to_lon = (ts.lat, ts.lon)
+            frm = self._point_latlon(stp["from"], start_lat, start_lon, end_lat, end_lon)
+            to = self._point_latlon(stp["to"], start_lat, start_lon, end_lat, end_lon)
+            if not frm or not to:
+                continue
             latlon_segments.append({
                 "color": stp["color"],
-                "points": [(from_lat, from_lon), (to_lat, to_lon)]
+                "points": [frm, to]
             })
         return latlon_segments
 
+    def _point_latlon(self, name, start_lat, start_lon, end_lat, end_lon):
+        if name == "Başlangıç":
+            return (start_lat, start_lon)
+        if name == "Varış":
+            return (end_lat, end_lon)
+        i = self.network.index.get(name)
+        if i is None:
+            return None
+        return (self.network.lat[i], self.network.lon[i])
+
     #----------------------------------------------------------------------
     # 1) Sadece Taksi (Hiç yürüyüş, direkt taksi)
     #----------------------------------------------------------------------
     def plan_sadece_taksi(self, start_lat, start_lon, dest_lat, dest_lon,
-                          passenger_type, payment_type, special_day, start_time):
+                          passenger_type, payment_type, special_day, start_time, k=1):
         if payment_type == "kentkart":
             return None
-        dist = haversine(start_lat, start_lon, dest_lat, dest_lon)
-        time_min = dist / AVERAGE_TAXI_SPEED
+        dist, time_min = self._leg("taksi", start_lat, start_lon, dest_lat, dest_lon)
         base_c = self.taxi.calculate_cost(dist)
         final_c = base_c
         steps = [{
@@ -121,126 +334,33 @@ class RoutePlanner:
     #    Nakit ile otobüs rotası kullanılamaz.
     #----------------------------------------------------------------------
     def plan_sadece_otobus(self, start_lat, start_lon, dest_lat, dest_lon,
-                           passenger_type, payment_type, special_day, start_time):
+                           passenger_type, payment_type, special_day, start_time, k=1):
         if payment_type == "nakit":
             return None
-        steps = []
-        startStop, distStart = self.get_nearest_stop(start_lat, start_lon, "bus")
-        if not startStop:
+        connection = self._connect("bus", start_lat, start_lon, dest_lat, dest_lon, "walk",
+                                   passenger_type, payment_type, special_day)
+        if not connection:
             return None
-        walkA = distStart / AVERAGE_WALK_SPEED
-        steps.append({
-            "from": "Başlangıç",
-            "to": startStop.id,
-            "mode": "walk",
-            "time": round(walkA, 1),
-            "distance": round(distStart, 2),
-            "base_cost": 0,
-            "final_cost": 0,
-            "discount_explanation": "Yürüme => ücretsiz",
-            "color": MODE_COLORS["walk"]
-        })
-        endStop, distEnd = self.get_nearest_stop(dest_lat, dest_lon, "bus")
-        if not endStop:
-            return None
-        busSteps = self.bus_bfs(startStop.id, endStop.id, passenger_type, payment_type, special_day)
-        if not busSteps:
-            return None
-        steps.extend(busSteps)
-        walkB = distEnd / AVERAGE_WALK_SPEED
-        steps.append({
-            "from": endStop.id,
-            "to": "Varış",
-            "mode": "walk",
-            "time": round(walkB, 1),
-            "distance": round(distEnd, 2),
-            "base_cost": 0,
-            "final_cost": 0,
-            "discount_explanation": "Yürüme => ücretsiz",
-            "color": MODE_COLORS["walk"]
-        })
-        merged = self.merge_consecutive_steps(steps)
-        total_time = sum(s["time"] for s in merged)
-        total_dist = sum(s["distance"] for s in merged)
-        total_cost = sum(s["final_cost"] for s in merged)
-        latlon_segments = self.rebuild_steps_with_latlon(merged, start_lat, start_lon, dest_lat, dest_lon)
-        route = {
-            "steps": merged,
-            "total_time": round(total_time, 1),
-            "total_distance": round(total_dist, 2),
-            "total_cost": round(total_cost, 2),
-            "latlon_segments": latlon_segments
-        }
-        if start_time:
-            arr = start_time + timedelta(minutes=route["total_time"])
-            route["arrival_time"] = arr.strftime("%d.%m.%Y %H:%M")
-        return route
+        return self._transit_routes("walk", "bus", connection, k, start_lat, start_lon, dest_lat, dest_lon,
+                                    passenger_type, payment_type, special_day, start_time)
 
     #----------------------------------------------------------------------
     # 3) Sadece Tramvay:
     # Başlangıçtan en yakın tramvay durağına yürü, ardından saf tramvay BFS, sonrasında varışa en yakın tramvay durağından yürüyerek ulaş.
+    # Eğer varış noktası tramvay hattı dışında ise; yine de, en yakın tramvay durağı kullanılır.
     # Nakit ile tramvay rotası kullanılamaz.
     #----------------------------------------------------------------------
     def plan_sadece_tramvay(self, start_lat, start_lon, dest_lat, dest_lon,
-                            passenger_type, payment_type, special_day, start_time):
+                            passenger_type, payment_type, special_day, start_time, k=1):
         # Nakit ödeme ile tramvay rotası hesaplanamaz.
         if payment_type == "nakit":
             return None
-        steps = []
-        # 1. Başlangıç → En Yakın Tramvay Durağı (örneğin, tram_sekapark)
-        startTram, distA = self.get_nearest_stop(start_lat, start_lon, "tram")
-        if not startTram:
-            return None
-        walkA = distA / AVERAGE_WALK_SPEED
-        steps.append({
-            "from": "Başlangıç",
-            "to": startTram.id,
-            "mode": "walk",
-            "time": round(walkA, 1),
-            "distance": round(distA, 2),
-            "base_cost": 0,
-            "final_cost": 0,
-            "discount_explanation": "Yürüme => ücretsiz",
-            "color": MODE_COLORS["walk"]
-        })
-        # 2. Tramvay seferi: Saf tramvay hattı üzerinden BFS (örneğin, tram_sekapark → tram_halkevi)
-        # Eğer varış noktası tramvay hattı dışında ise; yine de, en yakın tramvay durağı kullanılır.
-        endTram, distB = self.get_nearest_stop(dest_lat, dest_lon, "tram")
-        if not endTram:
-            return None
-        tramSteps = self.tram_bfs(startTram.id, endTram.id, passenger_type, payment_type, special_day)
-        if not tramSteps:
+        connection = self._connect("tram", start_lat, start_lon, dest_lat, dest_lon, "walk",
+                                   passenger_type, payment_type, special_day)
+        if not connection:
             return None
-        steps.extend(tramSteps)
-        # 3. Varış → En Yakın Tramvay Durağından Varışa Yürüme
-        walkB = distB / AVERAGE_WALK_SPEED
-        steps.append({
-            "from": endTram.id,
-            "to": "Varış",
-            "mode": "walk",
-            "time": round(walkB, 1),
-            "distance": round(distB, 2),
-            "base_cost": 0,
-            "final_cost": 0,
-            "discount_explanation": "Yürüme => ücretsiz",
-            "color": MODE_COLORS["walk"]
-        })
-        merged = self.merge_consecutive_steps(steps)
-        total_time = sum(s["time"] for s in merged)
-        total_dist = sum(s["distance"] for s in merged)
-        total_cost = sum(s["final_cost"] for s in merged)
-        latlon_segments = self.rebuild_steps_with_latlon(merged, start_lat, start_lon, dest_lat, dest_lon)
-        route = {
-            "steps": merged,
-            "total_time": round(total_time, 1),
-            "total_distance": round(total_dist, 2),
-            "total_cost": round(total_cost, 2),
-            "latlon_segments": latlon_segments
-        }
-        if start_time:
-            arr = start_time + timedelta(minutes=route["total_time"])
-            route["arrival_time"] = arr.strftime("%d.%m.%Y %H:%M")
-        return route
+        return self._transit_routes("walk", "tram", connection, k, start_lat, start_lon, dest_lat, dest_lon,
+                                    passenger_type, payment_type, special_day, start_time)
 
 
     #----------------------------------------------------------------------
@@ -249,62 +369,16 @@ class RoutePlanner:
     # En az 1 otobüs ve en az 1 tramvay kullanılmalı.
     #----------------------------------------------------------------------
     def plan_otobus_tramvay(self, start_lat, start_lon, dest_lat, dest_lon,
-                            passenger_type, payment_type, special_day, start_time):
+                            passenger_type, payment_type, special_day, start_time, k=1):
         if payment_type == "nakit":
             return None
-        steps = []
-        startStop, distStart = self.get_nearest_stop_any_bus_tram(start_lat, start_lon)
-        if not startStop:
-            return None
-        steps.append({
-            "from": "Başlangıç",
-            "to": startStop.id,
-            "mode": "walk",
-            "time": round(distStart / AVERAGE_WALK_SPEED, 1),
-            "distance": round(distStart, 2),
-            "base_cost": 0,
-            "final_cost": 0,
-            "discount_explanation": "Yürüme => ücretsiz",
-            "color": MODE_COLORS["walk"]
-        })
-        endStop, distEnd = self.get_nearest_stop_any_bus_tram(dest_lat, dest_lon)
-        if not endStop:
-            return None
-        midSteps = self.stateful_bfs_bus_tram_transfer(
-            startStop.id, endStop.id,
-            passenger_type, payment_type, special_day,
-            mustUseBus=True, mustUseTram=True
-        )
-        if not midSteps:
+        must_use = {"mustUseBus": True, "mustUseTram": True}
+        connection = self._connect(None, start_lat, start_lon, dest_lat, dest_lon, "walk",
+                                   passenger_type, payment_type, special_day, **must_use)
+        if not connection:
             return None
-        steps.extend(midSteps)
-        steps.append({
-            "from": endStop.id,
-            "to": "Varış",
-            "mode": "walk",
-            "time": round(distEnd / AVERAGE_WALK_SPEED, 1),
-            "distance": round(distEnd, 2),
-            "base_cost": 0,
-            "final_cost": 0,
-            "discount_explanation": "Yürüme => ücretsiz",
-            "color": MODE_COLORS["walk"]
-        })
-        merged = self.merge_consecutive_steps(steps)
-        total_time = sum(s["time"] for s in merged)
-        total_dist = sum(s["distance"] for s in merged)
-        total_cost = sum(s["final_cost"] for s in merged)
-        latlon_segments = self.rebuild_steps_with_latlon(merged, start_lat, start_lon, dest_lat, dest_lon)
-        route = {
-            "steps": merged,
-            "total_time": round(total_time, 1),
-            "total_distance": round(total_dist, 2),
-            "total_cost": round(total_cost, 2),
-            "latlon_segments": latlon_segments
-        }
-        if start_time:
-            arr = start_time + timedelta(minutes=route["total_time"])
-            route["arrival_time"] = arr.strftime("%d.%m.%Y %H:%M")
-        return route
+        return self._transit_routes("walk", None, connection, k, start_lat, start_lon, dest_lat, dest_lon,
+                                    passenger_type, payment_type, special_day, start_time, **must_use)
 
     #----------------------------------------------------------------------
     # 5) Taksi + Otobüs/Tramvay:
@@ -312,61 +386,176 @@ class RoutePlanner:
     # Nakit ve KentKart ile bu senaryo çalışmaz.
     #----------------------------------------------------------------------
     def plan_taksi_otobus_tramvay(self, start_lat, start_lon, dest_lat, dest_lon,
-                                  passenger_type, payment_type, special_day, start_time):
+                                  passenger_type, payment_type, special_day, start_time, k=1):
         if payment_type in ["nakit", "kentkart"]:
             return None
-        steps = []
-        # Başlangıç segmenti: Taksi
-        startStop, distStart = self.get_nearest_stop_any_bus_tram(start_lat, start_lon)
-        if not startStop:
+        must_use = {"mustUseBusOrTram": True}
+        connection = self._connect(None, start_lat, start_lon, dest_lat, dest_lon, "taksi",
+                                   passenger_type, payment_type, special_day, **must_use)
+        if not connection:
             return None
-        tA = distStart / AVERAGE_TAXI_SPEED
-        bcA = self.taxi.calculate_cost(distStart)
-        steps.append({
-            "from": "Başlangıç",
-            "to": startStop.id,
-            "mode": "taksi",
-            "time": round(tA, 1),
-            "distance": round(distStart, 2),
-            "base_cost": round(bcA, 2),
-            "final_cost": round(bcA, 2),
-            "discount_explanation": "Taksi => tam",
-            "color": MODE_COLORS["taksi"]
-        })
-        usedTaksi = True
         # BFS: Otobüs/Tramvay + transfer (hiç yürüme)
-        endStop, distEnd = self.get_nearest_stop_any_bus_tram(dest_lat, dest_lon)
-        if not endStop:
+        if not any(s["mode"] in ["bus", "tram"] for s in connection[2]):
             return None
-        midSteps = self.stateful_bfs_bus_tram_transfer(
-            startStop.id, endStop.id,
-            passenger_type, payment_type, special_day,
-            mustUseBusOrTram=True
-        )
-        if not midSteps:
+        return self._transit_routes("taksi", None, connection, k, start_lat, start_lon, dest_lat, dest_lon,
+                                    passenger_type, payment_type, special_day, start_time, **must_use)
+
+    #----------------------------------------------------------------------
+    # 6) Bütçeye uygun en hızlı rota:
+    # Ödeme aracının bakiyesi (budget) aramada kaynak kısıtıdır. Etiketler
+    # (süre, ücret) taşır; birikmiş ücreti bütçeyi aşan etiket hiç kuyruğa
+    # girmez. Etiketler süre sırasıyla açıldığından bir durumda (durak, geliş
+    # tipi) daha önce açılmış bir etiketten daha ucuz olmayan etiket
+    # baskılanır; her durumda süre/ücret Pareto kümesi kalır. Erişim ve çıkış
+    # yürüyerek, kredi kartıyla taksiyle de olabilir; senaryo kurallarındaki
+    # gibi nakitle otobüs/tramvaya, KentKart'la taksiye binilmez. Doğrudan
+    # taksi bütçeye sığıyorsa o da bir adaydır. Alternatif aranmaz (k yok sayılır).
+    #----------------------------------------------------------------------
+    def plan_butceye_uygun(self, start_lat, start_lon, dest_lat, dest_lon,
+                           passenger_type, payment_type, special_day, start_time, k=1, budget=math.inf):
+        best_route = None
+        best_time = math.inf
+        if payment_type != "kentkart":
+            taxi = self.plan_sadece_taksi(start_lat, start_lon, dest_lat, dest_lon,
+                                          passenger_type, payment_type, special_day, start_time)
+            if taxi["total_cost"] <= budget + 1e-9:
+                best_route, best_time = taxi, taxi["total_time"]
+        if payment_type == "nakit":
+            return best_route
+
+        access_modes = ["walk", "taksi"] if payment_type == "kredi" else ["walk"]
+        k_access = max(self.access_k, BUDGET_ACCESS_CANDIDATES)
+        origins = self.nearest_stops(start_lat, start_lon, None, k_access, self.access_radius_km)
+        targets = self.nearest_stops(dest_lat, dest_lon, None, k_access, self.access_radius_km)
+        found = self._budget_search(self._budget_legs(start_lat, start_lon, origins, access_modes),
+                                    self._budget_legs(dest_lat, dest_lon, targets, access_modes, reverse=True),
+                                    budget, best_time, passenger_type, payment_type, special_day)
+        if found is None:
+            return best_route
+        (start, access_mode), (end, egress_mode), midSteps = found
+        connection = (self._stop(start), origins[start], midSteps, self._stop(end), targets[end])
+        return self._transit_route(access_mode, connection, start_lat, start_lon, dest_lat, dest_lon,
+                                   start_time, egress_mode)
+
+    def _budget_legs(self, lat, lon, candidates, modes, reverse=False):
+        """{durak indeksi: km} -> {durak indeksi: [(dakika, ücret, bacak tipi)]}."""
+        legs = {}
+        for access_mode in modes:
+            for i, (dist, time_min) in self._legs_to_stops(access_mode, lat, lon, candidates, reverse).items():
+                cost = self.taxi.calculate_cost(dist) if access_mode == "taksi" else 0.0
+                legs.setdefault(i, []).append((time_min, cost, access_mode))
+        return legs
+
+    def _budget_search(self, access, egress, budget, best_time, passenger_type, payment_type, special_day):
+        """
+        access/egress: _budget_legs çıktısı. Toplam süresi best_time'dan kısa
+        ve toplam ücreti budget'ı aşmayan en hızlı ((başlangıç, erişim tipi),
+        (varış, çıkış tipi), ara adımlar) ya da None. En az bir otobüs/tramvay
+        kenarı kullanılır. Geliş tipleri one_to_many'deki gibidir.
+        """
+        import heapq
+        net = self.network
+        ov = self.overlay
+        limit = budget + 1e-9  # kuruş yuvarlamaları bütçeyi aşmış saymasın
+        # Etiket: (önceki etiket, kenar tipi, kenar, düğüm, geliş tipi, erişim tipi)
+        labels = []
+        heap = []
+        for i, legs in access.items():
+            for t, fare, mode in legs:
+                if fare <= limit:
+                    labels.append((None, None, None, i, 0, mode))
+                    heap.append((t, fare, len(labels) - 1))
+        heapq.heapify(heap)
+        cheapest = {}  # (düğüm, geliş tipi) -> açılmış etiketlerin en düşük ücreti
+        best, best_label, best_egress = best_time, None, None
+        expanded = 0
+        while heap:
+            t, fare, n = heapq.heappop(heap)
+            if t >= best:
+                break
+            _, _, _, cur, kind, _ = labels[n]
+            if fare >= cheapest.get((cur, kind), math.inf) - 1e-9:
+                continue
+            cheapest[(cur, kind)] = fare
+            expanded += 1
+            if kind != 0 and cur in egress:
+                for e_time, e_fare, e_mode in egress[cur]:
+                    if fare + e_fare <= limit and t + e_time < best:
+                        best, best_label, best_egress = t + e_time, n, e_mode
+            moves = []
+            code = net.types[cur]
+            if code != OTHER_TYPE:
+                mode = TYPE_NAMES[code]
+                for k in net.edges(cur):
+                    if k in ov.closed:
+                        continue
+                    if kind == 2 and payment_type == "kentkart":
+                        cost = net.edge_fare[k]
+                    else:
+                        cost = self.leg_fare(mode, net.edge_fare[k], passenger_type, payment_type, special_day)[0]
+                    moves.append((net.edge_to[k], 1, mode, k, ov.edge_time(net, k), cost))
+            if kind == 1:
+                moves.extend((net.walk_to[w], 2, "walk", w, net.walk_time[w], 0.0) for w in net.walks(cur))
+                tr = ov.transfer(net, cur)
+                if tr is not None:
+                    moves.append((tr[0], 2, "transfer", cur, tr[1], tr[2]))
+            for nxt, nkind, edgeMode, k, w, cost in moves:
+                nt, nfare = t + w, fare + cost
+                if nt >= best or nfare > limit:
+                    continue
+                if nfare >= cheapest.get((nxt, nkind), math.inf) - 1e-9:
+                    continue
+                labels.append((n, edgeMode, k, nxt, nkind, None))
+                heapq.heappush(heap, (nt, nfare, len(labels) - 1))
+        self._record_expansions("budget_search", expanded)
+        if best_label is None:
             return None
-        if any(s["mode"] in ["bus", "tram"] for s in midSteps):
-            usedBusOrTram = True
+        chain = []
+        n = best_label
+        while labels[n][0] is not None:
+            prev, edgeMode, k = labels[n][:3]
+            # _stateful_steps yalnızca düğümü ve "transferle gelindi" bayrağını okur.
+            chain.append(((labels[prev][3], None, None, None, labels[prev][4] == 2), edgeMode, k))
+            n = prev
+        chain.reverse()
+        steps = self._stateful_steps(chain, passenger_type, payment_type, special_day, ov)
+        return (labels[n][3], labels[n][5]), (labels[best_label][3], best_egress), steps
+
+    #----------------------------------------------------------------------
+    # Toplu taşıma senaryolarının ortak rota kurulumu:
+    # erişim bacağı (yürüme ya da taksi) + ara adımlar + çıkış bacağı.
+    #----------------------------------------------------------------------
+    def _access_step(self, access_mode, frm, to, dist, time_min):
+        if access_mode == "taksi":
+            base_c = self.taxi.calculate_cost(dist)
+            explanation = "Taksi => tam"
         else:
-            usedBusOrTram = False
+            base_c = 0
+            explanation = "Yürüme => ücretsiz"
+        return {
+            "from": frm,
+            "to": to,
+            "mode": access_mode,
+            "time": round(time_min, 1),
+            "distance": round(dist, 2),
+            "base_cost": round(base_c, 2),
+            "final_cost": round(base_c, 2),
+            "discount_explanation": explanation,
+            "color": MODE_COLORS[access_mode]
+        }
+
+    def _transit_route(self, access_mode, connection, start_lat, start_lon, dest_lat, dest_lon, start_time,
+                       egress_mode=None):
+        # egress_mode verilmezse çıkış bacağı da access_mode ile yapılır.
+        startStop, distStart, midSteps, endStop, distEnd = connection
+        egress_mode = egress_mode or access_mode
+        steps = [self._access_step(access_mode, "Başlangıç", startStop.id,
+                                   *self._leg(access_mode, start_lat, start_lon, startStop.lat, startStop.lon,
+                                              distStart))]
         steps.extend(midSteps)
-        # Varış segmenti: Taksi
-        tB = distEnd / AVERAGE_TAXI_SPEED
-        bcB = self.taxi.calculate_cost(distEnd)
-        steps.append({
-            "from": endStop.id,
-            "to": "Varış",
-            "mode": "taksi",
-            "time": round(tB, 1),
-            "distance": round(distEnd, 2),
-            "base_cost": round(bcB, 2),
-            "final_cost": round(bcB, 2),
-            "discount_explanation": "Taksi => tam",
-            "color": MODE_COLORS["taksi"]
-        })
-        usedTaksi = True
-        if not usedTaksi or not usedBusOrTram:
-            return None
+        steps.append(self._access_step(egress_mode, endStop.id, "Varış",
+                                       *self._leg(egress_mode, endStop.lat, endStop.lon, dest_lat, dest_lon,
+                                                  distEnd)))
         merged = self.merge_consecutive_steps(steps)
         total_time = sum(s["time"] for s in merged)
         total_dist = sum(s["distance"] for s in merged)
@@ -384,158 +573,457 @@ class RoutePlanner:
             route["arrival_time"] = arr.strftime("%d.%m.%Y %H:%M")
         return route
 
+    def _transit_routes(self, access_mode, mode, connection, k, start_lat, start_lon, dest_lat, dest_lon,
+                        passenger_type, payment_type, special_day, start_time, **must_use):
+        """Birincil rota; k > 1 ise "alternatives" altında en fazla k - 1 alternatifiyle."""
+        route = self._transit_route(access_mode, connection, start_lat, start_lon, dest_lat, dest_lon,
+                                    start_time)
+        if k > 1:
+            route["alternatives"] = [
+                self._transit_route(access_mode, alt, start_lat, start_lon, dest_lat, dest_lon, start_time)
+                for alt in self._alternative_connections(mode, connection, k, passenger_type, payment_type,
+                                                         special_day, **must_use)
+            ]
+        return route
+
     #----------------------------------------------------------------------
     # Yardımcı BFS Fonksiyonları
     #----------------------------------------------------------------------
     def get_nearest_stop(self, lat, lon, mode_filter=None):
+        net = self.network
+        code = TYPE_CODES.get(mode_filter, OTHER_TYPE) if mode_filter else None
         best = None
         bestDist = math.inf
-        for st in self.stops.values():
-            if mode_filter and st.type != mode_filter:
+        for i in self._scan_order(lat, lon, "all" if code is None else code):
+            if code is not None and net.types[i] != code:
                 continue
-            d = haversine(lat, lon, st.lat, st.lon)
+            d = self._distance(lat, lon, net.lat[i], net.lon[i])
             if d < bestDist:
                 bestDist = d
-                best = st
-        return best, bestDist
+                best = i
+        if best is None:
+            return None, bestDist
+        return self._stop(best), bestDist
 
     def get_nearest_stop_any_bus_tram(self, lat, lon):
+        net = self.network
         best = None
         bestDist = math.inf
-        for st in self.stops.values():
-            if st.type in ["bus", "tram"]:
-                d = haversine(lat, lon, st.lat, st.lon)
+        for i in self._scan_order(lat, lon, "transit"):
+            if net.types[i] != OTHER_TYPE:
+                d = self._distance(lat, lon, net.lat[i], net.lon[i])
                 if d < bestDist:
                     bestDist = d
-                    best = st
-        return best, bestDist
+                    best = i
+        if best is None:
+            return None, bestDist
+        return self._stop(best), bestDist
 
-    def bus_bfs(self, start_id, end_id, passenger_type, payment_type, special_day):
-        from collections import deque
-        visited = set()
-        queue = deque()
-        queue.append((start_id, []))
-        visited.add(start_id)
-        foundPath = None
-        while queue:
-            cur, path = queue.popleft()
-            if cur == end_id:
-                foundPath = path + [cur]
-                break
-            st = self.stops.get(cur)
-            if not st or st.type != "bus":
+    def nearest_stops(self, lat, lon, mode_filter=None, k=1, radius_km=0.0):
+        """
+        Erişim/çıkış adayları {durak indeksi: km}: en yakın k durak ve
+        radius_km içindeki tüm duraklar. mode_filter yoksa otobüs ya da tramvay.
+        """
+        import heapq
+        net = self.network
+        codes = (TYPE_CODES[mode_filter],) if mode_filter else tuple(TYPE_NAMES)
+        order = self._scan_order(lat, lon, TYPE_CODES[mode_filter] if mode_filter else "transit", k, radius_km)
+        dists = [(self._distance(lat, lon, net.lat[i], net.lon[i]), i)
+                 for i in order if net.types[i] in codes]
+        chosen = {i: d for d, i in heapq.nsmallest(k, dists)}
+        chosen.update((i, d) for d, i in dists if d <= radius_km)
+        return chosen
+
+    #----------------------------------------------------------------------
+    # Başlangıç/varış durağı seçimi ve aradaki yol.
+    # Tek adayda (varsayılan) en yakın duraklar arasında en az duraklı yol
+    # aranır. access_k > 1 ya da access_radius_km > 0 ise her uçta birden
+    # fazla aday alınır ve ara bacak, aday çiftleri için ayrı ayrı değil,
+    # tek bir çok kaynaklı/çok hedefli Dijkstra ile çözülür; amaç erişim +
+    # yolculuk + çıkış süresi toplamıdır.
+    #----------------------------------------------------------------------
+    def _connect(self, mode, start_lat, start_lon, dest_lat, dest_lon, access_mode,
+                 passenger_type, payment_type, special_day, **must_use):
+        """
+        (başlangıç durağı, km, ara adımlar, varış durağı, km) ya da None.
+        mode: "bus"/"tram" tek hat tipi; None ise otobüs + tramvay + transfer.
+        access_mode: erişim/çıkış bacağı ("walk" ya da "taksi"). km'ler kuş uçuşudur.
+        """
+        if self.access_k <= 1 and self.access_radius_km <= 0:
+            if mode:
+                startStop, distStart = self.get_nearest_stop(start_lat, start_lon, mode)
+                endStop, distEnd = self.get_nearest_stop(dest_lat, dest_lon, mode)
+            else:
+                startStop, distStart = self.get_nearest_stop_any_bus_tram(start_lat, start_lon)
+                endStop, distEnd = self.get_nearest_stop_any_bus_tram(dest_lat, dest_lon)
+            if not startStop or not endStop:
+                return None
+            if mode:
+                midSteps = self._single_mode_bfs(mode, startStop.id, endStop.id,
+                                                 passenger_type, payment_type, special_day)
+            else:
+                midSteps = self.stateful_bfs_bus_tram_transfer(startStop.id, endStop.id, passenger_type,
+                                                               payment_type, special_day, **must_use)
+            if not midSteps:
+                return None
+            return startStop, distStart, midSteps, endStop, distEnd
+
+        origins = self.nearest_stops(start_lat, start_lon, mode, self.access_k, self.access_radius_km)
+        targets = self.nearest_stops(dest_lat, dest_lon, mode, self.access_k, self.access_radius_km)
+        access = self._legs_to_stops(access_mode, start_lat, start_lon, origins)
+        egress = self._legs_to_stops(access_mode, dest_lat, dest_lon, targets, reverse=True)
+        found = self._multi_access_search(mode, {i: leg[1] for i, leg in access.items()},
+                                          {i: leg[1] for i, leg in egress.items()},
+                                          passenger_type, payment_type, special_day, **must_use)
+        if found is None:
+            return None
+        start, end, midSteps = found
+        return self._stop(start), origins[start], midSteps, self._stop(end), targets[end]
+
+    def _multi_access_search(self, mode, access, egress, passenger_type, payment_type, special_day,
+                             mustUseBus=False, mustUseTram=False, mustUseBusOrTram=False):
+        """
+        access/egress: {durak indeksi: dakika}. Süre toplamı en küçük
+        (başlangıç indeksi, varış indeksi, adımlar) ya da None. Boş ara bacak
+        kabul edilmez (BFS'lerdeki gibi).
+        """
+        import heapq
+        net = self.network
+        ov = self.overlay
+        if mode:
+            code = TYPE_CODES[mode]
+            # Durum: (düğüm, en az bir kenar kullanıldı mı)
+            sources = {(i, False): t for i, t in access.items()}
+
+            def successors(state):
+                if net.types[state[0]] != code:
+                    return
+                for k in net.edges(state[0]):
+                    if k not in ov.closed:
+                        yield (net.edge_to[k], True), mode, k, ov.edge_time(net, k)
+
+            def is_goal(state):
+                return state[1]
+        else:
+            # Durum: stateful BFS ile aynı
+            sources = {(i, None, False, False, False): t for i, t in access.items()}
+
+            def successors(state):
+                for new_state, edgeMode, k in self._stateful_successors(state, ov):
+                    if edgeMode == "transfer":
+                        yield new_state, edgeMode, k, ov.transfer(net, k)[1]
+                    elif edgeMode == "walk":
+                        yield new_state, edgeMode, k, net.walk_time[k]
+                    else:
+                        yield new_state, edgeMode, k, ov.edge_time(net, k)
+
+            def is_goal(state):
+                usedBus, usedTram = state[2], state[3]
+                if mustUseBus and not usedBus:
+                    return False
+                if mustUseTram and not usedTram:
+                    return False
+                if mustUseBusOrTram and (not usedBus and not usedTram):
+                    return False
+                return True
+
+        dist = dict(sources)
+        parent = dict.fromkeys(sources)
+        # Durumlar None içerebildiğinden eşitlikte sıra sayacı karşılaştırılır.
+        heap = [(t, n, state) for n, (state, t) in enumerate(sources.items())]
+        heapq.heapify(heap)
+        counter = len(heap)
+        best, best_state = math.inf, None
+        expanded = 0
+        while heap:
+            d, _, state = heapq.heappop(heap)
+            if d > dist[state]:
                 continue
-            for e in st.nextStops:
-                nxtId = e["stopId"]
-                if nxtId not in visited:
-                    visited.add(nxtId)
-                    queue.append((nxtId, path + [cur]))
-        if not foundPath:
+            if d >= best:
+                break
+            expanded += 1
+            node = state[0]
+            if node in egress and is_goal(state) and d + egress[node] < best:
+                best, best_state = d + egress[node], state
+            for nxt, edgeMode, k, w in successors(state):
+                nd = d + w
+                if nd < dist.get(nxt, math.inf):
+                    dist[nxt] = nd
+                    parent[nxt] = (state, edgeMode, k)
+                    heapq.heappush(heap, (nd, counter, nxt))
+                    counter += 1
+        self._record_expansions("multi_access", expanded)
+        if best_state is None:
             return None
-        steps = []
-        for i in range(len(foundPath) - 1):
-            c = foundPath[i]
-            n = foundPath[i + 1]
-            eData = None
-            for ed in self.stops[c].nextStops:
-                if ed["stopId"] == n:
-                    eData = ed
-                    break
-            if not eData:
-                return None
-            base_c = eData["ucret"]
-            final_c = base_c
-            explanation = "Otobüs => tam"
-            if special_day:
-                final_c = 0
-                explanation = "Özel gün => ücretsiz (Bus)"
-            elif payment_type == "kredi":
-                explanation = "Kredi => indirim yok"
+        chain = self._chain_to(parent, best_state)
+        if mode:
+            steps = self._single_mode_steps(mode, [(prev[0], m, k) for prev, m, k in chain],
+                                            passenger_type, payment_type, special_day, ov)
+        else:
+            steps = self._stateful_steps(chain, passenger_type, payment_type, special_day, ov)
+        return chain[0][0][0], best_state[0], steps
+
+    #----------------------------------------------------------------------
+    # Alternatif rotalar: birincil bağlantının başlangıç ve varış durakları
+    # arasında, süreye göre sıralı döngüsüz yollar (bkz. models/k_shortest.py).
+    # Ara bacağı birincil rotanınkinin ALTERNATIVE_STRETCH katından uzun
+    # süren yollar aranmaz. Birincil yolla ya da önceki bir alternatifle
+    # otobüs/tramvay kenarlarının ALTERNATIVE_OVERLAP'ından fazlası ortak olan
+    # yollar neredeyse aynı sayılıp atlanır.
+    #----------------------------------------------------------------------
+    def _alternative_connections(self, mode, connection, k, passenger_type, payment_type, special_day,
+                                 mustUseBus=False, mustUseTram=False, mustUseBusOrTram=False):
+        """connection ile aynı biçimde en fazla k - 1 bağlantı."""
+        from models.k_shortest import k_shortest_paths
+        net = self.network
+        ov = self.overlay
+        startStop, distStart, midSteps, endStop, distEnd = connection
+        start = net.index[startStop.id]
+        end = net.index[endStop.id]
+
+        def weight(edgeMode, k):
+            if edgeMode == "transfer":
+                return ov.transfer(net, k)[1]
+            if edgeMode == "walk":
+                return net.walk_time[k]
+            return ov.edge_time(net, k)
+
+        if mode:
+            code = TYPE_CODES[mode]
+            source, goals = start, [end]
+
+            def succ(v):
+                if net.types[v] != code:
+                    return ()
+                return ((net.edge_to[k], mode, k) for k in net.edges(v) if k not in ov.closed)
+
+            def node(v):
+                return v
+
+            def pred(v):
+                return ((net.edge_from[k], ov.edge_time(net, k)) for k in net.in_edges(v)
+                        if net.types[net.edge_from[k]] == code and k not in ov.closed)
+
+            def to_steps(chain):
+                return self._single_mode_steps(mode, chain, passenger_type, payment_type, special_day, ov)
+        else:
+            def is_goal(usedBus, usedTram):
+                if mustUseBus and not usedBus:
+                    return False
+                if mustUseTram and not usedTram:
+                    return False
+                if mustUseBusOrTram and (not usedBus and not usedTram):
+                    return False
+                return True
+
+            source = (start, None, False, False, False)
+            goals = self._stateful_goals(end, is_goal)
+
+            def succ(state):
+                return self._stateful_successors(state, ov)
+
+            def node(state):
+                return state[0]
+
+            def pred(v):
+                # Durum bayrakları olmadan _stateful_successors'ın tersi (alt sınır).
+                for k in net.in_edges(v):
+                    u = net.edge_from[k]
+                    if net.types[u] != OTHER_TYPE and k not in ov.closed:
+                        yield u, ov.edge_time(net, k)
+                for u in ov.transfers_into(net, v):
+                    yield u, ov.transfer(net, u)[1]
+                for w in net.walks(v):
+                    yield net.walk_to[w], net.walk_time[w]
+
+            def to_steps(chain):
+                return self._stateful_steps(chain, passenger_type, payment_type, special_day, ov)
+
+        # Birincil ara bacağın arama süresi (transfer adımları süre 0 gösterir).
+        primary_time = 0.0
+        for s in midSteps:
+            if s["mode"] == "transfer":
+                tr = ov.transfer(net, net.index[s["from"]])
+                primary_time += tr[1] if tr else 0.0
             else:
-                disc = 0.0
-                if passenger_type == "ogrenci":
-                    disc = 0.5
-                    explanation = "Otobüs (Öğrenci)"
-                elif passenger_type == "65+":
-                    disc = 0.3
-                    explanation = "Otobüs (Yaşlı)"
-                final_c = base_c * (1 - disc)
-            steps.append({
-                "from": c,
-                "to": n,
-                "mode": "bus",
-                "time": eData["sure"],
-                "distance": eData["mesafe"],
-                "base_cost": round(base_c, 2),
-                "final_cost": round(final_c, 2),
-                "discount_explanation": explanation,
-                "color": MODE_COLORS["bus"]
-            })
-        return steps
+                primary_time += s["time"]
+
+        def rides(steps):
+            return {(s["from"], s["to"]) for s in steps if s["mode"] in ("bus", "tram")}
+
+        accepted = [rides(midSteps)]
+        alternatives = []
+        # Neredeyse aynı yollar elendiği için sınırlı sayıda aday denenir.
+        paths = k_shortest_paths(source, goals, succ, weight, node, pred,
+                                 primary_time * ALTERNATIVE_STRETCH, 4 * k, ALTERNATIVE_BUDGET,
+                                 record=lambda n: self._record_expansions("k_shortest", n))
+        for _, chain in paths:
+            if not chain:
+                continue
+            steps = to_steps(chain)
+            pairs = rides(steps)
+            if any(len(pairs & other) > ALTERNATIVE_OVERLAP * max(len(pairs), len(other))
+                   for other in accepted):
+                continue
+            accepted.append(pairs)
+            alternatives.append((startStop, distStart, steps, endStop, distEnd))
+            if len(alternatives) >= k - 1:
+                break
+        return alternatives
+
+    def leg_fare(self, mode, base_c, passenger_type, payment_type, special_day):
+        """Otobüs/tramvay kenarının indirimli ücreti ve açıklaması."""
+        label, short = MODE_LABELS[mode]
+        final_c = base_c
+        explanation = f"{label} => tam"
+        if special_day:
+            final_c = 0
+            explanation = f"Özel gün => ücretsiz ({short})"
+        elif payment_type == "kredi":
+            explanation = "Kredi => indirim yok"
+        else:
+            disc = 0.0
+            if passenger_type == "ogrenci":
+                disc = 0.5
+                explanation = f"{label} (Öğrenci)"
+            elif passenger_type == "65+":
+                disc = 0.3
+                explanation = f"{label} (Yaşlı)"
+            final_c = base_c * (1 - disc)
+        return final_c, explanation
+
+    def _edge_step(self, mode, cur, k, final_c, explanation, ov):
+        net = self.network
+        return {
+            "from": net.ids[cur],
+            "to": net.ids[net.edge_to[k]],
+            "mode": mode,
+            "time": ov.edge_time(net, k),
+            "distance": net.edge_dist[k],
+            "base_cost": round(net.edge_fare[k], 2),
+            "final_cost": round(final_c, 2),
+            "discount_explanation": explanation,
+            "color": MODE_COLORS[mode]
+        }
+
+    def bus_bfs(self, start_id, end_id, passenger_type, payment_type, special_day):
+        return self._single_mode_bfs("bus", start_id, end_id, passenger_type, payment_type, special_day)
 
     def tram_bfs(self, start_id, end_id, passenger_type, payment_type, special_day):
+        return self._single_mode_bfs("tram", start_id, end_id, passenger_type, payment_type, special_day)
+
+    def _single_mode_bfs(self, mode, start_id, end_id, passenger_type, payment_type, special_day):
+        # Tek hat tipinde (sadece otobüs ya da sadece tramvay) en az duraklı yol.
         from collections import deque
-        visited = set()
-        queue = deque()
-        queue.append((start_id, []))
-        visited.add(start_id)
-        foundPath = None
-        while queue:
-            cur, path = queue.popleft()
-            if cur == end_id:
-                foundPath = path + [cur]
-                break
-            st = self.stops.get(cur)
-            if not st or st.type != "tram":
-                continue
-            for e in st.nextStops:
-                nxtId = e["stopId"]
-                if nxtId not in visited:
-                    visited.add(nxtId)
-                    queue.append((nxtId, path + [cur]))
-        if not foundPath:
+        net = self.network
+        start = net.index.get(start_id)
+        end = net.index.get(end_id)
+        if start is None or end is None:
             return None
-        steps = []
-        for i in range(len(foundPath) - 1):
-            c = foundPath[i]
-            n = foundPath[i + 1]
-            eData = None
-            for ed in self.stops[c].nextStops:
-                if ed["stopId"] == n:
-                    eData = ed
+        code = TYPE_CODES[mode]
+        ov = self.overlay
+        closed = ov.closed
+        if self.bidirectional:
+            chain = self._bidirectional_bfs(
+                [start], [end],
+                lambda v: ((net.edge_to[k], mode, k) for k in net.edges(v)
+                           if k not in closed) if net.types[v] == code else (),
+                lambda v: ((net.edge_from[k], mode, k) for k in net.in_edges(v)
+                           if net.types[net.edge_from[k]] == code and k not in closed),
+                f"{mode}_bfs")
+        else:
+            parent = {start: None}  # düğüm -> (önceki düğüm, kenar tipi, kenar indeksi)
+            queue = deque()
+            queue.append(start)
+            found = False
+            expanded = 0
+            while queue:
+                cur = queue.popleft()
+                expanded += 1
+                if cur == end:
+                    found = True
                     break
-            if not eData:
-                return None
-            base_c = eData["ucret"]
-            final_c = base_c
-            explanation = "Tramvay => tam"
-            if special_day:
-                final_c = 0
-                explanation = "Özel gün => ücretsiz (Tram)"
-            elif payment_type == "kredi":
-                explanation = "Kredi => indirim yok"
-            else:
-                disc = 0.0
-                if passenger_type == "ogrenci":
-                    disc = 0.5
-                    explanation = "Tramvay (Öğrenci)"
-                elif passenger_type == "65+":
-                    disc = 0.3
-                    explanation = "Tramvay (Yaşlı)"
-                final_c = base_c * (1 - disc)
-            steps.append({
-                "from": c,
-                "to": n,
-                "mode": "tram",
-                "time": eData["sure"],
-                "distance": eData["mesafe"],
-                "base_cost": round(base_c, 2),
-                "final_cost": round(final_c, 2),
-                "discount_explanation": explanation,
-                "color": MODE_COLORS["tram"]
-            })
+                if net.types[cur] != code:
+                    continue
+                for k in net.edges(cur):
+                    nxt = net.edge_to[k]
+                    if nxt not in parent and k not in closed:
+                        parent[nxt] = (cur, mode, k)
+                        queue.append(nxt)
+            self._record_expansions(f"{mode}_bfs", expanded)
+            chain = self._chain_to(parent, end) if found else None
+        if chain is None:
+            return None
+        return self._single_mode_steps(mode, chain, passenger_type, payment_type, special_day, ov)
+
+    def _single_mode_steps(self, mode, chain, passenger_type, payment_type, special_day, ov):
+        steps = []
+        for cur, _, k in chain:
+            final_c, explanation = self.leg_fare(mode, self.network.edge_fare[k],
+                                                 passenger_type, payment_type, special_day)
+            steps.append(self._edge_step(mode, cur, k, final_c, explanation, ov))
         return steps
 
+    @staticmethod
+    def _chain_to(parent, state):
+        # parent zincirini baştan sona (önceki durum, kenar tipi, kenar) listesine çevirir.
+        chain = []
+        while parent[state] is not None:
+            prev, edgeMode, k = parent[state]
+            chain.append((prev, edgeMode, k))
+            state = prev
+        chain.reverse()
+        return chain
+
+    #----------------------------------------------------------------------
+    # İki yönlü BFS: başlangıçtan ileri, hedeflerden ters kenarlar üzerinden
+    # geri arar; her adımda küçük olan sınırın bütün bir seviyesi açılır.
+    # Bir seviyede kesişme bulunduğunda, toplam derinliği en küçük olan
+    # buluşma durumu en az adımlı yolu verir. Eşit uzunluktaki yollardan
+    # hangisinin seçileceği tek yönlü BFS'inkinden farklı olabilir.
+    # succ/pred: durum -> (komşu durum, kenar tipi, kenar) üreteçleri.
+    #----------------------------------------------------------------------
+    def _bidirectional_bfs(self, starts, goals, succ, pred, stats_name):
+        fparent = {s: None for s in starts}
+        bparent = {g: None for g in goals}
+        fdepth = dict.fromkeys(starts, 0)
+        bdepth = dict.fromkeys(goals, 0)
+        meets = [s for s in starts if s in bparent]
+        ffront, bfront = list(starts), list(goals)
+        expanded = 0
+        while not meets and ffront and bfront:
+            if len(ffront) <= len(bfront):
+                front, parent, depth, other, step = ffront, fparent, fdepth, bparent, succ
+            else:
+                front, parent, depth, other, step = bfront, bparent, bdepth, fparent, pred
+            new_front = []
+            for state in front:
+                expanded += 1
+                for (nxt, edgeMode, k) in step(state):
+                    if nxt not in parent:
+                        parent[nxt] = (state, edgeMode, k)
+                        depth[nxt] = depth[state] + 1
+                        new_front.append(nxt)
+                        if nxt in other:
+                            meets.append(nxt)
+            if front is ffront:
+                ffront = new_front
+            else:
+                bfront = new_front
+        self._record_expansions(stats_name, expanded)
+        if not meets:
+            return None
+        meet = min(meets, key=lambda s: fdepth[s] + bdepth[s])
+        # Geri yöndeki parent kaydı (sonraki durum, kenar tipi, kenar) biçiminde;
+        # ileri yöne çevir.
+        chain = self._chain_to(fparent, meet)
+        state = meet
+        while bparent[state] is not None:
+            nxt, edgeMode, k = bparent[state]
+            chain.append((state, edgeMode, k))
+            state = nxt
+        return chain
+
     #----------------------------------------------------------------------
     # Stateful BFS for bus+tram+transfer with transfer discount flag.
     # Eğer transfer kenarı kullanılırsa, sonraki boarding adımında (bus veya tram) ekstra indirim
@@ -546,126 +1034,352 @@ class RoutePlanner:
                                        mustUseBus=False, mustUseTram=False,
                                        mustUseBusOrTram=False):
         from collections import deque
+        net = self.network
+        start = net.index.get(start_id)
+        end = net.index.get(end_id)
+        if start is None or end is None:
+            return None
+
+        def is_goal(usedBus, usedTram):
+            if mustUseBus and not usedBus:
+                return False
+            if mustUseTram and not usedTram:
+                return False
+            if mustUseBusOrTram and (not usedBus and not usedTram):
+                return False
+            return True
+
         # State: (node, last_mode, usedBus, usedTram, transfer_pending)
-        start_state = (start_id, None, False, False, False)
-        visited = {start_state: []}
+        start_state = (start, None, False, False, False)
+        ov = self.overlay
+        if self.bidirectional:
+            if start == end:
+                chain = [] if is_goal(False, False) else None
+            else:
+                chain = self._bidirectional_bfs(
+                    [start_state], self._stateful_goals(end, is_goal),
+                    lambda s: self._stateful_successors(s, ov) if s[0] != end else (),
+                    lambda s: self._stateful_predecessors(s, start, end, ov),
+                    "stateful_bfs")
+            if chain is None:
+                return None
+            return self._stateful_steps(chain, passenger_type, payment_type, special_day, ov)
+
+        parent = {start_state: None}  # state -> (önceki state, kenar tipi, kenar indeksi)
         queue = deque()
         queue.append(start_state)
+        expanded = 0
         while queue:
-            (cur, last_mode, usedBus, usedTram, transfer_pending) = queue.popleft()
-            pathEdges = visited[(cur, last_mode, usedBus, usedTram, transfer_pending)]
-            if cur == end_id:
-                if mustUseBus and not usedBus:
+            state = queue.popleft()
+            cur = state[0]
+            expanded += 1
+            if cur == end:
+                if not is_goal(state[2], state[3]):
                     continue
-                if mustUseTram and not usedTram:
+                self._record_expansions("stateful_bfs", expanded)
+                return self._stateful_steps(self._chain_to(parent, state),
+                                            passenger_type, payment_type, special_day, ov)
+            for (new_state, edgeMode, k) in self._stateful_successors(state, ov):
+                if new_state not in parent:
+                    parent[new_state] = (state, edgeMode, k)
+                    queue.append(new_state)
+        self._record_expansions("stateful_bfs", expanded)
+        return None
+
+    def _stateful_successors(self, state, ov):
+        net = self.network
+        (cur, last_mode, usedBus, usedTram, transfer_pending) = state
+        code = net.types[cur]
+        if code != OTHER_TYPE:
+            edgeMode = TYPE_NAMES[code]
+            for k in net.edges(cur):
+                if k in ov.closed:
                     continue
-                if mustUseBusOrTram and (not usedBus and not usedTram):
+                yield ((net.edge_to[k], edgeMode,
+                        usedBus or edgeMode == "bus",
+                        usedTram or edgeMode == "tram",
+                        False), edgeMode, k)
+        tr = ov.transfer(net, cur)
+        if tr is not None and last_mode in ["bus", "tram"]:
+            # Sonraki boarding adımında bildirilsin.
+            yield (tr[0], "transfer", usedBus, usedTram, True), "transfer", cur
+        if last_mode in ["bus", "tram"]:
+            # Yakın durağa yürüyerek aktarma da bir transfer sayılır.
+            for w in net.walks(cur):
+                yield (net.walk_to[w], "transfer", usedBus, usedTram, True), "walk", w
+
+    @staticmethod
+    def _valid_flags(last_mode, usedBus, usedTram):
+        # last_mode ile kullanım bayrakları çelişmemeli (otobüsle gelindiyse usedBus).
+        return not ((last_mode == "bus" and not usedBus) or (last_mode == "tram" and not usedTram))
+
+    def _stateful_goals(self, end, is_goal):
+        goals = []
+        for last_mode in ("bus", "tram", "transfer"):
+            for usedBus in (False, True):
+                for usedTram in (False, True):
+                    if is_goal(usedBus, usedTram) and self._valid_flags(last_mode, usedBus, usedTram):
+                        goals.append((end, last_mode, usedBus, usedTram, last_mode == "transfer"))
+        return goals
+
+    def _stateful_predecessors(self, state, start, end, ov):
+        # _stateful_successors'ın tersi. Hedef düğümden ileri açılım yapılmadığı
+        # için öncül durum hedef düğümde olamaz.
+        net = self.network
+        (cur, last_mode, usedBus, usedTram, transfer_pending) = state
+        if last_mode in ("bus", "tram"):
+            code = TYPE_CODES[last_mode]
+            # Bu kenar ilgili bayrağı ilk kez açmış olabilir.
+            bus_flags = {usedBus, False} if last_mode == "bus" else {usedBus}
+            tram_flags = {usedTram, False} if last_mode == "tram" else {usedTram}
+            for k in net.in_edges(cur):
+                u = net.edge_from[k]
+                if u == end or net.types[u] != code or k in ov.closed:
+                    continue
+                for pb in bus_flags:
+                    for pt in tram_flags:
+                        if u == start and not pb and not pt:
+                            yield (u, None, False, False, False), last_mode, k
+                        for plm in ("bus", "tram", "transfer"):
+                            if self._valid_flags(plm, pb, pt):
+                                yield (u, plm, pb, pt, plm == "transfer"), last_mode, k
+        elif last_mode == "transfer":
+            incoming = [(u, "transfer", u) for u in ov.transfers_into(net, cur)]
+            incoming += [(net.walk_to[w], "walk", net.walk_rev[w]) for w in net.walks(cur)]
+            for u, edgeMode, k in incoming:
+                if u == end:
                     continue
-                return pathEdges
-            st = self.stops.get(cur, None)
-            if not st:
+                for plm in ("bus", "tram"):
+                    if self._valid_flags(plm, usedBus, usedTram):
+                        yield (u, plm, usedBus, usedTram, False), edgeMode, k
+
+    def _stateful_steps(self, chain, passenger_type, payment_type, special_day, ov):
+        net = self.network
+        steps = []
+        for (prev, edgeMode, k) in chain:
+            cur = prev[0]
+            transfer_pending = prev[4]
+            if edgeMode == "walk":
+                steps.append({
+                    "from": net.ids[cur],
+                    "to": net.ids[net.walk_to[k]],
+                    "mode": "walk",
+                    "time": round(net.walk_time[k], 1),
+                    "distance": round(net.walk_dist[k], 2),
+                    "base_cost": 0,
+                    "final_cost": 0,
+                    "discount_explanation": "Yürüme => ücretsiz",
+                    "color": MODE_COLORS["walk"]
+                })
                 continue
-            edges = []
-            if st.type == "bus":
-                for e in st.nextStops:
-                    edges.append((e["stopId"], "bus", e))
-            if st.type == "tram":
-                for e in st.nextStops:
-                    edges.append((e["stopId"], "tram", e))
-            if st.transfer and last_mode in ["bus", "tram"]:
-                edges.append((st.transfer["transferStopId"], "transfer", st.transfer))
-            for (nxtId, edgeMode, eData) in edges:
-                new_usedBus = usedBus
-                new_usedTram = usedTram
-                new_transfer_pending = False
-                if edgeMode == "bus":
-                    new_usedBus = True
-                    base_c = eData["ucret"]
-                    # Transfer ücretinde indirim uygulanmayacak; eğer transfer_pending varsa, sadece 
-                    # ödeme türü kredi ise değişiklik yok, aksi halde ekstra indirim uygulanmaz.
-                    if transfer_pending and payment_type == "kentkart":
-                        final_c = base_c  # ekstra indirim iptal!
-                        explanation = "Otobüs (Transfer: ek indirim uygulanmaz)"
-                    else:
-                        final_c = base_c
-                        if special_day:
-                            final_c = 0
-                            explanation = "Özel gün => ücretsiz (Bus)"
-                        elif payment_type == "kredi":
-                            explanation = "Kredi => indirim yok"
-                        else:
-                            disc = 0.0
-                            if passenger_type == "ogrenci":
-                                disc = 0.5
-                                explanation = "Otobüs (Öğrenci)"
-                            elif passenger_type == "65+":
-                                disc = 0.3
-                                explanation = "Otobüs (Yaşlı)"
-                            final_c = base_c * (1 - disc)
-                    new_transfer_pending = False
-                elif edgeMode == "tram":
-                    new_usedTram = True
-                    base_c = eData["ucret"]
-                    if transfer_pending and payment_type == "kentkart":
-                        final_c = base_c  # ekstra indirim iptal!
-                        explanation = "Tramvay (Transfer: ek indirim uygulanmaz)"
+            if edgeMode == "transfer":
+                # Transfer ücretinde hiçbir indirim uygulanmayacak.
+                to, _, base_c = ov.transfer(net, cur)
+                steps.append({
+                    "from": net.ids[cur],
+                    "to": net.ids[to],
+                    "mode": "transfer",
+                    "time": 0,
+                    "distance": 0,
+                    "base_cost": round(base_c, 2),
+                    "final_cost": round(base_c, 2),
+                    "discount_explanation": f"Transfer => {base_c} TL",
+                    "color": MODE_COLORS["transfer"]
+                })
+                continue
+            base_c = net.edge_fare[k]
+            if transfer_pending and payment_type == "kentkart":
+                final_c = base_c  # ekstra indirim iptal!
+                explanation = f"{MODE_LABELS[edgeMode][0]} (Transfer: ek indirim uygulanmaz)"
+            else:
+                final_c, explanation = self.leg_fare(edgeMode, base_c,
+                                                     passenger_type, payment_type, special_day)
+            steps.append(self._edge_step(edgeMode, cur, k, final_c, explanation, ov))
+        return steps
+
+    #----------------------------------------------------------------------
+    # Tek kaynaktan çok hedefe arama (isochrone, matris)
+    # Etiketler (durak, durum) çiftleridir; durum 0: yürüyerek/başlangıçta,
+    # 1: otobüs/tramvayla gelindi (transfer yapılabilir), 2: transferle gelindi
+    # (KentKart ile sonraki binişte ek indirim uygulanmaz). Süre öncelikli,
+    # eşitlikte ücret küçük olan tercih edilir.
+    #----------------------------------------------------------------------
+    def walk_access(self, lat, lon, max_minutes):
+        """Noktadan yürüyerek max_minutes içinde ulaşılan otobüs/tramvay durakları: {indeks: dakika}."""
+        net = self.network
+        access = {}
+        for i in self._scan_order(lat, lon, "transit", 0, max_minutes * AVERAGE_WALK_SPEED):
+            if net.types[i] == OTHER_TYPE:
+                continue
+            t = self._distance(lat, lon, net.lat[i], net.lon[i]) / AVERAGE_WALK_SPEED
+            if t <= max_minutes:
+                access[i] = t
+        if self.roads is not None:
+            # Kuş uçuşu süre yol süresinin alt sınırıdır; adaylar yol ağında süzülür.
+            legs = self._legs_to_stops("walk", lat, lon, {i: t * AVERAGE_WALK_SPEED for i, t in access.items()},
+                                       max_minutes=max_minutes)
+            access = {i: leg[1] for i, leg in legs.items()}
+        return access
+
+    def one_to_many(self, sources, passenger_type, payment_type, special_day, max_minutes=math.inf):
+        """
+        sources: {durak indeksi: başlangıç dakikası}. Her ulaşılan durak için
+        {indeks: (dakika, ücret)} döndürür; max_minutes'ı aşan etiketler açılmaz.
+        Nakit ile otobüs/tramvay kullanılamadığından o durumda sadece kaynaklar döner.
+        """
+        import heapq
+        net = self.network
+        ov = self.overlay
+        best = {}
+        heap = [(t, 0.0, i, 0) for i, t in sources.items() if t <= max_minutes]
+        heapq.heapify(heap)
+        settled = set()
+        expanded = 0
+        while heap:
+            t, fare, cur, kind = heapq.heappop(heap)
+            if (cur, kind) in settled:
+                continue
+            settled.add((cur, kind))
+            expanded += 1
+            if cur not in best or (t, fare) < best[cur]:
+                best[cur] = (t, fare)
+            if payment_type == "nakit":
+                continue
+            code = net.types[cur]
+            if code != OTHER_TYPE:
+                mode = TYPE_NAMES[code]
+                for k in net.edges(cur):
+                    if k in ov.closed:
+                        continue
+                    nt = t + ov.edge_time(net, k)
+                    nxt = net.edge_to[k]
+                    if nt > max_minutes or (nxt, 1) in settled:
+                        continue
+                    if kind == 2 and payment_type == "kentkart":
+                        cost = net.edge_fare[k]
                     else:
-                        final_c = base_c
-                        if special_day:
-                            final_c = 0
-                            explanation = "Özel gün => ücretsiz (Tram)"
-                        elif payment_type == "kredi":
-                            explanation = "Kredi => indirim yok"
-                        else:
-                            disc = 0.0
-                            if passenger_type == "ogrenci":
-                                disc = 0.5
-                                explanation = "Tramvay (Öğrenci)"
-                            elif passenger_type == "65+":
-                                disc = 0.3
-                                explanation = "Tramvay (Yaşlı)"
-                            final_c = base_c * (1 - disc)
-                    new_transfer_pending = False
-                elif edgeMode == "transfer":
-                    # Transfer ücretinde hiçbir indirim uygulanmayacak.
-                    base_c = eData.get("transferUcret", 0)
-                    final_c = base_c
-                    explanation = f"Transfer => {base_c} TL"
-                    new_transfer_pending = True  # Sonraki boarding adımında bildirilsin.
-                new_edge = {
-                    "from": cur,
-                    "to": nxtId,
-                    "mode": edgeMode,
-                    "time": eData.get("sure", 0),
-                    "distance": eData.get("mesafe", 0),
-                    "base_cost": round(eData.get("ucret", base_c), 2) if edgeMode != "transfer" else round(eData.get("transferUcret", base_c), 2),
-                    "final_cost": round(final_c, 2),
-                    "discount_explanation": explanation,
-                    "color": MODE_COLORS.get(edgeMode, "purple" if edgeMode=="transfer" else "black")
-                }
-                new_state = (nxtId, edgeMode, new_usedBus, new_usedTram, new_transfer_pending)
-                new_path = pathEdges + [new_edge]
-                if new_state not in visited:
-                    visited[new_state] = new_path
-                    queue.append(new_state)
-        return None
+                        cost = self.leg_fare(mode, net.edge_fare[k], passenger_type, payment_type, special_day)[0]
+                    heapq.heappush(heap, (nt, fare + cost, nxt, 1))
+            if kind != 1:
+                continue
+            # Transfer ve yürüme aktarmaları (ücretsiz)
+            moves = [(net.walk_to[w], net.walk_time[w], 0.0) for w in net.walks(cur)]
+            tr = ov.transfer(net, cur)
+            if tr is not None:
+                moves.append(tr)
+            for nxt, tr_time, tr_fare in moves:
+                nt = t + tr_time
+                if nt <= max_minutes and (nxt, 2) not in settled:
+                    heapq.heappush(heap, (nt, fare + tr_fare, nxt, 2))
+        self._record_expansions("one_to_many", expanded)
+        return best
+
+    def isochrone(self, lat, lon, max_minutes, passenger_type="genel", payment_type="nakit",
+                  special_day=False, start_time=None):
+        """
+        Noktadan max_minutes içinde ulaşılabilen duraklar. Erişim yürüyerek
+        (AVERAGE_WALK_SPEED), sonra tek bir çok hedefli arama yapılır.
+        Her durak için kalan süreyle yürünebilecek yarıçap da döner.
+        """
+        net = self.network
+        reached = self.one_to_many(self.walk_access(lat, lon, max_minutes),
+                                   passenger_type, payment_type, special_day, max_minutes)
+        stops = []
+        for i, (t, fare) in sorted(reached.items(), key=lambda kv: kv[1]):
+            item = {
+                "id": net.ids[i],
+                "name": net.names[i],
+                "lat": float(net.lat[i]),
+                "lon": float(net.lon[i]),
+                "time": round(t, 1),
+                "cost": round(fare, 2),
+                "walk_radius_km": round((max_minutes - t) * AVERAGE_WALK_SPEED, 3)
+            }
+            if start_time:
+                item["arrival_time"] = (start_time + timedelta(minutes=t)).strftime("%d.%m.%Y %H:%M")
+            stops.append(item)
+        return stops
+
+    #----------------------------------------------------------------------
+    # Statik graf üzerinde noktadan noktaya en kısa yol (süre ya da ücret).
+    # Mod kısıtı ve indirim yoktur; CH kuruluysa iki yönlü yukarı arama,
+    # değilse düz Dijkstra kullanılır.
+    #----------------------------------------------------------------------
+    def fastest_path(self, start_id, end_id, metric="time"):
+        """(değer, [durak kimlikleri]) ya da yol yoksa None."""
+        net = self.network
+        s = net.index.get(start_id)
+        t = net.index.get(end_id)
+        if s is None or t is None:
+            return None
+        hierarchy = self._hierarchy(metric)
+        if hierarchy is not None:
+            value, path = hierarchy.query(s, t)
+        else:
+            value, path = self._static_dijkstra(s, t, metric)
+        if path is None:
+            return None
+        return value, [net.ids[i] for i in path]
+
+    def _static_dijkstra(self, s, t, metric):
+        import heapq
+        net = self.network
+        ov = self.overlay
+        dist = {s: 0.0}
+        parent = {s: None}
+        heap = [(0.0, s)]
+        expanded = 0
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            expanded += 1
+            if v == t:
+                break
+            nbrs = [(net.edge_to[k], ov.edge_time(net, k) if metric == "time" else net.edge_fare[k])
+                    for k in net.edges(v) if k not in ov.closed]
+            tr = ov.transfer(net, v)
+            if tr is not None:
+                nbrs.append((tr[0], tr[1] if metric == "time" else tr[2]))
+            nbrs += [(net.walk_to[w], net.walk_time[w] if metric == "time" else 0.0) for w in net.walks(v)]
+            for x, w in nbrs:
+                nd = d + w
+                if nd < dist.get(x, math.inf):
+                    dist[x] = nd
+                    parent[x] = v
+                    heapq.heappush(heap, (nd, x))
+        self._record_expansions("static_dijkstra", expanded)
+        if t not in dist:
+            return math.inf, None
+        path = []
+        v = t
+        while v is not None:
+            path.append(v)
+            v = parent[v]
+        path.reverse()
+        return dist[t], path
 
     #----------------------------------------------------------------------
     # get_alternative_routes: Tüm senaryoları hesaplar ve en uygun rotayı seçer.
     #----------------------------------------------------------------------
     def get_alternative_routes(self, start_lat, start_lon, end_lat, end_lon,
                                passenger_type="genel", payment_type="nakit",
-                               start_time=None, special_day=False):
+                               start_time=None, special_day=False, k=1, budget=None):
+        """
+        Tüm senaryolar ve en uygunu ("rotaniz"). k > 1 ise toplu taşıma
+        senaryolarının rotaları "alternatives" altında en fazla k - 1 alternatif taşır.
+        budget verilirse ödenebilen en hızlı rota da "butceye_uygun" altında döner.
+        """
         r_sadece_taksi = self.plan_sadece_taksi(start_lat, start_lon, end_lat, end_lon,
-                                                 passenger_type, payment_type, special_day, start_time)
+                                                 passenger_type, payment_type, special_day, start_time, k)
         r_sadece_otobus = self.plan_sadece_otobus(start_lat, start_lon, end_lat, end_lon,
-                                                   passenger_type, payment_type, special_day, start_time)
+                                                   passenger_type, payment_type, special_day, start_time, k)
         r_sadece_tramvay = self.plan_sadece_tramvay(start_lat, start_lon, end_lat, end_lon,
-                                                    passenger_type, payment_type, special_day, start_time)
+                                                    passenger_type, payment_type, special_day, start_time, k)
         r_otobus_tramvay = self.plan_otobus_tramvay(start_lat, start_lon, end_lat, end_lon,
-                                                    passenger_type, payment_type, special_day, start_time)
+                                                    passenger_type, payment_type, special_day, start_time, k)
         r_taksi_otobus_tramvay = self.plan_taksi_otobus_tramvay(start_lat, start_lon, end_lat, end_lon,
-                                                               passenger_type, payment_type, special_day, start_time)
+                                                               passenger_type, payment_type, special_day, start_time, k)
         def pick_best(routes_list):
             best = None
             for rr in routes_list:
@@ -694,4 +1408,55 @@ class RoutePlanner:
             "otobus_tramvay": r_otobus_tramvay,
             "taksi_otobus_tramvay": r_taksi_otobus_tramvay
         }
+        if budget is not None:
+            routes[BUDGET_SCENARIO] = self.plan_butceye_uygun(start_lat, start_lon, end_lat, end_lon,
+                                                              passenger_type, payment_type, special_day,
+                                                              start_time, k, budget)
         return routes
+
+    #----------------------------------------------------------------------
+    # Kalkış aralığı (profil) sorgusu: [window_start, window_end] arasındaki
+    # her kalkış için en iyi seçenekler.
+    #----------------------------------------------------------------------
+    def profile(self, start_lat, start_lon, end_lat, end_lon, window_start, window_end,
+                passenger_type="genel", payment_type="nakit", special_day=False, k=1):
+        """
+        Ağda sefer saati yoktur; kenar süreleri kalkış anından bağımsızdır. Bu
+        yüzden aralıktaki bütün kalkışlar aynı yolculukları paylaşır ve senaryo
+        aramaları aralık için bir kez yapılır; kalkış başına planlama yapılmaz.
+        Her seçenek için varış = kalkış + süre olur ve (kalkış, varış) çiftleri
+        aralık boyunca tek bir doğru parçasıdır; profil bu parçaların uçlarıyla
+        verilir.
+
+        Seçenekler senaryo rotaları ve (k > 1 ise) alternatifleridir; süre ve
+        ücrette Pareto-optimal olanlar (daha hızlı ve daha ucuzu olmayanlar)
+        süreye göre sıralanır. Her kalkış için en erken varış ilk seçenektir.
+        """
+        routes = self.get_alternative_routes(start_lat, start_lon, end_lat, end_lon, passenger_type,
+                                             payment_type, None, special_day, k)
+        candidates = []
+        for name in SCENARIOS:
+            route = routes.get(name)
+            if route:
+                candidates.append((name, route))
+                candidates.extend((name, alt) for alt in route.get("alternatives", []))
+        candidates.sort(key=lambda c: (c[1]["total_time"], c[1]["total_cost"]))
+
+        fmt = "%d.%m.%Y %H:%M"
+        options = []
+        cheapest = math.inf
+        for name, route in candidates:
+            if route["total_cost"] >= cheapest:
+                continue  # daha hızlı bir seçenek en az bu kadar ucuz
+            cheapest = route["total_cost"]
+            duration = timedelta(minutes=route["total_time"])
+            options.append({
+                "scenario": name,
+                "total_time": route["total_time"],
+                "total_distance": route["total_distance"],
+                "total_cost": route["total_cost"],
+                "steps": [[s["from"], s["to"], s["mode"]] for s in route["steps"]],
+                "departure": [window_start.strftime(fmt), window_end.strftime(fmt)],
+                "arrival": [(window_start + duration).strftime(fmt), (window_end + duration).strftime(fmt)]
+            })
+        return options
@@ -1,14 +1,37 @@
 # models/stop.py
+import sys
+from collections import namedtuple
+
+# Kenar ve transfer kayıtları düz tuple'lardır (örnek başına __dict__ yok).
+Edge = namedtuple("Edge", ["stopId", "mesafe", "sure", "ucret"])
+Transfer = namedtuple("Transfer", ["transferStopId", "transferSure", "transferUcret"])
+
+
 class Stop:
+    """
+    Tek bir durak. Kimlik ve tip dizgileri intern edilir; böylece aynı
+    kimliği taşıyan tüm kenarlar tek bir string nesnesini paylaşır. Durak
+    adı yalnızca gösterim için gerektiğinden burada tutulmaz (bkz.
+    CompiledNetwork.names).
+    """
+    __slots__ = ("id", "type", "lat", "lon", "sonDurak", "edges", "transfer")
+
     def __init__(self, stop_data):
-        self.id = stop_data["id"]
-        self.name = stop_data["name"]
-        self.type = stop_data["type"]
+        self.id = sys.intern(stop_data["id"])
+        self.type = sys.intern(stop_data["type"])
         self.lat = stop_data["lat"]
         self.lon = stop_data["lon"]
-        self.sonDurak = stop_data["sonDurak"]
-        self.nextStops = stop_data.get("nextStops", [])
-        self.transfer = stop_data.get("transfer", None)
+        self.sonDurak = bool(stop_data["sonDurak"])
+        self.edges = tuple(Edge(sys.intern(e["stopId"]), e["mesafe"], e["sure"], e["ucret"])
+                           for e in stop_data.get("nextStops", []))
+        tr = stop_data.get("transfer")
+        self.transfer = Transfer(sys.intern(tr["transferStopId"]), tr.get("transferSure", 0),
+                                 tr.get("transferUcret", 0)) if tr else None
+
+    @property
+    def nextStops(self):
+        # Eski sözlük biçimi; yalnızca geriye dönük uyumluluk için üretilir.
+        return [e._asdict() for e in self.edges]
 
     def __repr__(self):
-        return f"<Stop {self.id}: {self.name}>"
+        return f"<Stop {self.id}>"
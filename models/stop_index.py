@@ -0,0 +1,108 @@
+# models/stop_index.py
+"""
+Durak adı arama (otomatik tamamlama) için sıralı önek indeksi.
+
+Yüklemede her durak adının her kelimesiyle başlayan soneki ("yahya kaptan
+bus", "kaptan bus", ...) ve durak kimliği normalize edilip tek bir sıralı
+listeye konur. Bir önekle başlayan anahtarlar bu listede bitişik bir aralıktır
+ve iki ikili aramayla bulunur; ad taranmaz.
+
+Normalizasyon Türkçe büyük/küçük harf kurallarına uyar (I -> ı, İ -> i) ve
+aksanları atar (ı/ş/ğ/ç/ö/ü -> i/s/g/c/o/u), böylece "İZMİT", "izmit" ve
+"Izmit" aynı anahtara düşer. Harf ve rakam dışındaki her şey boşluk sayılır.
+
+Kısa önekler ("o", "ot") binlerce anahtarı kapsayabilir. Aralığı SCAN_LIMIT'ten
+büyük olan her önek için en iyi MAX_RESULTS sonuç yüklemede hesaplanır. Böylece
+bir sorgu en fazla SCAN_LIMIT anahtar tarar.
+"""
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+
+MAX_RESULTS = 20
+SCAN_LIMIT = 64
+
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_ASCII_FOLD = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ç": "c", "ö": "o", "ü": "u"})
+_SEPARATORS = re.compile(r"[\W_]+")
+# Normalize anahtarlardaki her karakterden büyük; önek aralığının üst sınırı için.
+_HIGH = "\uffff"
+
+
+def normalize(text):
+    """Türkçe duyarlı küçük harf + aksansız + tek boşluklu biçim."""
+    text = text.translate(_TURKISH_UPPER).lower().translate(_ASCII_FOLD)
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+class StopIndex:
+    """CompiledNetwork'ün durak adları ve kimlikleri üzerinde önek araması."""
+
+    def __init__(self, network):
+        self.network = network
+        entries = []  # (anahtar, sıralama, durak indeksi)
+        for i, (sid, name) in enumerate(zip(network.ids, network.names)):
+            norm = normalize(name)
+            # Adın başından eşleşme, kelime ortasından eşleşmeden, o da kimlikten önce gelir;
+            # sonra kısa ad önce.
+            entries.append((norm, (0, len(norm), norm, i), i))
+            for m in re.finditer(" ", norm):
+                entries.append((norm[m.end():], (1, len(norm), norm, i), i))
+            entries.append((normalize(sid), (2, len(norm), norm, i), i))
+        entries.sort()
+        self.keys = [e[0] for e in entries]
+        self.ranks = [e[1] for e in entries]
+        self.stops = [e[2] for e in entries]
+        self.top = self._build_top()
+
+    def _best(self, lo, hi, limit):
+        # Aralıktaki anahtarlardan durak başına en iyi sıralama; ilk limit durak.
+        best = {}
+        for j in range(lo, hi):
+            i = self.stops[j]
+            if i not in best or self.ranks[j] < best[i]:
+                best[i] = self.ranks[j]
+        return [rank[3] for rank in heapq.nsmallest(limit, best.values())]
+
+    def _build_top(self):
+        keys = self.keys
+        top = {}
+        stack = [("", 0, len(keys))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if hi - lo <= SCAN_LIMIT:
+                continue
+            if prefix:
+                top[prefix] = self._best(lo, hi, MAX_RESULTS)
+            # Aralığı bir sonraki karaktere göre alt aralıklara böl.
+            depth = len(prefix)
+            j = lo
+            while j < hi and len(keys[j]) == depth:
+                j += 1
+            while j < hi:
+                child = prefix + keys[j][depth]
+                end = bisect_left(keys, child + _HIGH, j, hi)
+                stack.append((child, j, end))
+                j = end
+        return top
+
+    def search(self, query, limit=10):
+        """query ile başlayan en iyi limit durağın indeksleri."""
+        q = normalize(query)
+        if not q:
+            return []
+        limit = max(1, min(limit, MAX_RESULTS))
+        if q in self.top:
+            return self.top[q][:limit]
+        lo = bisect_left(self.keys, q)
+        hi = bisect_left(self.keys, q + _HIGH, lo)
+        return self._best(lo, hi, limit)
+
+    def search_stops(self, query, limit=10):
+        """search sonucunu API'de döndürülecek sözlükler olarak verir."""
+        net = self.network
+        return [{"id": net.ids[i], "name": net.names[i], "type": net.type_name(i),
+                 "lat": float(net.lat[i]), "lon": float(net.lon[i])}
+                for i in self.search(query, limit)]
@@ -7,21 +7,76 @@ document.addEventListener("DOMContentLoaded", () => {
 
   let startMarker = null;
   let destMarker = null;
-  map.on("click", (e) => {
+
+  // Önce başlangıç, sonra varış noktası atanır (haritadan ya da durak aramasından).
+  function setPoint(latlng) {
     if (!startMarker) {
-      startMarker = L.marker(e.latlng, { draggable: true })
+      startMarker = L.marker(latlng, { draggable: true })
         .addTo(map)
         .bindPopup("Başlangıç Noktası")
         .openPopup();
-      document.getElementById("start_lat").value = e.latlng.lat;
-      document.getElementById("start_lon").value = e.latlng.lng;
+      document.getElementById("start_lat").value = latlng.lat;
+      document.getElementById("start_lon").value = latlng.lng;
     } else if (!destMarker) {
-      destMarker = L.marker(e.latlng, { draggable: true })
+      destMarker = L.marker(latlng, { draggable: true })
         .addTo(map)
         .bindPopup("Varış Noktası")
         .openPopup();
-      document.getElementById("dest_lat").value = e.latlng.lat;
-      document.getElementById("dest_lon").value = e.latlng.lng;
+      document.getElementById("dest_lat").value = latlng.lat;
+      document.getElementById("dest_lon").value = latlng.lng;
+    }
+  }
+
+  map.on("click", (e) => setPoint(e.latlng));
+
+  // Çok şehirli kurulumda şehir seçimi haritayı o şehre taşır.
+  const citySelect = document.getElementById("city");
+  if (citySelect) {
+    const centerOnCity = () => {
+      const option = citySelect.options[citySelect.selectedIndex];
+      map.setView(JSON.parse(option.dataset.center), 13);
+    };
+    citySelect.addEventListener("change", centerOnCity);
+    centerOnCity();
+  }
+
+  // Durak arama: /api/stops/search önek indeksinden sonuç getirir.
+  const searchInput = document.getElementById("stop_search");
+  const resultList = document.getElementById("stop_search_results");
+  if (!searchInput) {
+    return;
+  }
+  let lastQuery = "";
+  searchInput.addEventListener("input", async () => {
+    const q = searchInput.value.trim();
+    lastQuery = q;
+    if (!q) {
+      resultList.innerHTML = "";
+      return;
+    }
+    let url = `/api/stops/search?q=${encodeURIComponent(q)}&limit=8`;
+    if (citySelect) {
+      url += `&city=${encodeURIComponent(citySelect.value)}`;
+    }
+    const response = await fetch(url);
+    const data = await response.json();
+    if (q !== lastQuery) {
+      return;  // daha yeni bir sorgu var
     }
+    resultList.innerHTML = "";
+    (data.stops || []).forEach((stop) => {
+      const item = document.createElement("button");
+      item.type = "button";
+      item.className = "list-group-item list-group-item-action";
+      item.textContent = stop.name;
+      item.addEventListener("click", () => {
+        const latlng = L.latLng(stop.lat, stop.lon);
+        setPoint(latlng);
+        map.panTo(latlng);
+        searchInput.value = "";
+        resultList.innerHTML = "";
+      });
+      resultList.appendChild(item);
+    });
   });
 });
@@ -0,0 +1,32 @@
+# tests/test_regression.py
+"""
+Regresyon kapısı (bkz. utils/regression.py). Sonuçlar golden.json'dan ya
+da bellek baseline.json'dan toleransı aşacak kadar saparsa başarısız olur.
+Süre makineye bağlı olduğundan yalnızca istenirse karşılaştırılır.
+
+    python -m unittest discover tests
+    REGRESSION_TIMING=1 python -m unittest discover tests   # baseline'ın alındığı makinede
+"""
+import os
+import unittest
+
+from utils.regression import check_outputs, check_perf, load_planner, DEFAULT_DATA
+
+
+class RegressionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.planner = load_planner(DEFAULT_DATA)
+
+    def test_golden_outputs(self):
+        failures = check_outputs(planner=self.planner)
+        self.assertEqual(failures, [], "\n".join(failures[:20]))
+
+    def test_performance_baseline(self):
+        timing = os.environ.get("REGRESSION_TIMING", "0") == "1"
+        failures, perf = check_perf(planner=self.planner, timing=timing)
+        self.assertEqual(failures, [], f"{perf}: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    unittest.main()
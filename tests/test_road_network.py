@@ -0,0 +1,75 @@
+# tests/test_road_network.py
+"""
+RoadNetwork.build ve snap'i elle kurulmuş küçük bir OSM kesitinde denetler:
+3x3 ızgara, üst satır tek yönlü, orta satır yalnızca yaya yolu.
+
+    python -m unittest tests.test_road_network
+"""
+import unittest
+
+from models.road_network import SNAP_MAX_KM, RoadNetwork
+from utils.distance import haversine
+
+LAT0, LON0, STEP = 40.75, 29.90, 0.002
+
+
+def node_id(r, c):
+    return r * 3 + c + 1
+
+
+def grid_fixture():
+    """read_osm_xml çıktısı biçiminde (coords, ways)."""
+    coords = {node_id(r, c): (LAT0 + r * STEP, LON0 + c * STEP) for r in range(3) for c in range(3)}
+    row_tags = [{"highway": "residential", "oneway": "yes"},
+                {"highway": "footway"},
+                {"highway": "residential"}]
+    ways = [([node_id(r, c) for c in range(3)], tags) for r, tags in enumerate(row_tags)]
+    ways += [([node_id(r, c) for r in range(3)], {"highway": "residential"}) for c in range(3)]
+    return coords, ways
+
+
+class RoadNetworkTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.coords, ways = grid_fixture()
+        cls.roads = RoadNetwork.build(cls.coords, ways)
+
+    def point(self, r, c):
+        return self.coords[node_id(r, c)]
+
+    def test_build(self):
+        # Her ızgara noktası kavşaktır; yaya grafı araç grafından fazla kenar taşır.
+        self.assertEqual(len(self.roads), 9)
+        car, foot = self.roads.graphs["car"], self.roads.graphs["foot"]
+        self.assertGreater(len(foot.to), len(car.to))
+
+    def test_oneway(self):
+        row_km = haversine(*self.point(0, 0), *self.point(0, 2))
+        east = self.roads.route("car", *self.point(0, 0), *self.point(0, 2))
+        west = self.roads.route("car", *self.point(0, 2), *self.point(0, 0))
+        self.assertAlmostEqual(east[0], row_km, places=3)
+        # Batıya araçla alt satırdan dolaşılır; yaya doğrudan yürür.
+        self.assertGreater(west[0], 3 * row_km)
+        foot = self.roads.route("foot", *self.point(0, 2), *self.point(0, 0))
+        self.assertAlmostEqual(foot[0], row_km, places=3)
+
+    def test_footway(self):
+        row_km = haversine(*self.point(1, 0), *self.point(1, 2))
+        foot = self.roads.route("foot", *self.point(1, 0), *self.point(1, 2))
+        car = self.roads.route("car", *self.point(1, 0), *self.point(1, 2))
+        self.assertAlmostEqual(foot[0], row_km, places=3)
+        self.assertGreater(car[0], row_km)
+
+    def test_snap(self):
+        lat, lon = self.point(1, 1)
+        node, km = self.roads.snap("foot", lat + 0.0003, lon)
+        self.assertEqual((self.roads.lat[node], self.roads.lon[node]), (lat, lon))
+        self.assertAlmostEqual(km, haversine(lat + 0.0003, lon, lat, lon), places=9)
+        self.assertLess(km, SNAP_MAX_KM)
+        # SNAP_MAX_KM'den uzak nokta eşlenmez.
+        self.assertIsNone(self.roads.snap("car", lat + 0.05, lon))
+        self.assertIsNone(self.roads.route("car", lat + 0.05, lon, *self.point(0, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# tests/test_search.py
+"""
+Arama hızlandırmalarının düz aramayla aynı sonucu verdiğini ve katman ile
+bütçe kısıtlarının rotalara yansıdığını data/stops.json üzerinde denetler.
+
+    python -m unittest tests.test_search
+"""
+import itertools
+import unittest
+
+from models.overlay import NetworkOverlay
+from models.route_planner import BUDGET_SCENARIO
+from utils.regression import load_planner, DEFAULT_DATA
+
+# (mustUseBus, mustUseTram, mustUseBusOrTram)
+STATEFUL_FLAGS = [(False, False, False), (True, False, False), (False, True, False),
+                  (True, True, False), (False, False, True)]
+FARE = ("genel", "kentkart", False)
+
+
+def hops(steps):
+    return None if steps is None else [(s["from"], s["to"]) for s in steps]
+
+
+class ContractionTest(unittest.TestCase):
+    def test_matches_dijkstra(self):
+        planner = load_planner(DEFAULT_DATA)
+        ids = planner.network.ids
+        pairs = list(itertools.product(ids, ids, ("time", "cost")))
+        plain = {key: planner.fastest_path(*key) for key in pairs}
+        planner.enable_contraction()
+        self.assertIsNotNone(planner._hierarchy("time"))
+        for key in pairs:
+            expected, found = plain[key], planner.fastest_path(*key)
+            if expected is None:
+                self.assertIsNone(found, key)
+            else:
+                self.assertIsNotNone(found, key)
+                self.assertAlmostEqual(found[0], expected[0], places=9, msg=key)
+                self.assertEqual((found[1][0], found[1][-1]), (key[0], key[1]))
+
+
+class BidirectionalTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.planner = load_planner(DEFAULT_DATA)
+
+    def tearDown(self):
+        self.planner.bidirectional = False
+
+    def both(self, search, *args):
+        self.planner.bidirectional = False
+        forward = search(*args)
+        self.planner.bidirectional = True
+        return forward, search(*args)
+
+    def assertSameLength(self, forward, both_ways, start, end):
+        self.assertEqual(forward is None, both_ways is None, (start, end))
+        if both_ways:
+            self.assertEqual(len(both_ways), len(forward), (start, end))
+            self.assertEqual(both_ways[0]["from"], start)
+            self.assertEqual(both_ways[-1]["to"], end)
+            for a, b in zip(both_ways, both_ways[1:]):
+                self.assertEqual(a["to"], b["from"])
+
+    def test_single_mode(self):
+        ids = self.planner.network.ids
+        for start, end in itertools.product(ids, ids):
+            for mode in ("bus", "tram"):
+                forward, both_ways = self.both(self.planner._single_mode_bfs, mode, start, end, *FARE)
+                self.assertSameLength(forward, both_ways, start, end)
+
+    def test_stateful(self):
+        ids = self.planner.network.ids
+        for start, end in itertools.product(ids, ids):
+            for flags in STATEFUL_FLAGS:
+                forward, both_ways = self.both(self.planner.stateful_bfs_bus_tram_transfer,
+                                               start, end, *FARE, *flags)
+                self.assertSameLength(forward, both_ways, start, end)
+
+
+class OverlayTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.planner = load_planner(DEFAULT_DATA)
+
+    def tearDown(self):
+        self.planner.set_overlay(NetworkOverlay(self.planner.network))
+
+    def test_closure_removes_route(self):
+        closed = ("bus_otogar", "bus_sekapark")
+        self.assertIn(closed, hops(self.planner.bus_bfs("bus_otogar", "bus_41burda", *FARE)))
+
+        overlay = NetworkOverlay(self.planner.network, {"closures": [{"from": closed[0], "to": closed[1]}]})
+        self.assertEqual(self.planner.set_overlay(overlay), set(closed))
+        self.assertIsNone(self.planner.bus_bfs("bus_otogar", "bus_41burda", *FARE))
+        _, path = self.planner.fastest_path("bus_otogar", "bus_41burda")
+        self.assertNotIn(closed, list(zip(path, path[1:])))
+
+        self.planner.set_overlay(NetworkOverlay(self.planner.network))
+        self.assertIn(closed, hops(self.planner.bus_bfs("bus_otogar", "bus_41burda", *FARE)))
+
+
+class BudgetTest(unittest.TestCase):
+    POINTS = [(40.78259, 29.94628), (40.7652, 29.9619), (40.82103, 29.91843), (40.7635, 29.9387)]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.planner = load_planner(DEFAULT_DATA)
+
+    def test_fare_cap(self):
+        found = 0
+        for (a, b), payment_type in itertools.product(itertools.permutations(self.POINTS, 2),
+                                                      ("nakit", "kredi", "kentkart")):
+            for budget in (0, 5, 15, 30, 1000):
+                routes = self.planner.get_alternative_routes(a[0], a[1], b[0], b[1], "genel", payment_type,
+                                                             budget=budget)
+                route = routes[BUDGET_SCENARIO]
+                if route is None:
+                    continue
+                found += 1
+                self.assertLessEqual(route["total_cost"], budget + 1e-9, (a, b, payment_type, budget))
+        self.assertGreater(found, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+# utils/batch_plan.py
+"""
+Çevrimdışı toplu planlama: CSV yolculuk dosyası -> NDJSON ya da CSV sonuç.
+
+Girdi sütunları /plan formuyla aynıdır (bkz. app.parse_plan_form):
+    id, start_lat, start_lon, dest_lat, dest_lon, start_time,
+    passenger_type, payment_type, special_day, k
+id yoksa satır numarası kullanılır; dest_lat/dest_lon yerine end_lat/end_lon
+de yazılabilir. special_day için 1/true/on kabul edilir.
+
+Satırlar chunk_size'lık parçalar halinde süreç havuzuna dağıtılır. Her worker
+ağı initializer'da bir kez yükler (bkz. utils/plan_pool.py) ve parçadaki her
+satır için get_alternative_routes çalıştırır. Biten parçalar hemen çıktıya
+eklenip diske yazılır; aynı anda en fazla 2 x workers parça bekletilir, girdi
+belleğe alınmaz. Hatalı satırlar işi durdurmaz, çıktıya "error" ile yazılır.
+
+Çıktı dosyası varsa kaldığı yerden devam edilir: içindeki id'ler atlanır,
+yarım kalmış son satır silinir. Sıfırdan başlamak için --overwrite.
+
+    python -m utils.batch_plan trips.csv sonuc.ndjson --workers 8
+    python -m utils.batch_plan trips.csv sonuc.csv --chunk-size 1000
+
+Ağ, paylaşımlı bellek, aksaklık katmanı ve arama ayarları config.Config'ten
+(ortam değişkenlerinden) okunur. CITIES_DIR ayarlıysa (ve --data verilmezse)
+her satırın şehri /plan'daki gibi seçilir: city sütunu ya da başlangıç noktası.
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app import CITY_SETTINGS, PLANNER_SETTINGS, city_area, parse_plan_form, pick_best_route, resolve_city
+from config import Config
+from models.route_planner import SCENARIOS
+from utils.city_registry import UnknownCity
+from utils.plan_pool import get_worker_planner, get_worker_registry, init_worker
+
+DEFAULT_CHUNK_SIZE = 500
+ROUTE_NAMES = ("rotaniz",) + SCENARIOS
+TRUE_VALUES = ("1", "true", "on", "evet")
+
+
+def _form(row):
+    form = {k: v for k, v in row.items() if k is not None and v not in (None, "")}
+    form.setdefault("dest_lat", form.get("end_lat"))
+    form.setdefault("dest_lon", form.get("end_lon"))
+    if str(form.get("special_day", "")).lower() in TRUE_VALUES:
+        form["special_day"] = "on"
+    return form
+
+
+def _summarize_route(route):
+    if not route:
+        return None
+    summary = {
+        "total_time": route["total_time"],
+        "total_distance": route["total_distance"],
+        "total_cost": route["total_cost"],
+        "steps": [[s["from"], s["to"], s["mode"]] for s in route["steps"]]
+    }
+    if route.get("alternatives"):
+        summary["alternatives"] = [_summarize_route(alt) for alt in route["alternatives"]]
+    return summary
+
+
+def plan_row(planner, trip_id, row, area=None):
+    """
+    Tek yolculuğun sonuç kaydı: {"id", "best", "routes"} ya da {"id", "error"}.
+    area: parse_plan_form'un bounds/area argümanları (çok şehirli modda şehrinki).
+    """
+    try:
+        params = parse_plan_form(_form(row), **(area or {}))
+    except ValueError as e:
+        return {"id": trip_id, "error": str(e)}
+    try:
+        routes = planner.get_alternative_routes(
+            params["start_lat"], params["start_lon"], params["end_lat"], params["end_lon"],
+            params["passenger_type"], params["payment_type"], params["start_time"],
+            params["special_day"], params["k"])
+    except Exception as e:  # tek satır yüzünden gecelik iş durmasın
+        return {"id": trip_id, "error": f"{type(e).__name__}: {e}"}
+    best, _ = pick_best_route({name: routes.get(name) for name in SCENARIOS})
+    return {"id": trip_id, "best": best,
+            "routes": {name: _summarize_route(routes.get(name)) for name in ROUTE_NAMES}}
+
+
+def plan_chunk(chunk):
+    """Worker tarafı: [(id, satır)] -> [sonuç kaydı]."""
+    registry, default_city = get_worker_registry()
+    if registry is None:
+        planner = get_worker_planner()
+        return [plan_row(planner, trip_id, row) for trip_id, row in chunk]
+    records = []
+    for trip_id, row in chunk:
+        city = resolve_city(registry, _form(row), default_city)
+        try:
+            area = city_area(registry, city)
+        except UnknownCity:
+            records.append({"id": trip_id, "error": f"Bilinmeyen şehir: {city}"})
+            continue
+        records.append(plan_row(get_worker_planner(city), trip_id, row, area))
+    return records
+
+
+#----------------------------------------------------------------------
+# Çıktı biçimleri
+#----------------------------------------------------------------------
+class NdjsonWriter:
+    """Satır başına bir JSON kaydı; rotalar adımlarıyla birlikte yazılır."""
+
+    def __init__(self, f):
+        self.f = f
+
+    @staticmethod
+    def read_ids(f):
+        return {str(json.loads(line)["id"]) for line in f if line.strip()}
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    """Yolculuk başına bir satır; her senaryonun yalnızca süre/mesafe/ücret toplamları."""
+    HEADER = ["id", "best", "error"] + [f"{name}_{field}" for name in ROUTE_NAMES
+                                        for field in ("time", "distance", "cost")]
+
+    def __init__(self, f):
+        self.f = f
+        self.writer = csv.writer(f)
+        if f.tell() == 0:
+            self.writer.writerow(self.HEADER)
+
+    @staticmethod
+    def read_ids(f):
+        reader = csv.reader(f)
+        next(reader, None)  # başlık
+        return {row[0] for row in reader if row}
+
+    def write(self, record):
+        routes = record.get("routes") or {}
+        row = [record["id"], record.get("best") or "", record.get("error", "")]
+        for name in ROUTE_NAMES:
+            route = routes.get(name)
+            row += ([route["total_time"], route["total_distance"], route["total_cost"]]
+                    if route else ["", "", ""])
+        self.writer.writerow(row)
+
+
+def _writer_class(path):
+    return CsvWriter if path.lower().endswith(".csv") else NdjsonWriter
+
+
+def _trim_partial_line(path):
+    # Kesilen bir çalışmanın yarım yazılmış son satırını atar.
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+
+def open_output(path, overwrite=False):
+    """(writer, dosya, tamamlanmış id kümesi); dosya varsa ekleme kipinde açılır."""
+    cls = _writer_class(path)
+    done = set()
+    if not overwrite and os.path.exists(path):
+        _trim_partial_line(path)
+        with open(path, encoding="utf-8", newline="") as f:
+            done = cls.read_ids(f)
+        f = open(path, "a", encoding="utf-8", newline="")
+    else:
+        f = open(path, "w", encoding="utf-8", newline="")
+    return cls(f), f, done
+
+
+def read_chunks(path, chunk_size, done=()):
+    """Tamamlanmamış satırları [(id, satır)] parçaları halinde akıtır."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = ((row.get("id") or str(n), row) for n, row in enumerate(csv.DictReader(f), 1))
+        pending = ((trip_id, row) for trip_id, row in rows if trip_id not in done)
+        while True:
+            chunk = list(itertools.islice(pending, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _map_chunks(chunks, workers, initargs):
+    """Parça sonuçlarını bittikleri sırayla üretir; en fazla 2 x workers parça bekler."""
+    if workers <= 1:
+        init_worker(*initargs)
+        for chunk in chunks:
+            yield plan_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_worker, initargs=initargs) as pool:
+        running = set()
+        for chunk in chunks:
+            running.add(pool.submit(plan_chunk, chunk))
+            if len(running) >= 2 * workers:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for job in finished:
+                    yield job.result()
+        for job in running:
+            yield job.result()
+
+
+def run_batch(trips_path, out_path, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, data_path=None,
+              overwrite=False, progress=sys.stderr):
+    """Yolculukları planlayıp out_path'e yazar; (yeni yazılan, hatalı, atlanan) sayıları."""
+    writer, f, done = open_output(out_path, overwrite)
+    # --data tek bir ağı seçer; verilmezse CITIES_DIR'deki şehirler kullanılır.
+    cities = ({key: getattr(Config, key) for key in CITY_SETTINGS}
+              if Config.CITIES_DIR and not data_path else None)
+    initargs = (data_path or Config.DATA_PATH, Config.SHARED_NETWORK, Config.OVERLAY_PATH,
+                {key: getattr(Config, key) for key in PLANNER_SETTINGS}, cities)
+    written = failed = 0
+    t0 = time.perf_counter()
+    try:
+        for records in _map_chunks(read_chunks(trips_path, chunk_size, done), workers, initargs):
+            for record in records:
+                writer.write(record)
+                failed += "error" in record
+            written += len(records)
+            f.flush()
+            if progress:
+                rate = written / max(time.perf_counter() - t0, 1e-9)
+                print(f"\r{written} yolculuk ({failed} hatalı, {len(done)} atlandı), "
+                      f"{rate:.0f} yolculuk/sn", end="", file=progress, flush=True)
+    finally:
+        f.close()
+        if progress:
+            print(file=progress)
+    return written, failed, len(done)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV yolculuk dosyası için toplu rota planlama")
+    parser.add_argument("trips", help="Girdi CSV (bkz. modül açıklaması)")
+    parser.add_argument("out", help="Çıktı dosyası: .csv ya da .ndjson")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--data", default=None, help="stops.json (varsayılan DATA_PATH ya da CITIES_DIR)")
+    parser.add_argument("--overwrite", action="store_true", help="var olan çıktıyı silip baştan başla")
+    args = parser.parse_args(argv)
+
+    run_batch(args.trips, args.out, args.workers, max(1, args.chunk_size), args.data, args.overwrite)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
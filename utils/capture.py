@@ -0,0 +1,346 @@
+# utils/capture.py
+"""
+Gerçek istek akışının kaydı ve tekrar oynatılması.
+
+RequestCapture, /plan ve /api/* isteklerinin parametrelerini ve sürelerini
+NDJSON satırları olarak kaydeder:
+
+    {"ts": 1735714800.123, "method": "POST", "path": "/plan", "args": {...},
+     "form": {...}, "json": null, "status": 200, "ms": 41.2}
+
+İstek yolu diske hiç dokunmaz: kayıt sınırlı bir kuyruğa bırakılır (kuyruk
+doluysa kayıt atılır ve sayılır) ve arka plandaki yazıcı thread kayıtları
+toplu halde, en fazla flush_seconds aralıkla yazar. Dosya max_bytes'ı
+geçince gzip ile sıkıştırılarak path.1.gz, path.2.gz, ... olarak döndürülür;
+en fazla backup_count eski dosya tutulur. Yazıcı thread ilk kayıtta başlar,
+böylece gunicorn --preload ile fork edilen her worker kendi thread'ini
+kurar. Birden çok worker için yolda {pid} kullanılabilir
+(ör. logs/capture-{pid}.ndjson).
+
+Tekrar oynatma (kayıtlar ts'ye göre birleştirilir, .gz dosyalar da okunur):
+
+    python -m utils.capture replay logs/capture-*.ndjson* --speed 10
+    python -m utils.capture replay logs/capture.ndjson --target planner --speed 0
+
+--target app kayıtları Flask uygulamasına (test istemcisiyle), --target
+planner yalnızca planlama isteklerini (/plan ve asgi.py'nin /api/plan'ı)
+doğrudan RoutePlanner'a verir (CITIES_DIR ayarlıysa kaydın şehrinin, yoksa
+başlangıç noktasından bulunan şehrin planlayıcısına); /api/plan Flask'ta olmadığından app hedefinde
+404 ölçülür. --speed
+özgün aralıkların kaç kat hızlı oynatılacağıdır (0: beklemeden). Sonunda
+yol başına kaydedilen ve yeniden ölçülen gecikmeler karşılaştırılır.
+"""
+import argparse
+import atexit
+import gzip
+import heapq
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qs
+
+MAX_QUEUE = 10000
+BATCH_SIZE = 500
+# Kaydedilen gövde alanlarının (form/JSON) en büyük boyutu (karakter)
+MAX_BODY_CHARS = 16 * 1024
+
+
+class RequestCapture:
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, backup_count=5, sample_rate=1.0,
+                 flush_seconds=1.0):
+        self.path_template = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample_rate = sample_rate
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self.written = 0
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_writer(self):
+        # fork sonrası üst sürecin thread'i çocukta yoktur; her süreç kendininkini kurar.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.path = self.path_template.format(pid=os.getpid())
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._queue = queue.Queue(MAX_QUEUE)
+            self._thread = threading.Thread(target=self._run, name="request-capture", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+            # Süreç kapanırken kuyrukta kalanlar da yazılsın.
+            atexit.register(self.close)
+
+    def record(self, entry):
+        """Kaydı kuyruğa bırakır; beklemez. Örneklemeye girmeyen kayıt hemen döner."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Kuyruktakileri yazıp thread'i durdurur."""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+            self._pid = None
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+                while True:
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= BATCH_SIZE:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        data = "".join(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+                       for entry in batch).encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(data)
+            size = f.tell()
+        self.written += len(batch)
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}.gz"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}.gz")
+        if self.backup_count > 0:
+            with open(self.path, "rb") as src, gzip.open(f"{self.path}.1.gz", "wb") as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+        os.remove(self.path)
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped,
+                "pending": self._queue.qsize() if self._queue else 0}
+
+
+def request_entry(request, status, elapsed_ms):
+    """Flask isteğinden kayıt: parametreler tek değerli sözlükler, gövde sınırlı."""
+    entry = {
+        "ts": round(time.time(), 3),
+        "method": request.method,
+        "path": request.path,
+        "args": request.args.to_dict(),
+        "status": status,
+        "ms": round(elapsed_ms, 2)
+    }
+    if request.form:
+        entry["form"] = request.form.to_dict()
+    if request.is_json:
+        body = request.get_data(as_text=True)
+        if len(body) <= MAX_BODY_CHARS:
+            entry["json"] = request.get_json(silent=True)
+    return entry
+
+
+def asgi_entry(scope, body, status, elapsed_ms):
+    """asgi.py'nin kendi karşıladığı isteklerden (POST /api/plan) aynı biçimde kayıt."""
+    entry = {
+        "ts": round(time.time(), 3),
+        "method": scope["method"],
+        "path": scope["path"],
+        "args": {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()},
+        "status": status,
+        "ms": round(elapsed_ms, 2)
+    }
+    content_type = dict(scope["headers"]).get(b"content-type", b"")
+    try:
+        if content_type.startswith(b"application/json"):
+            if len(body) <= MAX_BODY_CHARS:
+                entry["json"] = json.loads(body or b"{}")
+        elif body:
+            entry["form"] = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+    except ValueError:
+        pass
+    return entry
+
+
+#----------------------------------------------------------------------
+# Tekrar oynatma
+#----------------------------------------------------------------------
+def _open(path):
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")
+
+
+def _entries(path):
+    with _open(path) as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # yarım yazılmış son satır
+
+
+def read_log(paths):
+    """Kayıtları bütün dosyalardan ts sırasıyla birleştirerek üretir."""
+    # Döndürülmüş dosyalar tek başına sıralıdır; birleştirme heapq.merge ile akış halinde.
+    return heapq.merge(*(_entries(p) for p in paths), key=lambda e: e["ts"])
+
+
+PLAN_PATHS = ("/plan", "/api/plan")
+
+
+def _plan_form(entry):
+    form = dict(entry.get("args") or {})
+    form.update(entry.get("form") or {})
+    form.update(entry.get("json") or {})
+    return form
+
+
+def replay(entries, target, speed=1.0, planner=None, client=None, registry=None, default_city=""):
+    """
+    Kayıtları oynatır ve (kayıt, yeniden ölçülen ms, gecikme ms) üretir.
+    target "planner" ise yalnızca planlama istekleri planner'a verilir
+    (registry verilirse isteğin şehrinin planlayıcısına); "app" ise tüm
+    istekler client'a (Flask test istemcisi) gönderilir. Gecikme, planlanan
+    zamandan ne kadar geç başlandığıdır.
+    """
+    from app import city_area, parse_plan_form, planner_kwargs, resolve_city
+    from utils.city_registry import UnknownCity
+
+    start_wall = start_ts = None
+    for entry in entries:
+        if target == "planner" and entry["path"] not in PLAN_PATHS:
+            continue
+        if start_wall is None:
+            start_wall, start_ts = time.perf_counter(), entry["ts"]
+        lag = 0.0
+        if speed > 0:
+            due = start_wall + (entry["ts"] - start_ts) / speed
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                lag = -wait * 1000
+        t0 = time.perf_counter()
+        if target == "planner":
+            form = _plan_form(entry)
+            city_planner, area = planner, {}
+            try:
+                if registry is not None:
+                    city = entry.get("city") or resolve_city(registry, form, default_city)
+                    area = city_area(registry, city)
+                    city_planner = registry.get(city)["route_planner"]
+                params = planner_kwargs(parse_plan_form(form, **area))
+            except (ValueError, UnknownCity):
+                continue
+            city_planner.get_alternative_routes(**params)
+        else:
+            kwargs = {"query_string": entry.get("args") or None}
+            if entry.get("json") is not None:
+                kwargs["json"] = entry["json"]
+            elif entry.get("form"):
+                kwargs["data"] = entry["form"]
+            client.open(entry["path"], method=entry["method"], **kwargs)
+        yield entry, (time.perf_counter() - t0) * 1000, lag
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summarize(results):
+    """Yol başına {n, kaydedilen/yeniden p50 ve p95, en büyük gecikme}."""
+    by_path = {}
+    for entry, ms, lag in results:
+        item = by_path.setdefault(entry["path"], {"recorded": [], "replayed": [], "lag": 0.0})
+        item["recorded"].append(entry["ms"])
+        item["replayed"].append(ms)
+        item["lag"] = max(item["lag"], lag)
+    return {path: {
+        "n": len(item["recorded"]),
+        "recorded_p50": round(_percentile(item["recorded"], 0.5), 2),
+        "recorded_p95": round(_percentile(item["recorded"], 0.95), 2),
+        "replayed_p50": round(_percentile(item["replayed"], 0.5), 2),
+        "replayed_p95": round(_percentile(item["replayed"], 0.95), 2),
+        "max_lag_ms": round(item["lag"], 1)
+    } for path, item in sorted(by_path.items())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kaydedilmiş istek akışını tekrar oynatır")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rp = sub.add_parser("replay")
+    rp.add_argument("logs", nargs="+", help="kayıt dosyaları (.ndjson, .gz)")
+    rp.add_argument("--target", choices=("app", "planner"), default="app")
+    rp.add_argument("--speed", type=float, default=1.0, help="hız katı; 0 ise beklemeden")
+    rp.add_argument("--data", default=None,
+                    help="planner hedefi için stops.json (varsayılan DATA_PATH ya da CITIES_DIR)")
+    rp.add_argument("--out", default=None, help="istek başına karşılaştırma (NDJSON)")
+    args = parser.parse_args(argv)
+
+    planner = client = registry = None
+    default_city = ""
+    if args.target == "planner":
+        from config import Config
+        from app import CITY_SETTINGS, configure_planner, load_planner, planner_registry, PLANNER_SETTINGS
+        settings = {key: getattr(Config, key) for key in PLANNER_SETTINGS}
+        if Config.CITIES_DIR and not args.data:
+            # Şehirler ilk kayıtlarında yüklenir (bkz. app.planner_registry).
+            registry = planner_registry({key: getattr(Config, key) for key in CITY_SETTINGS}, settings)
+            default_city = Config.DEFAULT_CITY
+        else:
+            _, planner = load_planner(args.data or Config.DATA_PATH, Config.WALK_TRANSFER_RADIUS_KM)
+            configure_planner(planner, settings)
+    else:
+        from app import create_app
+        # Oynatılan istekler yeniden kaydedilmesin.
+        client = create_app({"CAPTURE_LOG": ""}).test_client()
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    results = []
+    try:
+        for entry, ms, lag in replay(read_log(args.logs), args.target, args.speed, planner, client,
+                                     registry, default_city):
+            results.append((entry, ms, lag))
+            if out:
+                out.write(json.dumps({"ts": entry["ts"], "path": entry["path"], "recorded_ms": entry["ms"],
+                                      "replayed_ms": round(ms, 2), "lag_ms": round(lag, 1)}) + "\n")
+    finally:
+        if out:
+            out.close()
+
+    print(f"{len(results)} istek oynatıldı ({datetime.now():%H:%M:%S})")
+    for path, row in summarize(results).items():
+        print(f"{path}: n={row['n']} kayıt p50/p95 {row['recorded_p50']}/{row['recorded_p95']} ms, "
+              f"yeniden {row['replayed_p50']}/{row['replayed_p95']} ms, en büyük gecikme {row['max_lag_ms']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# utils/city_registry.py
+"""
+Çok şehirli sunum: bir dizindeki her ağ dosyası (<şehir>.json, stops.json
+biçiminde) bir şehirdir; şehir adı dosya adıdır.
+
+- Açılışta yalnızca dosyalar bulunur ve her birinin durak kutusu (sınırları)
+  akış halinde okunarak çıkarılır; ağ derlenmez.
+- Bir şehrin planlayıcısı ilk istekte yüklenir (load fonksiyonu, bkz.
+  app.create_app) ve en son kullanılma sırasıyla tutulur.
+- Yüklü şehirlerin tahmini boyutu max_bytes'ı aşarsa en uzun süredir
+  kullanılmayan şehirler bellekten atılır; idle_seconds > 0 ise bu süredir
+  kullanılmayanlar da atılır. Atılan şehir sonraki istekte yeniden yüklenir.
+- locate(lat, lon) noktayı sınırları içine alan şehri bulur.
+
+Atılmış bir şehri kullanan süren istekler kendi referanslarıyla biter.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from models.loader import iter_stops
+from utils.memory_report import network_nbytes
+
+# Şehir sınırları durak kutusunun bu kadar (km) dışına taşar; kenardaki
+# adresler de şehre düşsün.
+BOUNDS_MARGIN_KM = 10.0
+KM_PER_DEGREE = 111.32
+
+
+class UnknownCity(LookupError):
+    pass
+
+
+def scan_bounds(path):
+    """(min_lat, max_lat, min_lon, max_lon) ve üst düzey alanlar; ağ derlenmeden."""
+    meta = {}
+    lats, lons = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for stop in iter_stops(f, meta):
+            lats.append(float(stop["lat"]))
+            lons.append(float(stop["lon"]))
+    if not lats:
+        return None, meta
+    return (min(lats), max(lats), min(lons), max(lons)), meta
+
+
+class CityRegistry:
+    def __init__(self, directory, load, max_bytes, idle_seconds=0.0, margin_km=BOUNDS_MARGIN_KM):
+        """
+        load(path) -> {"route_planner", "duraklar_json", "stop_index", ...}
+        sözlüğü döndürür; sözlüğe burada "city", "label", "bounds" ve
+        "network_version" eklenir.
+        """
+        self.directory = directory
+        self.load = load
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.margin_km = margin_km
+        self.cities = {}            # ad -> {"path", "bounds", "label"}
+        self.loaded = OrderedDict()  # ad -> (bağlam, bayt, son kullanım)
+        self.loads = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.refresh()
+
+    def refresh(self):
+        """Dizini yeniden tarar; yeni dosyaları ekler, silinenleri çıkarır."""
+        cities = {}
+        for name in sorted(os.listdir(self.directory)):
+            stem, ext = os.path.splitext(name)
+            if ext != ".json":
+                continue
+            path = os.path.join(self.directory, name)
+            bounds, meta = scan_bounds(path)
+            if bounds is None:
+                continue
+            pad_lat = self.margin_km / KM_PER_DEGREE
+            pad_lon = pad_lat / max(math.cos(math.radians(max(abs(bounds[0]), abs(bounds[1])))), 0.01)
+            cities[stem] = {
+                "path": path,
+                "bounds": (bounds[0] - pad_lat, bounds[1] + pad_lat, bounds[2] - pad_lon, bounds[3] + pad_lon),
+                "label": meta.get("city") or stem
+            }
+        with self._lock:
+            self.cities = cities
+            for name in [n for n in self.loaded if n not in cities]:
+                del self.loaded[name]
+
+    def names(self):
+        return list(self.cities)
+
+    def __contains__(self, name):
+        return name in self.cities
+
+    def locate(self, lat, lon):
+        """Noktayı sınırları içine alan şehir; birden çoksa kutusu en küçük olan, yoksa None."""
+        best, best_area = None, None
+        for name, info in self.cities.items():
+            min_lat, max_lat, min_lon, max_lon = info["bounds"]
+            if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                area = (max_lat - min_lat) * (max_lon - min_lon)
+                if best is None or area < best_area:
+                    best, best_area = name, area
+        return best
+
+    def get(self, name):
+        """Şehrin bağlamı; yüklü değilse yükler. Bilinmeyen şehirde UnknownCity."""
+        info = self.cities.get(name)
+        if info is None:
+            raise UnknownCity(name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self.loaded.get(name)
+            if entry is not None:
+                self.loaded[name] = (entry[0], entry[1], now)
+                self.loaded.move_to_end(name)
+                self._evict(keep=name, now=now)
+                return entry[0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        # Aynı şehri aynı anda yalnızca bir thread yükler; diğer şehirler beklemez.
+        with load_lock:
+            with self._lock:
+                entry = self.loaded.get(name)
+            if entry is not None:
+                return self.get(name)
+            stat = os.stat(info["path"])
+            context = dict(self.load(info["path"]))
+            context.update(city=name, label=info["label"], bounds=info["bounds"],
+                           network_version=f"{name}-{stat.st_mtime_ns}-{stat.st_size}")
+            nbytes = network_nbytes(context["route_planner"].network) + len(context.get("duraklar_json", ""))
+            with self._lock:
+                self.loaded[name] = (context, nbytes, time.monotonic())
+                self.loads += 1
+                self._evict(keep=name, now=time.monotonic())
+        return context
+
+    def _evict(self, keep, now):
+        # Kilit tutulurken çağrılır.
+        if self.idle_seconds > 0:
+            for name in [n for n, (_, _, used) in self.loaded.items()
+                         if n != keep and now - used > self.idle_seconds]:
+                del self.loaded[name]
+                self.evictions += 1
+        total = sum(nbytes for _, nbytes, _ in self.loaded.values())
+        for name in list(self.loaded):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self.loaded.pop(name)[1]
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cities": self.names(),
+                "loaded": list(self.loaded),
+                "bytes": sum(nbytes for _, nbytes, _ in self.loaded.values()),
+                "max_bytes": self.max_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
@@ -1,8 +1,12 @@
 # utils/distance.py
 import math
 
+EARTH_RADIUS_KM = 6371.0
+# Haversine ile tutarlı derece başına km (~111.195)
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
 def haversine(lat1, lon1, lat2, lon2):
-    R = 6371.0
+    R = EARTH_RADIUS_KM
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
@@ -11,3 +15,15 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     distance = R * c
     return distance
+
+def grid_cell_degrees(radius_km, lats):
+    """
+    Izgara hücresinin (enlem, boylam) derece kenarları; hücre lats'taki her
+    enlemde en az radius_km genişliktedir. Boylam kenarı en kutupsal enleme
+    (bir hücre payıyla) göre alınır, böylece haversine ile radius_km içindeki
+    her nokta çifti kendi ya da komşu hücrededir.
+    """
+    cell_lat = radius_km / KM_PER_DEGREE
+    max_abs_lat = min(max((abs(lat) for lat in lats), default=0.0) + cell_lat, 89.0)
+    cell_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(max_abs_lat)), 0.01))
+    return cell_lat, cell_lon
@@ -0,0 +1,41 @@
+# utils/isochrone.py
+import math
+
+KM_PER_DEG_LAT = 111.32
+
+
+def estimate_cells(circles, cell_km):
+    """walk_grid'in tarayacağı hücre sayısının tahmini: dairelerin alanları toplamı / hücre alanı."""
+    return sum(math.pi * radius * radius for _, _, radius in circles if radius > 0) / (cell_km * cell_km)
+
+
+def walk_grid(circles, cell_km=0.25):
+    """
+    circles: (lat, lon, yarıçap_km) listesi. Merkezi herhangi bir dairenin
+    içinde kalan ızgara hücrelerinin merkezlerini [lat, lon] olarak döndürür.
+    Hücreler cell_km kenarlı, (0, 0)'a hizalı bir enlem/boylam ızgarasıdır;
+    her daire yalnızca kendi sınır kutusundaki hücreleri tarar.
+    """
+    if not circles:
+        return []
+    ref_lat = sum(c[0] for c in circles) / len(circles)
+    dlat = cell_km / KM_PER_DEG_LAT
+    dlon = cell_km / (KM_PER_DEG_LAT * math.cos(math.radians(ref_lat)))
+    cells = set()
+    for lat, lon, radius in circles:
+        if radius <= 0:
+            continue
+        r_lat = radius / KM_PER_DEG_LAT
+        r_lon = radius / (KM_PER_DEG_LAT * math.cos(math.radians(lat)))
+        for i in range(math.floor((lat - r_lat) / dlat), math.ceil((lat + r_lat) / dlat) + 1):
+            clat = (i + 0.5) * dlat
+            y = (clat - lat) * KM_PER_DEG_LAT
+            if abs(y) > radius:
+                continue
+            # Bu satırda dairenin yatay yarı genişliği
+            half = math.sqrt(radius * radius - y * y) / (KM_PER_DEG_LAT * math.cos(math.radians(lat)))
+            for j in range(math.floor((lon - half) / dlon - 0.5), math.ceil((lon + half) / dlon - 0.5) + 1):
+                clon = (j + 0.5) * dlon
+                if abs(clon - lon) <= half:
+                    cells.add((i, j))
+    return [[round((i + 0.5) * dlat, 6), round((j + 0.5) * dlon, 6)] for i, j in sorted(cells)]
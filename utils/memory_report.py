@@ -0,0 +1,75 @@
+# utils/memory_report.py
+"""
+Ağın bellekteki boyutu: durak ve kenar başına bayt.
+
+Üç gösterim karşılaştırılır: json.load ile okunan ham sözlükler, Stop
+nesneleri ve CompiledNetwork dizileri. Boyutlar sys.getsizeof ile, iç içe
+nesneler izlenerek ve paylaşılan nesneler (intern edilmiş dizgiler gibi)
+bir kez sayılarak hesaplanır.
+
+    python -m utils.memory_report data/stops.json
+"""
+import json
+import sys
+from array import array
+
+from models.network import ARRAY_FIELDS
+from models.stop import Stop
+
+
+def deep_sizeof(obj, seen=None):
+    """obj ve ulaşılabilen tüm alt nesnelerin toplam boyutu (bayt)."""
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif not isinstance(o, (str, bytes, int, float, bool, array, memoryview, type(None))):
+            slots = getattr(type(o), "__slots__", ())
+            stack.extend(getattr(o, name) for name in slots if hasattr(o, name))
+            if hasattr(o, "__dict__"):
+                stack.append(o.__dict__)
+    return total
+
+
+def network_nbytes(network):
+    """CompiledNetwork dizilerinin toplam boyutu (kimlik/ad tuple'ları dahil)."""
+    total = sum(memoryview(getattr(network, field)).nbytes for field, _ in ARRAY_FIELDS)
+    return total + deep_sizeof((network.ids, network.names, network.index))
+
+
+def memory_report(stops_data, network):
+    """{gösterim: (toplam bayt, durak başına, kenar başına)}"""
+    duraklar = stops_data["duraklar"]
+    n_stops = max(len(duraklar), 1)
+    n_edges = max(sum(len(s.get("nextStops", [])) for s in duraklar), 1)
+    sizes = {
+        "json_dict": deep_sizeof(duraklar),
+        "stop_objects": deep_sizeof({s["id"]: Stop(s) for s in duraklar}),
+        "compiled_network": network_nbytes(network)
+    }
+    return {name: (size, size / n_stops, size / n_edges) for name, size in sizes.items()}
+
+
+if __name__ == "__main__":
+    from models.network import CompiledNetwork
+
+    if len(sys.argv) != 2:
+        print("Kullanım: python -m utils.memory_report <stops.json>")
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        data = json.load(f)
+    net = CompiledNetwork(data["duraklar"])
+    print(f"{len(net)} durak, {len(net.edge_to)} kenar")
+    print(f"{'gösterim':<18}{'toplam KB':>12}{'B/durak':>10}{'B/kenar':>10}")
+    for name, (size, per_stop, per_edge) in memory_report(data, net).items():
+        print(f"{name:<18}{size / 1024:>12.1f}{per_stop:>10.0f}{per_edge:>10.0f}")
@@ -0,0 +1,157 @@
+# utils/od_matrix.py
+"""
+Süre/ücret başlangıç-varış (OD) matrisleri.
+
+Her başlangıç için tek bir çok hedefli arama (RoutePlanner.one_to_many)
+yapılır ve tüm varışlar o aramadan okunur; çift başına planlama yapılmaz.
+Başlangıç ve varışlar durak kimliği ya da [lat, lon] noktası olabilir.
+Noktalar için erişim/çıkış, max_walk dakikaya kadar yürüyerek hesaplanır.
+Ulaşılamayan hücrelerde süre inf, ücret nan olur.
+
+Komut satırından (tüm duraklar x tüm duraklar):
+
+    python -m utils.od_matrix data/stops.json matris --format npy --workers 4
+"""
+import csv
+import io
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.route_planner import AVERAGE_WALK_SPEED
+from utils.distance import haversine
+
+DEFAULT_MAX_WALK = 20.0
+# Nakitle otobüs/tramvaya binilemediğinden varsayılan ödeme KentKart'tır.
+DEFAULT_PAYMENT_TYPE = "kentkart"
+
+# fork ile başlatılan worker'lar planlayıcıyı bu değişkenden devralır.
+_worker_planner = None
+
+
+def parse_locations(planner, items):
+    """Durak kimliklerini ("stop", indeks), noktaları ("point", lat, lon) biçimine çevirir."""
+    specs = []
+    for item in items:
+        if isinstance(item, str):
+            i = planner.network.index.get(item)
+            if i is None:
+                raise ValueError(f"Bilinmeyen durak: {item}")
+            specs.append(("stop", i))
+        else:
+            lat, lon = item
+            specs.append(("point", float(lat), float(lon)))
+    return specs
+
+
+def _egress(planner, specs, max_walk):
+    # Her varış için {durak indeksi: yürüme dakikası}; durak varışlarında durağın kendisi.
+    return [{spec[1]: 0.0} if spec[0] == "stop" else planner.walk_access(spec[1], spec[2], max_walk)
+            for spec in specs]
+
+
+def _rows(planner, origins, destinations, egress, ctx, max_walk):
+    times = np.full((len(origins), len(destinations)), np.inf)
+    costs = np.full((len(origins), len(destinations)), np.nan)
+    for r, origin in enumerate(origins):
+        if origin[0] == "stop":
+            sources = {origin[1]: 0.0}
+        else:
+            sources = planner.walk_access(origin[1], origin[2], max_walk)
+        reached = planner.one_to_many(sources, ctx["passenger_type"], ctx["payment_type"],
+                                      ctx["special_day"])
+        for c, dest in enumerate(destinations):
+            best = (math.inf, math.nan)
+            if origin[0] == "point" and dest[0] == "point":
+                walk = haversine(origin[1], origin[2], dest[1], dest[2]) / AVERAGE_WALK_SPEED
+                if walk <= max_walk:
+                    best = (walk, 0.0)
+            for i, walk in egress[c].items():
+                label = reached.get(i)
+                if label and label[0] + walk < best[0]:
+                    best = (label[0] + walk, label[1])
+            times[r, c], costs[r, c] = best
+    return times, costs
+
+
+def _worker_rows(start, origins, destinations, egress, ctx, max_walk):
+    return (start,) + _rows(_worker_planner, origins, destinations, egress, ctx, max_walk)
+
+
+def compute_matrix(planner, origins, destinations, passenger_type="genel", payment_type=DEFAULT_PAYMENT_TYPE,
+                   special_day=False, max_walk=DEFAULT_MAX_WALK, workers=1):
+    """
+    (times, costs) NumPy dizilerini döndürür; boyut len(origins) x len(destinations).
+    workers > 1 ise başlangıçlar, planlayıcıyı fork ile devralan süreçlere bölünür.
+    """
+    global _worker_planner
+    origins = parse_locations(planner, origins)
+    destinations = parse_locations(planner, destinations)
+    egress = _egress(planner, destinations, max_walk)
+    ctx = {"passenger_type": passenger_type, "payment_type": payment_type, "special_day": special_day}
+    if workers <= 1 or len(origins) < 2 or "fork" not in multiprocessing.get_all_start_methods():
+        return _rows(planner, origins, destinations, egress, ctx, max_walk)
+
+    times = np.empty((len(origins), len(destinations)))
+    costs = np.empty((len(origins), len(destinations)))
+    chunk = max(1, math.ceil(len(origins) / (workers * 4)))
+    _worker_planner = planner
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            jobs = [pool.submit(_worker_rows, s, origins[s:s + chunk], destinations, egress, ctx, max_walk)
+                    for s in range(0, len(origins), chunk)]
+            for job in jobs:
+                start, t, c = job.result()
+                times[start:start + len(t)] = t
+                costs[start:start + len(c)] = c
+    finally:
+        _worker_planner = None
+    return times, costs
+
+
+def save_npy(prefix, times, costs):
+    np.save(prefix + "_time.npy", times)
+    np.save(prefix + "_cost.npy", costs)
+
+
+def to_csv(times, costs, origin_labels, destination_labels, out=None):
+    """Uzun biçimli CSV (origin, destination, time, cost); ulaşılamayan çiftler boş bırakılır."""
+    out = out or io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["origin", "destination", "time", "cost"])
+    for r, o in enumerate(origin_labels):
+        for c, d in enumerate(destination_labels):
+            if np.isfinite(times[r, c]):
+                writer.writerow([o, d, round(float(times[r, c]), 2), round(float(costs[r, c]), 2)])
+            else:
+                writer.writerow([o, d, "", ""])
+    return out
+
+
+def location_label(item):
+    return item if isinstance(item, str) else f"{item[0]},{item[1]}"
+
+
+if __name__ == "__main__":
+    import argparse
+    from app import load_planner
+
+    parser = argparse.ArgumentParser(description="Tüm duraklar arası süre/ücret matrisi")
+    parser.add_argument("data_path")
+    parser.add_argument("out", help="Çıktı öneki (npy) ya da dosya adı (csv)")
+    parser.add_argument("--format", choices=["npy", "csv"], default="npy")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--passenger-type", default="genel")
+    parser.add_argument("--payment-type", default=DEFAULT_PAYMENT_TYPE)
+    args = parser.parse_args()
+
+    _, rp = load_planner(args.data_path)
+    ids = list(rp.network.ids)
+    t, c = compute_matrix(rp, ids, ids, args.passenger_type, args.payment_type, workers=args.workers)
+    if args.format == "npy":
+        save_npy(args.out, t, c)
+    else:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            to_csv(t, c, ids, ids, f)
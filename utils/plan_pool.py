@@ -0,0 +1,78 @@
+# utils/plan_pool.py
+"""
+Planlama süreç havuzunun worker tarafı. Bu modül yan etkisiz içe aktarılır;
+her süreç initializer ile ağı bir kez yükler (ya da paylaşımlı belleğe bağlanır).
+Çok şehirli modda (cities verilirse) şehirler ilk kullanımda yüklenir ve
+app.create_app'teki gibi bellek sınırıyla tutulur.
+"""
+from app import configure_planner, load_planner, planner_registry
+from models.overlay import OverlayWatcher
+from models.route_planner import BUDGET_SCENARIO, RoutePlanner
+
+_planner = None
+_store = None
+_version = None
+_overlay_watcher = None
+_settings = None
+_registry = None
+_default_city = ""
+
+
+def init_worker(data_path, shared_prefix="", overlay_path="", settings=None, cities=None):
+    """
+    settings: app.PLANNER_SETTINGS, cities: app.CITY_SETTINGS anahtarlarıyla
+    ayarlar. cities verilirse data_path, paylaşımlı bellek ve katman kullanılmaz.
+    """
+    global _planner, _store, _overlay_watcher, _settings, _registry, _default_city
+    _settings = settings
+    if cities:
+        _registry = planner_registry(cities, _settings or {})
+        _default_city = cities["DEFAULT_CITY"]
+        return
+    if overlay_path:
+        _overlay_watcher = OverlayWatcher(overlay_path)
+    if shared_prefix:
+        from utils.shared_network import SharedNetworkStore
+        _store = SharedNetworkStore(shared_prefix)
+        _attach_shared()
+    else:
+        _, _planner = load_planner(data_path, (_settings or {}).get("WALK_TRANSFER_RADIUS_KM", 0.0))
+        if _settings:
+            configure_planner(_planner, _settings)
+
+
+def _attach_shared():
+    global _planner, _version
+    network, meta, _version = _store.attach()
+    _planner = RoutePlanner.from_network(network, meta["taxi"], meta["city"])
+    if _settings:
+        configure_planner(_planner, _settings)
+
+
+def get_worker_registry():
+    """Çok şehirli modda (CityRegistry, varsayılan şehir); tek şehirde (None, "")."""
+    return _registry, _default_city
+
+
+def get_worker_planner(city=None):
+    """city: çok şehirli modda şehir adı (bilinmeyen şehirde UnknownCity)."""
+    if _registry is not None:
+        return _registry.get(city)["route_planner"]
+    # Yeni ağ sürümü yayınlandıysa ona geç.
+    if _store is not None and _store.current_version() != _version:
+        _attach_shared()
+    # Aksaklık katmanı dosyası değiştiyse ona geç.
+    if _overlay_watcher is not None:
+        _overlay_watcher.poll(_planner)
+    return _planner
+
+
+def plan_scenario(scenario, kwargs, city=None):
+    """Tek bir senaryoyu (ör. "sadece_otobus") planlar; kwargs planner_kwargs çıktısıdır."""
+    plan = getattr(get_worker_planner(city), "plan_" + scenario)
+    args = (kwargs["start_lat"], kwargs["start_lon"], kwargs["end_lat"], kwargs["end_lon"],
+            kwargs["passenger_type"], kwargs["payment_type"],
+            kwargs["special_day"], kwargs["start_time"], kwargs.get("k", 1))
+    if scenario == BUDGET_SCENARIO:
+        return plan(*args, budget=kwargs["budget"])
+    return plan(*args)
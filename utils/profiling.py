@@ -0,0 +1,114 @@
+# utils/profiling.py
+import cProfile
+import json
+import logging
+import os
+import random
+import secrets
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+PROFILE_HEADER = "X-Profile"
+
+
+class RequestProfiler:
+    """
+    /plan için isteğe bağlı profil çıkarma ve yavaş sorgu kaydı.
+
+    - X-Profile başlığı header_token ile eşleşirse (header_token boşsa başlık
+      yok sayılır) ya da sample_rate olasılığıyla seçilirse, fonksiyon cProfile altında çalıştırılır; .prof dosyası ve
+      istek parametreleri (.json) profile_dir altına yazılır. Dizinde en
+      fazla max_profiles profil tutulur, eskiler silinir.
+    - slow_threshold_ms üzerindeki her istek, parametreleri ve arama
+      sayaçlarıyla birlikte slow_log_path dosyasına JSON satırı olarak eklenir.
+    """
+
+    def __init__(self, profile_dir, sample_rate=0.0, max_profiles=50,
+                 slow_threshold_ms=500.0, slow_log_path=None, header_token=""):
+        self.profile_dir = profile_dir
+        self.header_token = header_token
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_logger = None
+        if slow_log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(slow_log_path)), exist_ok=True)
+            self.slow_logger = logging.getLogger("route_planner.slow_query")
+            self.slow_logger.setLevel(logging.INFO)
+            self.slow_logger.propagate = False
+            if not self.slow_logger.handlers:
+                handler = RotatingFileHandler(slow_log_path, maxBytes=5 * 1024 * 1024,
+                                              backupCount=3, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self.slow_logger.addHandler(handler)
+
+    def should_profile(self, headers):
+        # Herkese açık bir başlık her isteği profillettirip diske yazdırmasın.
+        if self.header_token and secrets.compare_digest(headers.get(PROFILE_HEADER, ""), self.header_token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def run(self, func, params, headers=None, stats_func=None):
+        """
+        func'ı çağırır ve sonucunu döndürür. params, istek parametreleridir
+        (JSON'a çevrilebilir olmalı); stats_func verilirse çağrı sonrası
+        arama sayaçlarını döndürmelidir.
+        """
+        profile = None
+        if headers is not None and self.should_profile(headers):
+            profile = cProfile.Profile()
+        t0 = time.perf_counter()
+        if profile:
+            result = profile.runcall(func)
+        else:
+            result = func()
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        stats = stats_func() if stats_func else {}
+        if profile:
+            self._write_profile(profile, params, elapsed_ms, stats)
+        if self.slow_logger and elapsed_ms >= self.slow_threshold_ms:
+            self.slow_logger.info(json.dumps({
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "elapsed_ms": round(elapsed_ms, 2),
+                "params": params,
+                "stats": stats
+            }, ensure_ascii=False, default=str))
+        return result
+
+    def _write_profile(self, profile, params, elapsed_ms, stats):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = os.path.join(self.profile_dir, f"plan-{stamp}")
+        profile.dump_stats(base + ".prof")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"params": params, "elapsed_ms": round(elapsed_ms, 2), "stats": stats},
+                      f, ensure_ascii=False, indent=2, default=str)
+        self._rotate()
+
+    def _rotate(self):
+        profiles = sorted(n for n in os.listdir(self.profile_dir) if n.endswith(".prof"))
+        for name in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            base = os.path.join(self.profile_dir, name[:-len(".prof")])
+            for ext in (".prof", ".json"):
+                try:
+                    os.remove(base + ext)
+                except FileNotFoundError:
+                    pass
+
+
+def replay(planner, params_path, index=-1):
+    """
+    Kaydedilmiş bir profil .json'ını ya da slow-query kaydındaki (satır başına
+    bir JSON) index'inci girdiyi (varsayılan: sonuncu) çevrimdışı tekrar çalıştırır.
+    """
+    with open(params_path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        entry = json.loads(text)
+    except json.JSONDecodeError:
+        entry = json.loads([line for line in text.splitlines() if line.strip()][index])
+    params = dict(entry["params"])
+    if params.get("start_time"):
+        params["start_time"] = datetime.fromisoformat(params["start_time"])
+    return planner.get_alternative_routes(**params)
@@ -0,0 +1,218 @@
+# utils/regression.py
+"""
+Planlayıcı için doğruluk ve performans regresyon kapısı.
+
+Sabit bir başlangıç-varış sorgu kümesi (corpus.json) get_alternative_routes
+ile çalıştırılır:
+- Her sorgunun senaryo özetleri (adımlar, süre, mesafe, ücret) golden.json
+  ile birebir karşılaştırılır; herhangi bir fark hatadır.
+- Kümenin toplam süresi (birkaç turun en iyisi) ve tracemalloc ile ölçülen
+  bellek tepe noktası baseline.json ile karşılaştırılır; tolerans aşılırsa
+  hatadır. Süre makineye bağlı olduğundan yalnızca istenirse (--timing)
+  karşılaştırılır; baseline aynı makinede alınmalıdır.
+
+    python -m utils.regression check            # fark varsa çıkış kodu 1
+    python -m utils.regression update           # golden ve baseline'ı yeniden yaz
+    python -m utils.regression check --timing   # süreyi de karşılaştır
+
+Bilerek değiştirilen bir sonuç ya da kabul edilen bir yavaşlama için
+update çalıştırılıp üç dosya değişiklikle birlikte commit edilir.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from models.loader import load_network
+from models.route_planner import RoutePlanner
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(BASE_DIR, "data", "stops.json")
+DEFAULT_DIR = os.path.join(BASE_DIR, "tests", "regression")
+
+# Baseline'a göre izin verilen artış oranları
+TIME_TOLERANCE = float(os.environ.get("REGRESSION_TIME_TOLERANCE", "0.25"))
+MEMORY_TOLERANCE = float(os.environ.get("REGRESSION_MEMORY_TOLERANCE", "0.10"))
+TIMING_ROUNDS = 5
+
+# Sorgu uçları durakların biraz dışına kaydırılır ki erişim bacakları da sınansın.
+POINT_OFFSET = 0.002
+START_TIME = "2025-01-01T08:00"
+
+
+def load_planner(data_path):
+    meta, network = load_network(data_path)
+    return RoutePlanner.from_network(network, meta["taxi"], meta.get("city", ""))
+
+
+def build_corpus(planner):
+    """Her sıralı durak çifti için yolcu ve ödeme tiplerini kapsayan sorgular."""
+    net = planner.network
+    corpus = []
+    for a in range(len(net)):
+        for b in range(len(net)):
+            if a == b:
+                continue
+            for passenger_type in ("genel", "ogrenci", "65+"):
+                for payment_type in ("nakit", "kredi", "kentkart"):
+                    corpus.append({
+                        "start_lat": round(net.lat[a] + POINT_OFFSET, 6),
+                        "start_lon": round(net.lon[a] - POINT_OFFSET, 6),
+                        "end_lat": round(net.lat[b] - POINT_OFFSET, 6),
+                        "end_lon": round(net.lon[b] + POINT_OFFSET, 6),
+                        "passenger_type": passenger_type,
+                        "payment_type": payment_type,
+                        "start_time": START_TIME,
+                        # Özel gün ve alternatif rotalar da kapsansın.
+                        "special_day": passenger_type == "65+" and payment_type == "kentkart",
+                        "k": 3 if passenger_type == "genel" and payment_type == "kredi" else 1
+                    })
+    return corpus
+
+
+def _summarize_route(route):
+    if not route:
+        return None
+    summary = {
+        "steps": [[s["from"], s["to"], s["mode"], s["time"], s["final_cost"]] for s in route["steps"]],
+        "total_time": route["total_time"],
+        "total_distance": route["total_distance"],
+        "total_cost": route["total_cost"]
+    }
+    if "alternatives" in route:
+        summary["alternatives"] = [_summarize_route(alt) for alt in route["alternatives"]]
+    return summary
+
+
+def run_query(planner, query):
+    params = dict(query, start_time=datetime.strptime(query["start_time"], "%Y-%m-%dT%H:%M"))
+    routes = planner.get_alternative_routes(**params)
+    return {name: _summarize_route(route) for name, route in routes.items()}
+
+
+def run_corpus(planner, corpus):
+    # JSON'dan geçirilir ki golden.json'dan okunanla aynı biçimde karşılaştırılsın.
+    return json.loads(json.dumps([run_query(planner, q) for q in corpus]))
+
+
+def measure(planner, corpus, rounds=TIMING_ROUNDS):
+    """{"total_ms": en iyi turun süresi, "peak_kb": bellek tepe noktası}"""
+    run_corpus(planner, corpus)  # ısınma (lazy Stop nesneleri vb.)
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for query in corpus:
+            run_query(planner, query)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        for query in corpus:
+            run_query(planner, query)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"total_ms": round(best * 1000, 1), "peak_kb": round(peak / 1024, 1)}
+
+
+def compare_outputs(golden, outputs, corpus):
+    failures = []
+    for query, expected, actual in zip(corpus, golden, outputs):
+        for name in sorted(set(expected) | set(actual)):
+            if expected.get(name) != actual.get(name):
+                failures.append(f"{name} değişti: {json.dumps(query, ensure_ascii=False)}")
+    if len(golden) != len(outputs):
+        failures.append(f"Sorgu sayısı farklı: {len(golden)} beklenirken {len(outputs)}")
+    return failures
+
+
+def compare_perf(baseline, perf, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE,
+                 timing=True):
+    failures = []
+    checks = [("peak_kb", memory_tolerance, "KB")]
+    if timing:
+        checks.insert(0, ("total_ms", time_tolerance, "ms"))
+    for key, tolerance, unit in checks:
+        limit = baseline[key] * (1 + tolerance)
+        if perf[key] > limit:
+            failures.append(f"{key}: {perf[key]} {unit} > {baseline[key]} {unit} + %{tolerance * 100:.0f}")
+    return failures
+
+
+def _paths(directory):
+    return tuple(os.path.join(directory, name) for name in ("corpus.json", "golden.json", "baseline.json"))
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write(path, obj):
+    # Listeler satır başına bir öğe yazılır; değişiklikler diff'te sorgu bazında görünür.
+    with open(path, "w", encoding="utf-8") as f:
+        if isinstance(obj, list):
+            f.write("[\n" + ",\n".join(json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+                                       for item in obj) + "\n]\n")
+        else:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+
+def check_outputs(data_path=DEFAULT_DATA, directory=DEFAULT_DIR, planner=None):
+    corpus_path, golden_path, _ = _paths(directory)
+    planner = planner or load_planner(data_path)
+    corpus = _read(corpus_path)
+    return compare_outputs(_read(golden_path), run_corpus(planner, corpus), corpus)
+
+
+def check_perf(data_path=DEFAULT_DATA, directory=DEFAULT_DIR, planner=None, timing=False):
+    corpus_path, _, baseline_path = _paths(directory)
+    planner = planner or load_planner(data_path)
+    perf = measure(planner, _read(corpus_path))
+    return compare_perf(_read(baseline_path), perf, timing=timing), perf
+
+
+def update(data_path=DEFAULT_DATA, directory=DEFAULT_DIR, new_corpus=False):
+    """golden.json ve baseline.json'ı (istenirse corpus.json'ı da) yeniden yazar."""
+    corpus_path, golden_path, baseline_path = _paths(directory)
+    os.makedirs(directory, exist_ok=True)
+    planner = load_planner(data_path)
+    if new_corpus or not os.path.exists(corpus_path):
+        _write(corpus_path, build_corpus(planner))
+    corpus = _read(corpus_path)
+    _write(golden_path, run_corpus(planner, corpus))
+    perf = measure(planner, corpus)
+    perf["queries"] = len(corpus)
+    perf["python"] = sys.version.split()[0]
+    _write(baseline_path, perf)
+    return perf
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Planlayıcı regresyon kapısı")
+    parser.add_argument("command", choices=("check", "update"))
+    parser.add_argument("--data", default=DEFAULT_DATA)
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--timing", action="store_true", help="süreyi de baseline ile karşılaştır")
+    parser.add_argument("--new-corpus", action="store_true", help="update: sorgu kümesini de yeniden üret")
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        perf = update(args.data, args.dir, args.new_corpus)
+        print(f"{perf['queries']} sorgu; {perf['total_ms']} ms, tepe {perf['peak_kb']} KB")
+        return 0
+    planner = load_planner(args.data)
+    failures = check_outputs(args.data, args.dir, planner)
+    perf_failures, perf = check_perf(args.data, args.dir, planner, timing=args.timing)
+    failures += perf_failures
+    print(f"{perf['total_ms']} ms, tepe {perf['peak_kb']} KB")
+    for failure in failures:
+        print("HATA:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# utils/results_cache.py
+"""
+/plan sonuç sayfaları için yanıt önbelleği.
+
+Anahtar, normalize edilmiş form girdisi ile ağ sürümünden (ağ ve arama
+ayarları) hesaplanır; aynı girdi aynı sayfayı üretir. Sayfalar gzip ile
+sıkıştırılmış saklanır ve gzip kabul eden istemcilere açılmadan gönderilir.
+Toplam boyut max_bytes'ı aşınca en uzun süre kullanılmayan kayıtlar atılır.
+
+Aksaklık katmanı anahtara girmez: her kayıt, sayfadaki rotaların geçtiği
+durak kimliklerini de tutar ve katman değişince yalnızca değişen duraklara
+dokunan kayıtlar evict_stops() ile atılır (bkz. app.overlay_changed).
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def cache_key(params, network_version):
+    """parse_plan_form çıktısı ve ağ sürümünden anahtar (ETag) üretir."""
+    start_time = params["start_time"]
+    normalized = (
+        round(params["start_lat"], 6), round(params["start_lon"], 6),
+        round(params["end_lat"], 6), round(params["end_lon"], 6),
+        params["passenger_type"], params["payment_type"],
+        round(params["payment_amount"], 2),
+        start_time.strftime("%Y-%m-%dT%H:%M") if start_time else "",
+        bool(params["special_day"]), params["k"],
+        network_version
+    )
+    return hashlib.sha256(repr(normalized).encode("utf-8")).hexdigest()[:32]
+
+
+class ResultsCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # anahtar -> (gzip'li gövde, durak kimlikleri)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """gzip'li gövde ya da None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, body, stops=()):
+        """
+        body (bytes) sıkıştırılıp saklanır; gzip'li hali döner. stops,
+        sayfadaki rotaların geçtiği durak kimlikleridir.
+        """
+        compressed = gzip.compress(body, mtime=0)
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._entries[key] = (compressed, frozenset(stops))
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return compressed
+
+    def evict_stops(self, stops):
+        """stops'tan herhangi birine dokunan kayıtları atar; atılan kayıt sayısı."""
+        stops = set(stops)
+        with self._lock:
+            keys = [key for key, (_, touched) in self._entries.items() if not stops.isdisjoint(touched)]
+            for key in keys:
+                self.size -= len(self._entries.pop(key)[0])
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.size,
+                "hits": self.hits, "misses": self.misses}
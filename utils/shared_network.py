@@ -0,0 +1,151 @@
+# utils/shared_network.py
+"""
+Derlenmiş ağı worker süreçleri arasında paylaşımlı bellekte tutar.
+
+Düzen: "<prefix>_ctl" adlı 8 baytlık kontrol bloğu güncel sürüm numarasını,
+"<prefix>_v<sürüm>" adlı veri bloğu ise
+
+    [8 bayt başlık uzunluğu][JSON başlık][hizalama][dizi 1][dizi 2]...
+
+içerir. Başlıkta durak kimlikleri/adları, taksi tarifesi ve her dizinin tipi,
+ofseti ve uzunluğu bulunur. Worker'lar dizilere kopyasız NumPy görünümleri
+olarak bağlanır; yayıncı yeni sürüm yazıp kontrol bloğunu artırdığında
+worker'lar bir sonraki istekte yeni sürüme geçer.
+
+Yeni sürüm yayınlamak için:
+
+    python -m utils.shared_network data/stops.json route_planner
+"""
+import json
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from models.network import ARRAY_FIELDS, CompiledNetwork
+
+NUMPY_TYPES = {"b": np.int8, "l": np.int64, "d": np.float64}
+HEADER_SIZE = 8
+ALIGN = 8
+
+
+def _open_shm(name, create=False, size=0):
+    # Bloklar yayıncı süreçten uzun yaşamalı; resource_tracker çıkışta silmesin.
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _unlink(name):
+    try:
+        shm = _open_shm(name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    if getattr(shm, "_track", True):
+        # Python < 3.13'te unlink() tracker kaydını da siler; kaydı geri ekleyip dengele.
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class SharedNetworkStore:
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def _block_name(self, version):
+        return f"{self.prefix}_v{version}"
+
+    def current_version(self):
+        """Yayınlanmış son sürüm; hiç yayın yoksa 0."""
+        try:
+            ctl = _open_shm(self.prefix + "_ctl")
+        except FileNotFoundError:
+            return 0
+        try:
+            return int.from_bytes(ctl.buf[:8], "little")
+        finally:
+            ctl.close()
+
+    def publish(self, network, meta):
+        """
+        Ağı yeni bir sürüm olarak yazar ve sürüm numarasını döndürür.
+        meta: JSON'a çevrilebilir ek bilgiler (taksi tarifesi, şehir vb.).
+        Önceki sürümün adı silinir; ona bağlı worker'lar yeni sürüme
+        geçene kadar eski eşlemeyi kullanmaya devam eder.
+        """
+        old_version = self.current_version()
+        version = old_version + 1
+        arrays = {field: np.asarray(getattr(network, field), dtype=NUMPY_TYPES[code])
+                  for field, code in ARRAY_FIELDS}
+        layout = {}
+        offset = 0  # veri alanının başına göre
+        for field, arr in arrays.items():
+            layout[field] = [arr.dtype.str, offset, int(arr.size)]
+            offset = _align(offset + arr.nbytes)
+        body = json.dumps({"version": version, "ids": list(network.ids), "names": list(network.names),
+                           "meta": meta, "arrays": layout}, ensure_ascii=False).encode("utf-8")
+        data_start = _align(HEADER_SIZE + len(body))
+
+        shm = _open_shm(self._block_name(version), create=True, size=max(data_start + offset, 1))
+        shm.buf[:HEADER_SIZE] = len(body).to_bytes(HEADER_SIZE, "little")
+        shm.buf[HEADER_SIZE:HEADER_SIZE + len(body)] = body
+        for field, arr in arrays.items():
+            _, off, size = layout[field]
+            np.ndarray(size, dtype=arr.dtype, buffer=shm.buf, offset=data_start + off)[:] = arr
+        shm.close()
+
+        try:
+            ctl = _open_shm(self.prefix + "_ctl")
+        except FileNotFoundError:
+            ctl = _open_shm(self.prefix + "_ctl", create=True, size=8)
+        ctl.buf[:8] = version.to_bytes(8, "little")
+        ctl.close()
+        if old_version:
+            _unlink(self._block_name(old_version))
+        return version
+
+    def attach(self, version=None):
+        """
+        (network, meta, version) döndürür. Dizi alanları paylaşımlı belleğe
+        bakan salt okunur NumPy görünümleridir; ağ nesnesi bloğu canlı tutar.
+        """
+        version = version or self.current_version()
+        if not version:
+            raise FileNotFoundError(f"{self.prefix}: yayınlanmış ağ yok")
+        shm = _open_shm(self._block_name(version))
+        size = int.from_bytes(shm.buf[:HEADER_SIZE], "little")
+        header = json.loads(bytes(shm.buf[HEADER_SIZE:HEADER_SIZE + size]).decode("utf-8"))
+        data_start = _align(HEADER_SIZE + size)
+        arrays = {}
+        for field, (dtype, off, length) in header["arrays"].items():
+            view = np.ndarray(length, dtype=np.dtype(dtype), buffer=shm.buf, offset=data_start + off)
+            view.flags.writeable = False
+            arrays[field] = view
+        network = CompiledNetwork.from_arrays(header["ids"], header["names"], arrays)
+        network._shm = shm
+        return network, header["meta"], header["version"]
+
+    def unlink(self):
+        """Güncel sürümü ve kontrol bloğunu siler (kapatırken)."""
+        version = self.current_version()
+        if version:
+            _unlink(self._block_name(version))
+        _unlink(self.prefix + "_ctl")
+
+
+if __name__ == "__main__":
+    from app import load_planner
+
+    if len(sys.argv) not in (3, 4):
+        print("Kullanım: python -m utils.shared_network <stops.json> <prefix> [yürüme aktarma yarıçapı km]")
+        sys.exit(1)
+    meta, planner = load_planner(sys.argv[1], float(sys.argv[3]) if len(sys.argv) == 4 else 0.0)
+    v = SharedNetworkStore(sys.argv[2]).publish(planner.network, meta)
+    print(f"{sys.argv[2]}: sürüm {v} yayınlandı ({len(planner.network)} durak)")
@@ -0,0 +1,20 @@
+# wsgi.py
+"""
+Üretim için WSGI giriş noktası:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py preload_app=True kullanır: bu modül master süreçte bir kez
+içe aktarılır, ağ derlenir ve ısınma sorguları çalışır; worker'lar ardından
+fork edilir ve aynı bellek sayfalarını copy-on-write ile paylaşır.
+SECRET_KEY ortam değişkeni mutlaka verilmelidir.
+"""
+import gc
+
+from app import create_app
+
+app = create_app()
+
+# Açılışta oluşan tüm nesneleri GC takibinden çıkar; worker'lardaki çöp
+# toplama turları bu nesnelere dokunup paylaşılan sayfaları kopyalatmasın.
+gc.freeze()